@@ -26,14 +26,19 @@ class WorkflowConfig(AppConfig):
 
         if not ("makemigrations" in sys.argv or "migrate" in sys.argv or "migrate_all_schemes" in sys.argv):
             from workflow.system import get_system_workflow_manager
+            from workflow.utils import is_special_execution_context
 
-            system_workflow_manager = get_system_workflow_manager()
-            system_workflow_manager.register_workflows()
+            # spaces are loaded on first use, only recently active ones are loaded ahead
+            if settings.WORKFLOW_WARMUP_DAYS and not is_special_execution_context():
+                get_system_workflow_manager().start_warm_up(settings.WORKFLOW_WARMUP_DAYS)
         else:
             _l.info("system_workflow_manager ignored - TEST MODE")
 
         post_migrate.connect(self.bootstrap, sender=self)
 
+        # connects the Schedule signals
+        import workflow.schedule_index  # noqa: F401
+
     def bootstrap(self, app_config, verbosity=2, using=DEFAULT_DB_ALIAS, **kwargs):
         try:
             _l.info("Bootstrapping Workflow Application")
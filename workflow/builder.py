@@ -3,6 +3,7 @@ import logging
 from celery import chain, group
 from celery.utils import uuid
 
+from workflow.claim_check import offload
 from workflow.exceptions import WorkflowSyntaxError
 from workflow.models import Task, Workflow
 from workflow.system import get_system_workflow_manager
@@ -23,6 +24,7 @@ class WorkflowBuilder:
     def __init__(self, workflow_id, workflow_data):
         self.workflow_id = workflow_id
         self._workflow = None
+        self._payload_reference = None
         self.workflow_data = workflow_data  # Pass in the workflow data (which might have a version)
 
     @property
@@ -31,6 +33,13 @@ class WorkflowBuilder:
             self._workflow = Workflow.objects.get(id=self.workflow_id)
         return self._workflow
 
+    @property
+    def payload_reference(self):
+        # offloaded once per run, every task message carries the same reference
+        if self._payload_reference is None:
+            self._payload_reference = offload(self.workflow.payload)
+        return self._payload_reference
+
     def new_task(self, task_name, is_hook=False, single=True, node_id=None):
         task_id = uuid()
 
@@ -40,7 +49,7 @@ class WorkflowBuilder:
         signature = execute_workflow_step.subtask(
             kwargs={
                 "workflow_id": self.workflow_id,
-                "payload": self.workflow.payload,
+                "payload": self.payload_reference,
                 "context": {
                     "realm_code": self.workflow.space.realm_code,
                     "space_code": self.workflow.space.space_code,
@@ -63,6 +72,9 @@ class WorkflowBuilder:
         )
         task.save()
 
+        if not is_hook:
+            self.pending_tasks += 1
+
         if single:
             self.previous = [signature.id]
 
@@ -105,6 +117,7 @@ class WorkflowBuilder:
 
         self.canvas = []
         self.previous = []
+        self.pending_tasks = 0
 
         # Retrieve general task and queue information
         self.queue = system_workflow_manager.get_queue(str(self.workflow))
@@ -196,6 +209,9 @@ class WorkflowBuilder:
 
         self.build_hooks()
 
+        # the end task counts too, see Workflow.complete_pending_task
+        Workflow.objects.filter(id=self.workflow_id).update(pending_tasks=self.pending_tasks + 1)
+
         try:
             return canvas.apply_async(
                 link=self.success_hook_canvas,
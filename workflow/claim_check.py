@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.fields.json import KeyTextTransform
+from django.utils.timezone import now
+
+_l = logging.getLogger("workflow")
+
+CLAIM_CHECK_KEY = "$claim_check"
+
+
+def is_reference(value):
+    return isinstance(value, dict) and CLAIM_CHECK_KEY in value
+
+
+def offload(value, threshold=None):
+    """
+    Move a JSON value to the blob store when its serialized size reaches the
+    threshold and return a reference to it, smaller values are returned as is.
+
+    Blobs are content-addressed, offloading the same value twice stores it once.
+    """
+    if value is None or is_reference(value):
+        return value
+
+    if threshold is None:
+        threshold = settings.WORKFLOW_CLAIM_CHECK_THRESHOLD
+
+    if not threshold:
+        return value
+
+    serialized = json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    if len(serialized) < threshold:
+        return value
+
+    from workflow.models import PayloadBlob
+
+    digest = hashlib.sha256(serialized).hexdigest()
+    # a reused blob counts as new for collect_blobs
+    if not PayloadBlob.objects.filter(digest=digest).update(modified_at=now()):
+        PayloadBlob.objects.get_or_create(
+            digest=digest,
+            defaults={"size": len(serialized), "data": zlib.compress(serialized)},
+        )
+
+    _l.debug("claim_check.offload %s bytes to %s", len(serialized), digest)
+
+    return {CLAIM_CHECK_KEY: digest, "size": len(serialized)}
+
+
+def resolve(value):
+    """Return the value a reference points to, anything else is returned as is."""
+    if not is_reference(value):
+        return value
+
+    from workflow.models import PayloadBlob
+
+    blob = PayloadBlob.objects.get(digest=value[CLAIM_CHECK_KEY])
+    return json.loads(zlib.decompress(bytes(blob.data)))
+
+
+def collect_blobs(retention_days=None):
+    """
+    Delete the blobs of the current schema that were not stored or reused in
+    the last retention days and that no task, workflow or memoized result
+    refers to, return how many were deleted.
+
+    The retention covers references that only live in queued messages.
+    """
+    from workflow.models import NodeResultCache, PayloadBlob, Task, Workflow
+
+    if retention_days is None:
+        retention_days = settings.WORKFLOW_CLAIM_CHECK_RETENTION_DAYS
+
+    references = (
+        (Task, "payload_data"),
+        (Task, "result_data"),
+        (Task, "previous_data"),
+        (Workflow, "payload_data"),
+        (Workflow, "last_task_output"),
+        (NodeResultCache, "result_data"),
+    )
+
+    blobs = PayloadBlob.objects.filter(modified_at__lt=now() - timedelta(days=retention_days))
+    for model, field_name in references:
+        referenced = (
+            model.objects.annotate(digest=KeyTextTransform(CLAIM_CHECK_KEY, field_name))
+            .filter(digest__isnull=False)
+            .values("digest")
+        )
+        blobs = blobs.exclude(digest__in=referenced)
+
+    deleted, _ = blobs.delete()
+    if deleted:
+        _l.info("claim_check.collect_blobs deleted %s blobs", deleted)
+    return deleted
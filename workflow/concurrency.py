@@ -0,0 +1,107 @@
+import logging
+
+from django.db import connection
+from django.utils.timezone import now
+
+_l = logging.getLogger("workflow")
+
+POLICY_ALLOW = "allow"
+POLICY_SKIP = "skip"
+POLICY_QUEUE = "queue"
+POLICY_REPLACE = "replace"
+POLICY_MAX = "max"
+
+POLICIES = (POLICY_ALLOW, POLICY_SKIP, POLICY_QUEUE, POLICY_REPLACE, POLICY_MAX)
+
+
+def get_concurrency_policy(wf, workflow_template=None):
+    """
+    Return (policy, limit) declared as "concurrency" in workflow.yaml or in
+    the template, either a policy name or {"policy": "max", "limit": 3}.
+
+    Without a declaration any number of runs may overlap.
+    """
+    conf = wf.get("workflow", {}).get("concurrency")
+    if conf is None and workflow_template is not None:
+        conf = (workflow_template.data or {}).get("workflow", {}).get("concurrency")
+
+    if not conf:
+        return POLICY_ALLOW, None
+
+    if isinstance(conf, str):
+        policy, limit = conf, 1
+    else:
+        policy, limit = conf.get("policy", POLICY_MAX), int(conf.get("limit", 1))
+
+    if policy not in POLICIES:
+        raise Exception(f"Unknown concurrency policy {policy}, expected one of {', '.join(POLICIES)}")
+
+    return policy, max(limit, 1)
+
+
+def lock_user_code(space_code, user_code):
+    """Serialize admissions of one workflow until the transaction ends."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(hashtext(%s))", [f"workflow.concurrency:{space_code}:{user_code}"]
+        )
+
+
+def admit_workflow(workflow, policy, limit):
+    """
+    Save a new run according to the concurrency policy of its workflow and
+    return the active runs it replaces.
+
+    The run is saved as canceled when skipped, as queued when it has to
+    wait for a slot. Must run in a transaction.
+    """
+    from workflow.models import Workflow
+
+    workflow.concurrency_policy = policy
+    if policy == POLICY_ALLOW:
+        workflow.save()
+        return []
+
+    lock_user_code(workflow.space.space_code, workflow.user_code)
+
+    active = Workflow.objects.filter(user_code=workflow.user_code, status__in=Workflow.ACTIVE_STATUSES)
+    replaced = []
+
+    if policy == POLICY_REPLACE:
+        replaced = list(active)
+
+    elif policy == POLICY_QUEUE:
+        # runs queued earlier go first
+        queued = Workflow.objects.filter(user_code=workflow.user_code, status=Workflow.STATUS_QUEUED).exists()
+        if queued or active.count() >= limit:
+            workflow.status = Workflow.STATUS_QUEUED
+
+    elif active.count() >= limit:
+        workflow.status = Workflow.STATUS_CANCELED
+        workflow.finished_at = now()
+
+    workflow.save()
+
+    if workflow.status != Workflow.STATUS_INIT:
+        _l.info(f"admit_workflow: {workflow.user_code} run {workflow.id} is {workflow.status} by {policy} policy")
+
+    return replaced
+
+
+def take_queued_workflows(user_code, space_code, limit):
+    """
+    Move the oldest queued runs that fit in the free slots back to init and
+    return them. Must run in a transaction.
+    """
+    from workflow.models import Workflow
+
+    lock_user_code(space_code, user_code)
+
+    free = limit - Workflow.objects.filter(user_code=user_code, status__in=Workflow.ACTIVE_STATUSES).count()
+    if free <= 0:
+        return []
+
+    queued = Workflow.objects.filter(user_code=user_code, status=Workflow.STATUS_QUEUED).order_by("created_at", "id")
+    return [
+        workflow for workflow in queued[:free] if workflow.transition((Workflow.STATUS_QUEUED,), Workflow.STATUS_INIT)
+    ]
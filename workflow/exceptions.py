@@ -20,3 +20,15 @@ class UserNotFound(Exception):
 
 class TaskNotFound(Exception):
     pass
+
+
+class QueueLimitReached(Exception):
+    pass
+
+
+class PublishTimeout(Exception):
+    pass
+
+
+class TooManyStreams(Exception):
+    pass
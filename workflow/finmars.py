@@ -356,7 +356,16 @@ def execute_task(task_name, payload=None):
 
 
 def update_task_status(platform_task_id, status, result=None, error=None):
-    refresh = get_refresh_token()
+    response = post_task_status(get_refresh_token(), get_base_path(), platform_task_id, status, result, error)
+    try:
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        _l.error("update_task_status error: %s", e)
+
+
+def post_task_status(refresh, base_path, platform_task_id, status, result=None, error=None):
+    """Post a task status to the platform, the token and base path can be reused across calls."""
     headers = {
         "Content-type": "application/json",
         "Accept": "application/json",
@@ -369,13 +378,14 @@ def update_task_status(platform_task_id, status, result=None, error=None):
         "error": error,
     }
 
-    url = f"{get_base_path()}/api/v1/tasks/task/{platform_task_id}/update-status/"
-    response = requests.post(url=url, data=json.dumps(data), headers=headers, verify=settings.VERIFY_SSL)
-    try:
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        _l.error("update_task_status error: %s", e)
+    url = f"{base_path}/api/v1/tasks/task/{platform_task_id}/update-status/"
+    return requests.post(
+        url=url,
+        data=json.dumps(data),
+        headers=headers,
+        verify=settings.VERIFY_SSL,
+        timeout=settings.WORKFLOW_CALLBACK_TIMEOUT,
+    )
 
 
 def get_task(id):
@@ -2,12 +2,11 @@ import os
 
 from celery.utils.nodenames import default_nodename
 from django.core.management import BaseCommand
-from django.db import connection
 
 __author__ = "szhitenev"
 
 from workflow.system import get_system_workflow_manager
-from workflow.utils import get_all_tenant_schemas
+from workflow.utils import get_all_tenant_schemas, set_search_path
 
 system_workflow_manager = get_system_workflow_manager()
 
@@ -19,8 +18,7 @@ class Command(BaseCommand):
         try:
             for schema in get_all_tenant_schemas():
                 # Set the search path to the tenant's schema
-                with connection.cursor() as cursor:
-                    cursor.execute(f"SET search_path TO {schema};")
+                set_search_path(schema)
 
                 worker_name = default_nodename(os.getenv("WORKFLOW_WORKER_NAME"))
 
@@ -28,8 +26,7 @@ class Command(BaseCommand):
                 system_workflow_manager.cancel_all_existing_tasks(worker_name)
 
             # Optionally, reset the search path to default after migrating
-            with connection.cursor() as cursor:
-                cursor.execute("SET search_path TO public;")
+            set_search_path("public")
 
         except Exception as e:
             print(f"cancel_existing_tasks error e {e}")
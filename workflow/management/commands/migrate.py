@@ -1,5 +1,7 @@
 from django.core.management.commands.migrate import Command as OriginalMigrateCommand
-from django.db import connection
+
+from workflow.schemas import notify_schemas_changed
+from workflow.utils import set_search_path
 
 
 class Command(OriginalMigrateCommand):
@@ -9,6 +11,9 @@ class Command(OriginalMigrateCommand):
 
     def handle(self, *args, **options):
         if space_code := options.get("space_code"):
-            with connection.cursor() as cursor:
-                cursor.execute(f"SET search_path TO {space_code};")
+            set_search_path(space_code)
         super().handle(*args, **options)
+
+        if options.get("space_code"):
+            # a space is migrated when it is created, running workers pick it up
+            notify_schemas_changed()
@@ -1,24 +1,121 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import StringIO
+
+from django.conf import settings
 from django.core.management import call_command
-from django.core.management.base import BaseCommand
-from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.migrations.loader import MigrationLoader
+
+from workflow.utils import get_all_tenant_schemas, set_search_path
+
+
+def get_applied_migrations(schemas):
+    """Applied (app, name) migrations of every schema, read in one query."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT table_schema FROM information_schema.tables "
+            "WHERE table_name = 'django_migrations' AND table_schema = ANY(%s)",
+            [list(schemas)],
+        )
+        migrated = [row[0] for row in cursor.fetchall()]
+
+        applied = {schema: set() for schema in schemas}
+        if not migrated:
+            return applied
+
+        sql = " UNION ALL ".join(
+            f"SELECT %s, app, name FROM {connection.ops.quote_name(schema)}.django_migrations" for schema in migrated
+        )
+        cursor.execute(sql, migrated)
+        for schema, app, name in cursor.fetchall():
+            applied[schema].add((app, name))
+
+    return applied
+
+
+def get_pending_schemas(schemas):
+    """Schemas with at least one migration on disk that is not applied."""
+    expected = set(MigrationLoader(None, ignore_no_migrations=True).graph.nodes)
+    applied = get_applied_migrations(schemas)
+    return [schema for schema in schemas if not expected <= applied[schema]]
+
+
+def migrate_schema(schema, args, options):
+    """Run migrate for one schema, return its output."""
+    output = StringIO()
+    set_search_path(schema)
+    try:
+        call_command("migrate", *args, stdout=output, stderr=output, **options)
+    finally:
+        set_search_path("public")
+    return output.getvalue()
 
-from workflow.utils import get_all_tenant_schemas
+
+def migrate_schema_in_worker(schema, args, options):
+    """Run migrate for one schema in a pool worker."""
+    import django
+
+    # spawned workers start without django
+    django.setup()
+
+    return migrate_schema(schema, args, options)
 
 
 class Command(BaseCommand):
     help = "Apply database migrations to all tenant schemas."
 
+    def add_arguments(self, parser):
+        parser.add_argument("args", metavar="app_label", nargs="*", help="Passed to migrate")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.WORKFLOW_MIGRATE_WORKERS,
+            help="Schemas migrated at the same time",
+        )
+
     def handle(self, *args, **options):
-        for schema in get_all_tenant_schemas():
-            self.stdout.write(self.style.SUCCESS(f"Applying migrations to {schema}..."))
+        workers = max(options.pop("workers"), 1)
+        schemas = get_all_tenant_schemas()
+
+        # a target migration may go backwards, only a plain migrate can be skipped
+        pending = list(schemas) if args else get_pending_schemas(schemas)
+        self.stdout.write(f"{len(schemas) - len(pending)} of {len(schemas)} schemas are up to date")
+        if not pending:
+            return
+
+        failed = {}
+        started = time.monotonic()
+
+        # migrations create shared objects in public, they must exist before tenants migrate concurrently
+        if "public" in pending:
+            pending.remove("public")
+            output = migrate_schema("public", args, options)
+            self.stdout.write(self.style.SUCCESS("public migrated"))
+            if options["verbosity"] > 1:
+                self.stdout.write(output)
+
+        # forked workers must not share the parent's connection
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=max(min(workers, len(pending)), 1)) as executor:
+            futures = {executor.submit(migrate_schema_in_worker, schema, args, options): schema for schema in pending}
+
+            for done, future in enumerate(as_completed(futures), start=1):
+                schema = futures[future]
+                try:
+                    output = future.result()
+                except Exception as e:
+                    failed[schema] = e
+                    self.stderr.write(self.style.ERROR(f"[{done}/{len(pending)}] {schema} failed: {e}"))
+                    continue
 
-            # Set the search path to the tenant's schema
-            with connection.cursor() as cursor:
-                cursor.execute(f"SET search_path TO {schema};")
+                self.stdout.write(self.style.SUCCESS(f"[{done}/{len(pending)}] {schema} migrated"))
+                if options["verbosity"] > 1:
+                    self.stdout.write(output)
 
-            # Programmatically call the migrate command
-            call_command("migrate", *args, **options)
+        self.stdout.write(f"Migrated {len(pending) - len(failed)} schemas in {time.monotonic() - started:.1f}s")
 
-            # Optionally, reset the search path to default after migrating
-            with connection.cursor() as cursor:
-                cursor.execute("SET search_path TO public;")
+        if failed:
+            raise CommandError(f"Migrations failed for {len(failed)} schemas: {', '.join(sorted(failed))}")
@@ -3,7 +3,7 @@ from django.core.management.base import BaseCommand
 from django.db import connection
 from django.db.models import AutoField
 
-from workflow.utils import get_all_tenant_schemas
+from workflow.utils import get_all_tenant_schemas, set_search_path
 
 
 class Command(BaseCommand):
@@ -14,9 +14,8 @@ class Command(BaseCommand):
 
         for schema in get_all_tenant_schemas():
             # Set the search path to the tenant's schema
+            set_search_path(schema)
             with connection.cursor() as cursor:
-                cursor.execute(f"SET search_path TO {schema};")
-
                 for model in models:
                     if not model._meta.managed:
                         continue
@@ -0,0 +1,86 @@
+import hashlib
+import inspect
+import json
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils.timezone import now
+
+_l = logging.getLogger("workflow")
+
+
+def get_memoize_ttl(task):
+    """
+    Return the TTL in seconds of a v2 node that opted in with ``"memoize": true``
+    or ``"memoize": {"ttl": 3600}`` in its data, None when it did not.
+    """
+    workflow = task.workflow
+    if not workflow.workflow_template or not task.node_id:
+        return None
+
+    from workflow.plan import get_workflow_plan
+
+    plan = get_workflow_plan(workflow.workflow_template, workflow.space.space_code)
+    node = plan.nodes.get(task.node_id)
+    memoize = node and node["data"].get("memoize")
+    if not memoize:
+        return None
+
+    if isinstance(memoize, dict):
+        return int(memoize.get("ttl") or settings.WORKFLOW_MEMOIZE_DEFAULT_TTL)
+
+    return settings.WORKFLOW_MEMOIZE_DEFAULT_TTL
+
+
+def get_function_source(func):
+    """Contents of the file a registered task function comes from."""
+    func = getattr(func, "func", func)  # registered tasks are partials
+    return Path(inspect.getsourcefile(func)).read_text()
+
+
+def make_cache_key(name, source, payload, previous_output):
+    key = json.dumps([name, source, payload, previous_output], cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def call_memoized(base_task, func, args, kwargs, source=None):
+    """
+    Call func(base_task, *args, **kwargs) unless a result for the same node
+    source and inputs is cached, the hit or miss is recorded on the Task.
+
+    source defaults to the file func is defined in.
+    """
+    from workflow.models import NodeResultCache
+
+    task = base_task.task
+    ttl = get_memoize_ttl(task)
+    if not ttl:
+        return func(base_task, *args, **kwargs)
+
+    if source is None:
+        source = get_function_source(func)
+
+    key = make_cache_key(task.name, source, kwargs.get("payload"), kwargs.get("previous_output"))
+
+    entry = NodeResultCache.objects.filter(key=key, expires_at__gt=now()).first()
+    if entry:
+        NodeResultCache.objects.filter(id=entry.id).update(hits=F("hits") + 1, last_used_at=now())
+        _l.info(f"call_memoized: cache hit for task {task.id} ({key})")
+        record_cache_status(task, task.CACHE_HIT)
+        return entry.result
+
+    record_cache_status(task, task.CACHE_MISS)
+
+    result = func(base_task, *args, **kwargs)
+
+    NodeResultCache.objects.store(key, result, ttl)
+
+    return result
+
+
+def record_cache_status(task, cache_status):
+    task.cache_status = cache_status
+    task.save(update_fields=["cache_status"])
@@ -1,9 +1,8 @@
 import logging
 
 from django.conf import settings
-from django.db import connection
 
-from workflow.utils import schema_exists
+from workflow.utils import schema_exists, set_search_path
 
 logger = logging.getLogger(__name__)
 
@@ -34,21 +33,18 @@ class RealmAndSpaceMiddleware:
                 # For demonstration, returning a simple HttpResponseBadRequest
                 # return HttpResponseBadRequest("Invalid space code.")
 
-                with connection.cursor() as cursor:
-                    cursor.execute("SET search_path TO public;")
+                set_search_path("public")
 
             else:
                 # Setting the PostgreSQL search path to the tenant's schema
-                with connection.cursor() as cursor:
-                    cursor.execute(f"SET search_path TO {request.space_code};")
+                set_search_path(request.space_code)
 
         else:
             # If we do not have realm_code, we suppose its legacy Space which do not need scheme changing
             request.space_code = path_parts[1]
 
             # Remain in public scheme
-            with connection.cursor() as cursor:
-                cursor.execute("SET search_path TO public;")
+            set_search_path("public")
 
         response = self.get_response(request)
 
@@ -59,8 +55,7 @@ class RealmAndSpaceMiddleware:
 
         # Optionally, reset the search path to default after the request is processed
         # This can be important in preventing "leakage" of the schema setting across requests
-        with connection.cursor() as cursor:
-            cursor.execute("SET search_path TO public;")
+        set_search_path("public")
 
         return response
 
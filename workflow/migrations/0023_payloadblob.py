@@ -0,0 +1,29 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0022_add_export_backend_historical_records_crontab_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayloadBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created')),
+                ('modified_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='modified')),
+                ('digest', models.CharField(max_length=64, unique=True, verbose_name='digest')),
+                ('size', models.BigIntegerField(verbose_name='size')),
+                ('data', models.BinaryField(verbose_name='data')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'get_latest_by': 'modified_at',
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0023_payloadblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeInputBarrier',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created')),
+                ('modified_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='modified')),
+                ('node_id', models.CharField(max_length=255, verbose_name='node id')),
+                ('pending', models.PositiveIntegerField(verbose_name='pending inputs')),
+                ('arrived', models.JSONField(default=list, verbose_name='arrived inputs')),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='input_barriers', to='workflow.workflow', verbose_name='workflow')),
+            ],
+            options={
+                'unique_together': {('workflow', 'node_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0024_nodeinputbarrier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='queue',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='queue'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0025_task_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='resumed_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resumes', to='workflow.workflow', verbose_name='resumed from'),
+        ),
+    ]
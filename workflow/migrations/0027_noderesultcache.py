@@ -0,0 +1,36 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0026_workflow_resumed_from'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeResultCache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created')),
+                ('modified_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='modified')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='key')),
+                ('result_data', models.TextField(blank=True, null=True, verbose_name='result data')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='expires at')),
+                ('last_used_at', models.DateTimeField(db_index=True, verbose_name='last used at')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='hits')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'get_latest_by': 'modified_at',
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='cache_status',
+            field=models.CharField(blank=True, choices=[('hit', 'hit'), ('miss', 'miss')], max_length=16, null=True, verbose_name='cache status'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0027_noderesultcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformCallback',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='created')),
+                ('modified_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='modified')),
+                ('platform_task_id', models.IntegerField(verbose_name='platform task id')),
+                ('status', models.CharField(max_length=255, verbose_name='status')),
+                ('state', models.CharField(choices=[('pending', 'pending'), ('delivered', 'delivered'), ('failed', 'failed')], db_index=True, default='pending', max_length=16, verbose_name='state')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='attempts')),
+                ('next_attempt_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='next attempt at')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='delivered at')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='last error')),
+                ('workflow', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='platform_callbacks', to='workflow.workflow', verbose_name='workflow')),
+            ],
+            options={
+                'unique_together': {('workflow', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0028_platformcallback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='pending_tasks',
+            field=models.IntegerField(blank=True, null=True, verbose_name='pending tasks'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0029_workflow_pending_tasks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='enqueued_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='enqueued at'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='started at'),
+        ),
+    ]
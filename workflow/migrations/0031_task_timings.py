@@ -0,0 +1,18 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0030_task_enqueued_at_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='timings',
+            field=models.JSONField(blank=True, null=True, verbose_name='timings'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0031_task_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskLogLine',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.PositiveIntegerField(verbose_name='line number')),
+                ('message', models.TextField(verbose_name='message')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created at')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_lines', to='workflow.task', verbose_name='task')),
+            ],
+            options={
+                'unique_together': {('task', 'line_number')},
+            },
+        ),
+    ]
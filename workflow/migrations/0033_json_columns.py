@@ -0,0 +1,39 @@
+# Generated by Django 4.2.22 on 2026-10-18 15:02
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0032_tasklogline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='payload_jsonb',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='payload data'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='result_jsonb',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='result data'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='progress_jsonb',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='progress data'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='previous_jsonb',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='previous data'),
+        ),
+        migrations.AddField(
+            model_name='workflow',
+            name='payload_jsonb',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='payload data'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+# columns holding json.dumps() text, values of the offloaded ones may become claim-check references
+COLUMNS = {
+    "Task": {"payload": True, "result": True, "progress": False, "previous": True},
+    "Workflow": {"payload": True},
+}
+
+
+def offload(PayloadBlob, value):
+    # same format as workflow.claim_check.offload, with the historical model
+    if not isinstance(value, (dict, list)) or "$claim_check" in value:
+        return value
+
+    serialized = json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    if not settings.WORKFLOW_CLAIM_CHECK_THRESHOLD or len(serialized) < settings.WORKFLOW_CLAIM_CHECK_THRESHOLD:
+        return value
+
+    digest = hashlib.sha256(serialized).hexdigest()
+    PayloadBlob.objects.get_or_create(
+        digest=digest,
+        defaults={"size": len(serialized), "data": zlib.compress(serialized)},
+    )
+    return {"$claim_check": digest, "size": len(serialized)}
+
+
+def decode(text):
+    if text is None or text == "":
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def backfill(apps, schema_editor):
+    PayloadBlob = apps.get_model("workflow", "PayloadBlob")
+
+    for model_name, columns in COLUMNS.items():
+        model = apps.get_model("workflow", model_name)
+        text_fields = [f"{name}_data" for name in columns]
+        json_fields = [f"{name}_jsonb" for name in columns]
+
+        last_id = 0
+        while True:
+            # one transaction per batch, a large table is not locked for the whole backfill
+            with transaction.atomic():
+                rows = list(model.objects.filter(id__gt=last_id).order_by("id").values("id", *text_fields)[:BATCH_SIZE])
+                if not rows:
+                    break
+
+                instances = []
+                for row in rows:
+                    instance = model(id=row["id"])
+                    for name, offloaded in columns.items():
+                        value = decode(row[f"{name}_data"])
+                        setattr(instance, f"{name}_jsonb", offload(PayloadBlob, value) if offloaded else value)
+                    instances.append(instance)
+
+                model.objects.bulk_update(instances, json_fields)
+                last_id = rows[-1]["id"]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('workflow', '0033_json_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
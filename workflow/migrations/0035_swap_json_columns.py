@@ -0,0 +1,58 @@
+# Generated by Django 4.2.22 on 2026-10-18 15:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0034_backfill_json_columns'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='task',
+            name='payload_data',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='payload_jsonb',
+            new_name='payload_data',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='result_data',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='result_jsonb',
+            new_name='result_data',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='progress_data',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='progress_jsonb',
+            new_name='progress_data',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='previous_data',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='previous_jsonb',
+            new_name='previous_data',
+        ),
+        migrations.RemoveField(
+            model_name='workflow',
+            name='payload_data',
+        ),
+        migrations.RenameField(
+            model_name='workflow',
+            old_name='payload_jsonb',
+            new_name='payload_data',
+        ),
+    ]
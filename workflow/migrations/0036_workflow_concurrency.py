@@ -0,0 +1,22 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0035_swap_json_columns'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workflow',
+            name='status',
+            field=models.CharField(choices=[('init', 'init'), ('queued', 'queued'), ('progress', 'progress'), ('wait', 'wait'), ('success', 'success'), ('error', 'error'), ('timeout', 'timeout'), ('canceled', 'canceled')], default='init', max_length=255, null=True, verbose_name='status'),
+        ),
+        migrations.AddIndex(
+            model_name='workflow',
+            index=models.Index(fields=['user_code', 'status'], name='workflow_wo_user_co_a78347_idx'),
+        ),
+    ]
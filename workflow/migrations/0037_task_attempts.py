@@ -0,0 +1,29 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:35
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0036_workflow_concurrency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='attempt_history',
+            field=models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='attempt history'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='attempts',
+            field=models.PositiveIntegerField(default=1, verbose_name='attempts'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=models.CharField(choices=[('init', 'INIT'), ('progress', 'PROGRESS'), ('nested-progress', 'nested-progress'), ('retry', 'RETRY'), ('success', 'SUCCESS'), ('error', 'ERROR'), ('timeout', 'TIMEOUT'), ('canceled', 'CANCELED')], default='init', max_length=255, null=True, verbose_name='status'),
+        ),
+    ]
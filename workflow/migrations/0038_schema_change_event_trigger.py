@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# Notify workers when a tenant schema is created or dropped, see workflow.schemas.
+# Event triggers need a superuser, without one workers rely on the registry TTL.
+CREATE_TRIGGER = """
+-- tenants migrating concurrently must not run the shared DDL at the same time
+SELECT pg_advisory_xact_lock(hashtext('workflow.public_ddl'));
+DO $$
+BEGIN
+    CREATE OR REPLACE FUNCTION public.workflow_notify_schema_change() RETURNS event_trigger AS $fn$
+    BEGIN
+        PERFORM pg_notify('workflow_schemas', tg_tag);
+    END
+    $fn$ LANGUAGE plpgsql;
+
+    DROP EVENT TRIGGER IF EXISTS workflow_schema_change;
+    CREATE EVENT TRIGGER workflow_schema_change ON ddl_command_end
+        WHEN TAG IN ('CREATE SCHEMA', 'DROP SCHEMA')
+        EXECUTE FUNCTION public.workflow_notify_schema_change();
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'workflow_schema_change event trigger not created: %', SQLERRM;
+END
+$$;
+"""
+
+DROP_TRIGGER = """
+SELECT pg_advisory_xact_lock(hashtext('workflow.public_ddl'));
+DO $$
+BEGIN
+    DROP EVENT TRIGGER IF EXISTS workflow_schema_change;
+    DROP FUNCTION IF EXISTS public.workflow_notify_schema_change();
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'workflow_schema_change event trigger not dropped: %', SQLERRM;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0037_task_attempts'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Shared by all tenants, see workflow.schedule_index. Every schema that runs
+# this migration registers its own schedules.
+CREATE_INDEX = """
+-- tenants migrating concurrently must not run the shared DDL at the same time
+SELECT pg_advisory_xact_lock(hashtext('workflow.public_ddl'));
+CREATE TABLE IF NOT EXISTS public.workflow_schedule_index (
+    schema_name text PRIMARY KEY,
+    enabled_count integer NOT NULL,
+    last_change timestamp with time zone NOT NULL
+);
+
+INSERT INTO public.workflow_schedule_index (schema_name, enabled_count, last_change)
+SELECT current_schema(), count(*), now()
+FROM workflow_schedule s
+JOIN django_celery_beat_periodictask p ON p.id = s.periodictask_ptr_id
+WHERE p.enabled
+ON CONFLICT (schema_name)
+DO UPDATE SET enabled_count = EXCLUDED.enabled_count, last_change = EXCLUDED.last_change;
+"""
+
+# the table stays, other schemas may still use it
+DROP_INDEX = """
+DELETE FROM public.workflow_schedule_index WHERE schema_name = current_schema();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0038_schema_change_event_trigger'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:51
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0039_schedule_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='noderesultcache',
+            name='result_data',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='result data'),
+        ),
+    ]
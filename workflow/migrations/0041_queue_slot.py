@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# Shared by all tenants, see workflow.utils.reserve_queue_slot
+CREATE_SLOTS = """
+-- tenants migrating concurrently must not run the shared DDL at the same time
+SELECT pg_advisory_xact_lock(hashtext('workflow.public_ddl'));
+CREATE TABLE IF NOT EXISTS public.workflow_queue_slot (
+    queue text NOT NULL,
+    schema_name text NOT NULL,
+    task_id bigint NOT NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    PRIMARY KEY (queue, schema_name, task_id)
+);
+"""
+
+# the table stays, other schemas may still use it
+DROP_SLOTS = """
+DELETE FROM public.workflow_queue_slot WHERE schema_name = current_schema();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0040_noderesultcache_result_data_json'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SLOTS, DROP_SLOTS),
+    ]
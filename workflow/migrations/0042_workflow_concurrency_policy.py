@@ -0,0 +1,18 @@
+# Generated by Django 4.2.22 on 2026-10-18 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0041_queue_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflow',
+            name='concurrency_policy',
+            field=models.CharField(blank=True, default='', max_length=16, verbose_name='concurrency policy'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytz
 from celery import schedules
@@ -8,14 +8,15 @@ from croniter import croniter
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models
+from django.db import connection, models, transaction
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy
 from django.utils.translation import gettext_lazy as _
 from django_celery_beat.models import CrontabSchedule, PeriodicTask
 
+from workflow.claim_check import offload, resolve
+from workflow.concurrency import POLICY_QUEUE
 from workflow.storage import get_storage
-from workflow.utils import get_next_node_by_condition
 from workflow_app import celery_app
 
 LANGUAGE_MAX_LENGTH = 5
@@ -29,6 +30,19 @@ _l = logging.getLogger("workflow")
 storage = get_storage()
 
 
+def resolve_cached(instance, field_name):
+    """
+    Value of a JSON column with claim-check references resolved, cached on
+    the instance until the column is assigned or reloaded.
+    """
+    stored = getattr(instance, field_name)
+    cache = instance.__dict__.setdefault("_resolved_cache", {})
+    cached = cache.get(field_name)
+    if cached is None or cached[0] is not stored:
+        cached = cache[field_name] = (stored, resolve(stored))
+    return cached[1]
+
+
 class User(AbstractUser):
     language = models.CharField(
         max_length=LANGUAGE_MAX_LENGTH,
@@ -91,6 +105,34 @@ class TimeStampedModel(models.Model):
         ]
 
 
+class StatusQuerySet(models.QuerySet):
+    def transition(self, from_statuses, status, **fields):
+        """
+        Move rows whose status is one of from_statuses to status with a single
+        conditional UPDATE of status and fields, True when a row changed.
+        """
+        return self.filter(status__in=from_statuses).update(status=status, modified_at=now(), **fields) > 0
+
+
+class StatusTransitionMixin:
+    def transition(self, from_statuses, status, **fields):
+        """
+        Apply a status transition to this row, see StatusQuerySet.transition.
+
+        The instance is only updated when the transition happened, a duplicate
+        or late transition leaves it as it is and returns False.
+        """
+        if not type(self).objects.filter(id=self.id).transition(from_statuses, status, **fields):
+            _l.info(f"{self!r}: transition to {status} rejected, status is not one of {from_statuses}")
+            return False
+
+        self.status = status
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+        return True
+
+
 class Space(TimeStampedModel):
     name = models.CharField(max_length=255, null=True, blank=True, verbose_name=gettext_lazy("name"))
 
@@ -126,7 +168,7 @@ class WorkflowTemplate(TimeStampedModel):
         unique_together = [["user_code", "space"]]
 
 
-class Workflow(TimeStampedModel):
+class Workflow(StatusTransitionMixin, TimeStampedModel):
     STATUS_INIT = "init"
     STATUS_PROGRESS = "progress"
     STATUS_WAIT = "wait"
@@ -134,9 +176,11 @@ class Workflow(TimeStampedModel):
     STATUS_ERROR = "error"
     STATUS_TIMEOUT = "timeout"
     STATUS_CANCELED = "canceled"
+    STATUS_QUEUED = "queued"
 
     STATUS_CHOICES = (
         (STATUS_INIT, "init"),
+        (STATUS_QUEUED, "queued"),
         (STATUS_PROGRESS, "progress"),
         (STATUS_WAIT, "wait"),
         (STATUS_SUCCESS, "success"),
@@ -145,6 +189,10 @@ class Workflow(TimeStampedModel):
         (STATUS_CANCELED, "canceled"),
     )
 
+    # runs that count against the concurrency policy, see workflow.concurrency
+    ACTIVE_STATUSES = (STATUS_INIT, STATUS_PROGRESS, STATUS_WAIT)
+    FINISHED_STATUSES = (STATUS_SUCCESS, STATUS_ERROR, STATUS_TIMEOUT, STATUS_CANCELED)
+
     name = models.CharField(max_length=255, null=True, blank=True, verbose_name=gettext_lazy("name"))
 
     workflow_template = models.ForeignKey(
@@ -173,7 +221,9 @@ class Workflow(TimeStampedModel):
         choices=STATUS_CHOICES,
         verbose_name="status",
     )
-    payload_data = models.TextField(null=True, blank=True, verbose_name=gettext_lazy("payload data"))
+    payload_data = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name=gettext_lazy("payload data")
+    )
     periodic = models.BooleanField(default=False, verbose_name=gettext_lazy("periodic"))
 
     is_manager = models.BooleanField(default=False, verbose_name=gettext_lazy("is manager"))
@@ -215,26 +265,42 @@ class Workflow(TimeStampedModel):
         on_delete=models.SET_NULL,
     )
 
+    resumed_from = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        related_name="resumes",
+        verbose_name=gettext_lazy("resumed from"),
+        on_delete=models.SET_NULL,
+    )
+
+    # v1 tasks (and the end task) still to finish, None for runs without a counter
+    pending_tasks = models.IntegerField(null=True, blank=True, verbose_name=gettext_lazy("pending tasks"))
+
+    # policy the run was admitted with, see workflow.concurrency
+    concurrency_policy = models.CharField(
+        max_length=16, blank=True, default="", verbose_name=gettext_lazy("concurrency policy")
+    )
+
+    objects = StatusQuerySet.as_manager()
+
     class Meta:
         get_latest_by = "modified"
         ordering = ["-created_at", "id"]
+        indexes = [models.Index(fields=["user_code", "status"])]
 
     @property
     def payload(self):
-        if self.payload_data:
-            try:
-                return json.loads(self.payload_data)
-            except (ValueError, TypeError):
-                return {}
-        else:
-            return {}
+        return resolve_cached(self, "payload_data") or {}
 
     @payload.setter
     def payload(self, val):
-        if val:
-            self.payload_data = json.dumps(val, cls=DjangoJSONEncoder, sort_keys=True)
-        else:
-            self.payload_data = None
+        self.payload_data = offload(val) if val else None
+
+    @property
+    def payload_reference(self):
+        """Stored payload, large values are left as claim-check references"""
+        return self.payload_data or {}
 
     def __str__(self):
         return f"{self.user_code}"
@@ -258,34 +324,64 @@ class Workflow(TimeStampedModel):
         return d
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        if self.status not in self.FINISHED_STATUSES:
+            super().save(*args, **kwargs)
+            return
 
-        if self.platform_task_id and self.status in (
-            self.STATUS_SUCCESS,
-            self.STATUS_ERROR,
-            self.STATUS_TIMEOUT,
-            self.STATUS_CANCELED,
-        ):
-            from workflow.finmars import update_task_status
+        # the platform is told through the outbox, committed together with the status
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.on_finished()
+
+    def transition(self, from_statuses, status, **fields):
+        if status not in self.FINISHED_STATUSES:
+            return super().transition(from_statuses, status, **fields)
+
+        # same as save()
+        with transaction.atomic():
+            changed = super().transition(from_statuses, status, **fields)
+            if changed:
+                self.on_finished()
+
+        return changed
+
+    def on_finished(self):
+        if self.platform_task_id:
+            PlatformCallback.objects.enqueue(self)
+
+        # the slot is free, runs waiting under the "queue" policy are checked under its lock by the task
+        if self.concurrency_policy == POLICY_QUEUE:
+            from workflow.tasks.workflows import schedule_queued_workflows
+
+            schedule_queued_workflows(self)
+
+    def complete_pending_task(self):
+        """
+        Count one finished task of a v1 run, the call that brings pending_tasks
+        to zero marks the run as successful unless a task failed.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {self._meta.db_table}
+                SET pending_tasks = pending_tasks - 1
+                WHERE id = %s AND pending_tasks > 0
+                RETURNING pending_tasks
+                """,
+                [self.id],
+            )
+            row = cursor.fetchone()
 
-            try:
-                error_task = self.tasks.filter(status=Task.STATUS_ERROR).first()
-                if error_task:
-                    update_task_status(
-                        self.platform_task_id,
-                        self.status,
-                        error=error_task.error_message,
-                    )
-                    return
+        if not row or row[0] != 0:
+            return
 
-                last_task = self.tasks.last()
-                if last_task:
-                    update_task_status(self.platform_task_id, self.status, result=last_task.result)
-            except Exception as ex:
-                _l.warning("update_task_status %s", ex)
+        self.refresh_from_db()
+        if self.status != Workflow.STATUS_ERROR:
+            self.status = Workflow.STATUS_SUCCESS
+            self.save()
 
     def cancel(self):
-        status_to_cancel = [Task.STATUS_PROGRESS, Task.STATUS_INIT, Task.STATUS_NESTED_PROGRESS]
+        status_to_cancel = [Task.STATUS_PROGRESS, Task.STATUS_INIT, Task.STATUS_NESTED_PROGRESS, Task.STATUS_RETRY]
         for task in self.tasks.all():
             if task.status in status_to_cancel:
                 celery_app.control.revoke(task.celery_task_id, terminate=True, signal="SIGKILL")
@@ -332,10 +428,11 @@ class Workflow(TimeStampedModel):
         return data
 
 
-class Task(TimeStampedModel):
+class Task(StatusTransitionMixin, TimeStampedModel):
     STATUS_INIT = "init"
     STATUS_PROGRESS = "progress"
     STATUS_NESTED_PROGRESS = "nested-progress"  # needed for nested progress
+    STATUS_RETRY = "retry"  # waiting for the next attempt, see workflow.retry
     STATUS_SUCCESS = "success"
     STATUS_ERROR = "error"
     STATUS_TIMEOUT = "timeout"
@@ -345,12 +442,21 @@ class Task(TimeStampedModel):
         (STATUS_INIT, "INIT"),
         (STATUS_PROGRESS, "PROGRESS"),
         (STATUS_NESTED_PROGRESS, "nested-progress"),
+        (STATUS_RETRY, "RETRY"),
         (STATUS_SUCCESS, "SUCCESS"),
         (STATUS_ERROR, "ERROR"),
         (STATUS_TIMEOUT, "TIMEOUT"),
         (STATUS_CANCELED, "CANCELED"),
     )
 
+    CACHE_HIT = "hit"
+    CACHE_MISS = "miss"
+
+    CACHE_STATUS_CHOICES = (
+        (CACHE_HIT, "hit"),
+        (CACHE_MISS, "miss"),
+    )
+
     workflow = models.ForeignKey(
         Workflow,
         verbose_name=gettext_lazy("workflow"),
@@ -376,12 +482,26 @@ class Task(TimeStampedModel):
         verbose_name="status",
     )
     worker_name = models.CharField(null=True, max_length=255, verbose_name="worker name")
+    queue = models.CharField(null=True, blank=True, max_length=255, verbose_name=gettext_lazy("queue"))
+    cache_status = models.CharField(
+        null=True,
+        blank=True,
+        max_length=16,
+        choices=CACHE_STATUS_CHOICES,
+        verbose_name=gettext_lazy("cache status"),
+    )
     type = models.CharField(max_length=50, blank=True, null=True)
 
-    payload_data = models.TextField(null=True, blank=True, verbose_name=gettext_lazy("payload data"))
-    result_data = models.TextField(null=True, blank=True, verbose_name=gettext_lazy("result data"))
+    payload_data = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name=gettext_lazy("payload data")
+    )
+    result_data = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name=gettext_lazy("result data")
+    )
 
-    progress_data = models.TextField(null=True, blank=True, verbose_name=gettext_lazy("progress data"))
+    progress_data = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name=gettext_lazy("progress data")
+    )
 
     log = models.TextField(null=True, blank=True, verbose_name=gettext_lazy("log"))
 
@@ -391,11 +511,20 @@ class Task(TimeStampedModel):
     verbose_name = models.CharField(null=True, max_length=255)
     verbose_result = models.TextField(null=True, blank=True, verbose_name=gettext_lazy("verbose result"))
 
-    previous_data = models.TextField(null=True, blank=True, verbose_name=gettext_lazy("previous data"))
+    previous_data = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name=gettext_lazy("previous data")
+    )
 
     is_hook = models.BooleanField(default=False, verbose_name=gettext_lazy("is hook"))
 
+    enqueued_at = models.DateTimeField(null=True, blank=True, verbose_name=gettext_lazy("enqueued at"))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=gettext_lazy("started at"))
     finished_at = models.DateTimeField(null=True, db_index=True, verbose_name=gettext_lazy("finished at"))
+    timings = models.JSONField(null=True, blank=True, verbose_name=gettext_lazy("timings"))
+    attempts = models.PositiveIntegerField(default=1, verbose_name=gettext_lazy("attempts"))
+    attempt_history = models.JSONField(
+        default=list, blank=True, encoder=DjangoJSONEncoder, verbose_name=gettext_lazy("attempt history")
+    )
 
     space = models.ForeignKey(
         Space,
@@ -404,6 +533,8 @@ class Task(TimeStampedModel):
         related_name="tasks",
     )
 
+    objects = StatusQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
 
@@ -412,55 +543,45 @@ class Task(TimeStampedModel):
 
     @property
     def payload(self):
-        if self.payload_data is None:
-            return None
-        return json.loads(self.payload_data)
+        return resolve_cached(self, "payload_data")
 
     @payload.setter
     def payload(self, value):
-        if value is None:
-            self.payload_data = None
-        else:
-            self.payload_data = json.dumps(value, sort_keys=True, indent=1)
+        self.payload_data = offload(value)
+
+    @property
+    def payload_reference(self):
+        """Stored payload, large values are left as claim-check references"""
+        return self.payload_data
 
     @property
     def result(self):
-        if self.result_data is None:
-            return None
-        return json.loads(self.result_data)
+        return resolve_cached(self, "result_data")
 
     @result.setter
     def result(self, value):
-        if value is None:
-            self.result_data = None
-        else:
-            self.result_data = json.dumps(value, sort_keys=True, indent=1)
+        self.result_data = offload(value)
+
+    @property
+    def result_reference(self):
+        """Stored result, large values are left as claim-check references"""
+        return self.result_data
 
     @property
     def progress(self):
-        if self.progress_data is None:
-            return None
-        return json.loads(self.progress_data)
+        return self.progress_data
 
     @progress.setter
     def progress(self, value):
-        if value is None:
-            self.progress_data = None
-        else:
-            self.progress_data = json.dumps(value, sort_keys=True, indent=1)
+        self.progress_data = value
 
     @property
     def previous(self):
-        if self.previous_data is None:
-            return None
-        return json.loads(self.previous_data)
+        return resolve_cached(self, "previous_data")
 
     @previous.setter
     def previous(self, value):
-        if value is None:
-            self.previous_data = None
-        else:
-            self.previous_data = json.dumps(value, sort_keys=True, indent=1)
+        self.previous_data = offload(value)
 
     # def add_attachment(self, file_report_id):
     #
@@ -480,55 +601,62 @@ class Task(TimeStampedModel):
 
         _l.info("update_progress %s", progress)
 
+        from workflow.notifications import notify_progress
+
         self.progress = progress
 
-        self.save()
+        self.save(update_fields=["progress_data", "modified_at"])
+        notify_progress(self)
 
-    def handle_task_success(self, retval):
+    def handle_task_success(self, retval, dispatch_fused=True):  # noqa: PLR0912,PLR0915
+        """
+        Mark the task as successful and dispatch the next v2 nodes.
+
+        With dispatch_fused=False successors on fused edges are left to the
+        process_next_node loop that is running this task.
+        """
         if self.status == Task.STATUS_NESTED_PROGRESS:
             _l.info(f"Task {self.id} is in STATUS_NESTED_PROGRESS status; waiting for nested workflow to complete.")
             # If the task status is STATUS_NESTED_PROGRESS, we should exit without marking it complete
             # It will be resumed by the nested workflow completion logic
             return
 
-        self.status = Task.STATUS_SUCCESS
-        if retval:
+        # an empty list is a result, a map node without items returns one
+        if retval or isinstance(retval, list):
             self.result = retval
         else:
             self.result = {"message": "Task finished successfully. No results returned"}
+
         self.mark_task_as_finished()
-        self.save()
+
+        # a task that failed, was canceled or already succeeded does not move its workflow on
+        if not self.transition(
+            (Task.STATUS_INIT, Task.STATUS_PROGRESS, Task.STATUS_NESTED_PROGRESS),
+            Task.STATUS_SUCCESS,
+            result_data=self.result_data,
+            finished_at=self.finished_at,
+        ):
+            return
 
         # if workflow version v2
         if self.workflow.workflow_template:
-            from workflow.tasks.workflows import process_next_node
-
-            workflow_data = self.workflow.workflow_template.data
-            nodes = {node["id"]: node for node in workflow_data["workflow"]["nodes"]}
-            connections = workflow_data["workflow"]["connections"]
-
-            adjacency_list = {node_id: [] for node_id in nodes}
-            for connection in connections:
-                adjacency_list[connection["source"]].append(connection["target"])
+            from workflow.plan import NODE_TYPE_CONDITION, NODE_TYPE_MAP, get_workflow_plan
+            from workflow.tasks.workflows import continue_map_node, dispatch_nodes
+            from workflow.utils import are_inputs_ready
 
+            plan = get_workflow_plan(self.workflow.workflow_template, self.workflow.space.space_code)
             current_node_id = self.node_id
-            current_node = nodes[current_node_id]
 
-            self.workflow.last_task_output = retval
+            self.workflow.last_task_output = self.result_reference if retval else retval
             self.workflow.current_node_id = current_node_id
 
             _l.info(f"Task {self.name} executed successfully, result: {retval}")
 
-            next_node_ids = []
-            if current_node["data"]["node"]["type"] == "condition":
+            if plan.get_node_type(current_node_id) == NODE_TYPE_CONDITION:
                 # Use the condition result to determine the next path
                 _l.info(f"BaseTask.on_success.Processing conditional node {current_node_id}, result: {retval}")
-                next_node_id = get_next_node_by_condition(current_node_id, retval, connections)
-                if next_node_id:
-                    next_node_ids.append(next_node_id)
-            else:
-                # Normal node, just proceed to the next nodes from adjacency list
-                next_node_ids = adjacency_list.get(current_node_id, [])
+
+            next_node_ids = plan.get_next_node_ids(current_node_id, retval)
 
             if not next_node_ids:
                 _l.info(
@@ -538,9 +666,14 @@ class Task(TimeStampedModel):
 
                 _l.info(f"BaseTask.on_success.workflow owner {self.workflow.owner}")
                 # If there are no next nodes, update the workflow status to SUCCESS
-                self.workflow.status = Workflow.STATUS_SUCCESS
-                self.workflow.finished_at = now()
-                self.workflow.save()
+                if not self.workflow.transition(
+                    (Workflow.STATUS_INIT, Workflow.STATUS_PROGRESS, Workflow.STATUS_WAIT),
+                    Workflow.STATUS_SUCCESS,
+                    finished_at=now(),
+                    current_node_id=self.workflow.current_node_id,
+                    last_task_output=self.workflow.last_task_output,
+                ):
+                    return
                 _l.info(f"BaseTask.on_success.Workflow ID {self.workflow.id} status updated to SUCCESS.")
 
                 if self.workflow.parent:
@@ -556,15 +689,22 @@ class Task(TimeStampedModel):
                         space=self.workflow.space,
                     )
 
-                    parent_task.status = Task.STATUS_PROGRESS
-                    parent_task.handle_task_success(retval)
+                    parent_plan = get_workflow_plan(
+                        parent_workflow.workflow_template, parent_workflow.space.space_code
+                    )
+                    if parent_plan.get_node_type(self.workflow.node_id) == NODE_TYPE_MAP:
+                        continue_map_node(parent_task)
+                    else:
+                        parent_task.status = Task.STATUS_PROGRESS
+                        parent_task.handle_task_success(retval)
 
                 else:
                     return
 
             # Decide what the next step will be, based on the current task's output
+            ready_node_ids = []
             for next_node_id in next_node_ids:
-                next_node = nodes.get(next_node_id)
+                next_node = plan.nodes.get(next_node_id)
                 if not next_node:
                     _l.error(
                         f"BaseTask.on_success.Next node with ID {next_node_id} does not exist in the workflow nodes."
@@ -573,23 +713,355 @@ class Task(TimeStampedModel):
 
                 _l.info(f"BaseTask.on_success.Processing next node: {next_node_id}, Name: {next_node['name']}")
 
-                # Check if the workflow is in WAIT state
-
-                # Execute the next task recursively by calling `process_next_node` again
-                process_next_node.apply_async(
-                    kwargs={
-                        "current_node_id": next_node_id,
-                        "workflow_id": self.workflow.id,
-                        "nodes": nodes,
-                        "adjacency_list": adjacency_list,
-                        "context": {
-                            "realm_code": self.workflow.space.realm_code,
-                            "space_code": self.workflow.space.space_code,
-                        },
-                        "connections": connections,
-                    },
-                    queue="workflow",
+                if not dispatch_fused and plan.is_fused(current_node_id, next_node_id):
+                    _l.info(f"BaseTask.on_success.Node {next_node_id} is fused, it runs in the current worker")
+                    continue
+
+                if next_node_id in plan.join_nodes:
+                    released = NodeInputBarrier.objects.release(self.workflow, next_node_id, current_node_id)
+                    if released is None:
+                        released = are_inputs_ready(self.workflow, next_node_id, plan.connections)
+
+                    if not released:
+                        _l.info(f"BaseTask.on_success.Node {next_node_id} is waiting for other inputs")
+                        continue
+
+                ready_node_ids.append(next_node_id)
+
+            # Execute the next tasks by calling `process_next_node` again, published as one batch
+            dispatch_nodes(self.workflow, ready_node_ids, plan)
+
+        elif not self.is_hook and self.workflow.pending_tasks is not None:
+            self.workflow.complete_pending_task()
+
+    def snapshot_log(self):
+        """
+        Copy the log lines into Task.log with a single write, so serializers
+        keep showing the whole log of finished tasks.
+        """
+        line_table = TaskLogLine._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {self._meta.db_table}
+                SET log = (
+                    SELECT string_agg(message, E'\\n' ORDER BY line_number) || E'\\n'
+                    FROM {line_table} WHERE task_id = %s
                 )
+                WHERE id = %s AND EXISTS (SELECT 1 FROM {line_table} WHERE task_id = %s)
+                """,
+                [self.id, self.id, self.id],
+            )
+
+
+class PayloadBlob(TimeStampedModel):
+    """
+    Content-addressed storage for large payloads and node outputs,
+    see workflow.claim_check
+    """
+
+    digest = models.CharField(max_length=64, unique=True, verbose_name=gettext_lazy("digest"))
+    size = models.BigIntegerField(verbose_name=gettext_lazy("size"))
+    data = models.BinaryField(verbose_name=gettext_lazy("data"))
+
+    def __str__(self):
+        return f"<PayloadBlob: {self.digest} ({self.size})>"
+
+
+class PlatformCallbackManager(models.Manager):
+    def enqueue(self, workflow):
+        """Record the terminal status of a platform initiated workflow, delivered after commit."""
+        _, created = self.get_or_create(
+            workflow=workflow,
+            status=workflow.status,
+            defaults={"platform_task_id": workflow.platform_task_id},
+        )
+        if not created:
+            return
+
+        from workflow.tasks.callbacks import deliver_platform_callbacks
+
+        context = {"realm_code": workflow.space.realm_code, "space_code": workflow.space.space_code}
+        transaction.on_commit(
+            lambda: deliver_platform_callbacks.apply_async(kwargs={"context": context}, queue="workflow")
+        )
+
+    def claim(self, limit):
+        """
+        Lock pending callbacks that are due and push their next attempt back,
+        so concurrent dispatchers skip them while they are being delivered.
+
+        The lease outlasts a batch of calls that all time out, a dispatcher
+        that dies leaves the callbacks due again when it expires.
+        """
+        with transaction.atomic():
+            callbacks = list(
+                self.select_for_update(skip_locked=True)
+                .filter(state=PlatformCallback.STATE_PENDING, next_attempt_at__lte=now())
+                .select_related("workflow")
+                .order_by("next_attempt_at")[:limit]
+            )
+            lease = settings.WORKFLOW_CALLBACK_RETRY_DELAY + len(callbacks) * settings.WORKFLOW_CALLBACK_TIMEOUT
+            self.filter(id__in=[callback.id for callback in callbacks]).update(
+                next_attempt_at=now() + timedelta(seconds=lease)
+            )
+        return callbacks
+
+
+class PlatformCallback(TimeStampedModel):
+    """
+    Outbox of workflow status callbacks to the platform, written with the
+    status change and delivered by workflow.tasks.callbacks
+    """
+
+    STATE_PENDING = "pending"
+    STATE_DELIVERED = "delivered"
+    STATE_FAILED = "failed"
+
+    STATE_CHOICES = (
+        (STATE_PENDING, "pending"),
+        (STATE_DELIVERED, "delivered"),
+        (STATE_FAILED, "failed"),
+    )
+
+    workflow = models.ForeignKey(
+        Workflow,
+        verbose_name=gettext_lazy("workflow"),
+        on_delete=models.CASCADE,
+        related_name="platform_callbacks",
+    )
+    platform_task_id = models.IntegerField(verbose_name=gettext_lazy("platform task id"))
+    status = models.CharField(max_length=255, verbose_name=gettext_lazy("status"))
+    state = models.CharField(
+        max_length=16,
+        default=STATE_PENDING,
+        choices=STATE_CHOICES,
+        db_index=True,
+        verbose_name=gettext_lazy("state"),
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name=gettext_lazy("attempts"))
+    next_attempt_at = models.DateTimeField(default=now, db_index=True, verbose_name=gettext_lazy("next attempt at"))
+    delivered_at = models.DateTimeField(null=True, blank=True, verbose_name=gettext_lazy("delivered at"))
+    last_error = models.TextField(null=True, blank=True, verbose_name=gettext_lazy("last error"))
+
+    objects = PlatformCallbackManager()
+
+    class Meta:
+        unique_together = [["workflow", "status"]]
+
+    def __str__(self):
+        return f"<PlatformCallback: {self.platform_task_id} {self.status} ({self.state})>"
+
+    def get_status_data(self):
+        """Result or error reported with the status, read at delivery time."""
+        error_task = self.workflow.tasks.filter(status=Task.STATUS_ERROR).first()
+        if error_task:
+            return {"error": error_task.error_message}
+
+        last_task = self.workflow.tasks.last()
+        if last_task:
+            return {"result": last_task.result}
+
+        return {}
+
+    def mark_delivered(self):
+        self.state = PlatformCallback.STATE_DELIVERED
+        self.attempts += 1
+        self.delivered_at = now()
+        self.last_error = None
+        self.save()
+
+    def mark_failed(self, error):
+        self.attempts += 1
+        self.last_error = str(error)
+
+        if self.attempts >= settings.WORKFLOW_CALLBACK_MAX_ATTEMPTS:
+            self.state = PlatformCallback.STATE_FAILED
+        else:
+            delay = settings.WORKFLOW_CALLBACK_RETRY_DELAY * 2 ** (self.attempts - 1)
+            self.next_attempt_at = now() + timedelta(seconds=delay)
+
+        self.save()
+
+
+class NodeResultCacheManager(models.Manager):
+    def store(self, key, result, ttl):
+        self.update_or_create(
+            key=key,
+            defaults={
+                "result_data": offload(result),
+                "expires_at": now() + timedelta(seconds=ttl),
+                "last_used_at": now(),
+            },
+        )
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above WORKFLOW_MEMOIZE_MAX_ENTRIES."""
+        self.filter(expires_at__lte=now()).delete()
+
+        stale_ids = list(
+            self.order_by("-last_used_at").values_list("id", flat=True)[settings.WORKFLOW_MEMOIZE_MAX_ENTRIES :]
+        )
+        if stale_ids:
+            self.filter(id__in=stale_ids).delete()
+
+
+class NodeResultCache(TimeStampedModel):
+    """
+    Results of memoized v2 nodes keyed by a hash of the node source and
+    inputs, see workflow.memoize
+    """
+
+    key = models.CharField(max_length=64, unique=True, verbose_name=gettext_lazy("key"))
+    result_data = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name=gettext_lazy("result data")
+    )
+    expires_at = models.DateTimeField(db_index=True, verbose_name=gettext_lazy("expires at"))
+    last_used_at = models.DateTimeField(db_index=True, verbose_name=gettext_lazy("last used at"))
+    hits = models.PositiveIntegerField(default=0, verbose_name=gettext_lazy("hits"))
+
+    objects = NodeResultCacheManager()
+
+    def __str__(self):
+        return f"<NodeResultCache: {self.key} ({self.hits})>"
+
+    @property
+    def result(self):
+        return resolve_cached(self, "result_data")
+
+
+class NodeInputBarrierManager(models.Manager):
+    def create_for_plan(self, workflow, plan, finished_node_ids=()):
+        """Create the barriers of a run, inputs from finished_node_ids count as arrived."""
+        barriers = []
+        for node_id in plan.join_nodes:
+            sources = set(plan.reverse_adjacency_list[node_id])
+            arrived = sorted(sources.intersection(finished_node_ids))
+            barriers.append(
+                NodeInputBarrier(
+                    workflow=workflow, node_id=node_id, pending=len(sources) - len(arrived), arrived=arrived
+                )
+            )
+
+        self.bulk_create(barriers, ignore_conflicts=True)
+
+    def release(self, workflow, node_id, source_node_id):
+        """
+        Record that source_node_id delivered its output to node_id.
+
+        Returns True only for the call that releases the last pending input,
+        False while inputs are pending or when the source already arrived, and
+        None when the run has no barrier for the node (runs started before
+        barriers existed).
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {self.model._meta.db_table}
+                SET pending = pending - 1, arrived = arrived || jsonb_build_array(%s::text), modified_at = now()
+                WHERE workflow_id = %s AND node_id = %s AND pending > 0 AND NOT arrived ? %s
+                RETURNING pending
+                """,
+                [source_node_id, workflow.id, node_id, source_node_id],
+            )
+            row = cursor.fetchone()
+
+        if row:
+            return row[0] == 0
+
+        if self.filter(workflow=workflow, node_id=node_id).exists():
+            return False
+
+        return None
+
+
+class NodeInputBarrier(TimeStampedModel):
+    """
+    Join barrier of a node with several inputs in a v2 workflow run,
+    the last upstream node to succeed dispatches the node
+    """
+
+    workflow = models.ForeignKey(
+        Workflow,
+        verbose_name=gettext_lazy("workflow"),
+        on_delete=models.CASCADE,
+        related_name="input_barriers",
+    )
+    node_id = models.CharField(max_length=255, verbose_name=gettext_lazy("node id"))
+    pending = models.PositiveIntegerField(verbose_name=gettext_lazy("pending inputs"))
+    arrived = models.JSONField(default=list, verbose_name=gettext_lazy("arrived inputs"))
+
+    objects = NodeInputBarrierManager()
+
+    class Meta:
+        unique_together = [["workflow", "node_id"]]
+
+    def __str__(self):
+        return f"<NodeInputBarrier: {self.workflow_id} {self.node_id} ({self.pending})>"
+
+
+class TaskLogLineManager(models.Manager):
+    def append(self, task_id, line_number, messages):
+        """Insert messages as consecutive lines starting at line_number."""
+        self.bulk_create(
+            [
+                TaskLogLine(task_id=task_id, line_number=line_number + index, message=message)
+                for index, message in enumerate(messages)
+            ]
+        )
+
+    def next_line_number(self, task_id):
+        last = self.filter(task_id=task_id).order_by("-line_number").values_list("line_number", flat=True).first()
+        return 0 if last is None else last + 1
+
+    def read(self, task, offset=0, limit=None):
+        """
+        Lines of a task log from offset as (line_number, message) pairs,
+        tasks logged before log lines existed are read from Task.log.
+        """
+        lines = self.filter(task=task, line_number__gte=offset).order_by("line_number")
+        if limit is not None:
+            lines = lines[:limit]
+        lines = list(lines.values_list("line_number", "message"))
+
+        if lines or not task.log or self.filter(task=task).exists():
+            return lines
+
+        legacy = get_legacy_log_lines(task)[offset:]
+        return legacy if limit is None else legacy[:limit]
+
+    def line_count(self, task):
+        count = self.next_line_number(task.id)
+        if not count and task.log:
+            count = len(get_legacy_log_lines(task))
+        return count
+
+
+def get_legacy_log_lines(task):
+    return list(enumerate(task.log.rstrip("\n").split("\n")))
+
+
+class TaskLogLine(models.Model):
+    """Append-only log of a task, written in batches by BaseTask.log"""
+
+    task = models.ForeignKey(
+        Task,
+        verbose_name=gettext_lazy("task"),
+        on_delete=models.CASCADE,
+        related_name="log_lines",
+    )
+    line_number = models.PositiveIntegerField(verbose_name=gettext_lazy("line number"))
+    message = models.TextField(verbose_name=gettext_lazy("message"))
+    created_at = models.DateTimeField(default=now, verbose_name=gettext_lazy("created at"))
+
+    objects = TaskLogLineManager()
+
+    class Meta:
+        unique_together = [["task", "line_number"]]
+
+    def __str__(self):
+        return f"<TaskLogLine: {self.task_id} {self.line_number}>"
 
 
 class ScheduleManager(models.Manager):
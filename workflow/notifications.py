@@ -0,0 +1,206 @@
+import contextlib
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from workflow.exceptions import TooManyStreams
+
+_l = logging.getLogger("workflow")
+
+PROGRESS_CHANNEL = "workflow_progress"
+
+# events buffered for a stream whose client reads slower than they are published
+STREAM_BUFFER_SIZE = 100
+
+# postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_SIZE = 7900
+
+
+def progress_channel(space_code):
+    """Progress channel of one space, listeners only get events of their tenants."""
+    return f"{PROGRESS_CHANNEL}_{space_code}"
+
+
+def notify_progress(task):
+    """
+    Publish the progress of a task on the progress channel of its space,
+    delivered to listeners when the current transaction commits.
+    """
+    event = {
+        "space_code": task.space.space_code,
+        "workflow_id": task.workflow_id,
+        "task_id": task.id,
+        "status": task.status,
+        "progress": task.progress,
+    }
+    payload = json.dumps(event, cls=DjangoJSONEncoder)
+    if len(payload.encode()) > MAX_PAYLOAD_SIZE:
+        # too big to push, listeners read it from the task
+        event["progress"] = None
+        event["truncated"] = True
+        payload = json.dumps(event, cls=DjangoJSONEncoder)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [progress_channel(task.space.space_code), payload])
+
+
+class ProgressStream:
+    """
+    Server-sent progress events of one workflow, a heartbeat comment every
+    WORKFLOW_EVENTS_HEARTBEAT seconds without events. Closed by the response.
+    """
+
+    def __init__(self, listener, space_code, workflow_id, timeout):
+        self.listener = listener
+        self.key = (space_code, workflow_id)
+        self.timeout = timeout
+        self.events = queue.Queue(maxsize=STREAM_BUFFER_SIZE)
+
+    def put(self, event):
+        # the client does not keep up, it reads the task for the latest progress
+        with contextlib.suppress(queue.Full):
+            self.events.put_nowait(event)
+
+    def __iter__(self):
+        deadline = time.monotonic() + self.timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                event = self.events.get(timeout=min(settings.WORKFLOW_EVENTS_HEARTBEAT, remaining))
+            except queue.Empty:
+                event = None
+            yield format_sse(event)
+
+    def close(self):
+        self.listener.close(self)
+
+
+class ProgressListener:
+    """
+    One LISTEN connection per process fanning progress events out to the
+    open streams, at most WORKFLOW_EVENTS_MAX_STREAMS of them. Only the
+    channels of spaces with an open stream are listened to.
+    """
+
+    def __init__(self):
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._listener_pid = None
+        self._wakeup = None
+
+    def open(self, space_code, workflow_id, timeout=None):
+        if timeout is None:
+            timeout = settings.WORKFLOW_EVENTS_TIMEOUT
+
+        with self._lock:
+            if sum(len(streams) for streams in self._streams.values()) >= settings.WORKFLOW_EVENTS_MAX_STREAMS:
+                raise TooManyStreams(f"{settings.WORKFLOW_EVENTS_MAX_STREAMS} event streams are open")
+
+            stream = ProgressStream(self, space_code, workflow_id, timeout)
+            self._streams.setdefault(stream.key, set()).add(stream)
+            self._start_listener()
+
+        self._wake()
+        return stream
+
+    def close(self, stream):
+        with self._lock:
+            streams = self._streams.get(stream.key, set())
+            streams.discard(stream)
+            if not streams:
+                self._streams.pop(stream.key, None)
+
+        self._wake()
+
+    def channels(self):
+        with self._lock:
+            return {progress_channel(space_code) for space_code, _ in self._streams}
+
+    def publish(self, event):
+        with self._lock:
+            streams = list(self._streams.get((event.get("space_code"), event.get("workflow_id")), ()))
+
+        for stream in streams:
+            stream.put(event)
+
+    def _wake(self):
+        # the listener thread picks up the channels to listen to, a full pipe wakes it already
+        if self._wakeup is not None:
+            with contextlib.suppress(BlockingIOError):
+                os.write(self._wakeup[1], b"\0")
+
+    def _start_listener(self):
+        # threads do not survive a fork, every worker process starts its own
+        if self._listener_pid == os.getpid():
+            return
+
+        self._listener_pid = os.getpid()
+        self._wakeup = os.pipe()
+        os.set_blocking(self._wakeup[1], False)
+        threading.Thread(target=self._listen, name="workflow-progress-listener", daemon=True).start()
+
+    def _listen(self):
+        wakeup = self._wakeup[0]
+        while True:
+            listener = None
+            listening = set()
+            try:
+                listener = connection.get_new_connection(connection.get_connection_params())
+                listener.autocommit = True
+
+                while True:
+                    channels = self.channels()
+                    with listener.cursor() as cursor:
+                        for channel in channels - listening:
+                            cursor.execute(f"LISTEN {connection.ops.quote_name(channel)}")
+                        for channel in listening - channels:
+                            cursor.execute(f"UNLISTEN {connection.ops.quote_name(channel)}")
+                    listening = channels
+
+                    readable, _, _ = select.select([listener, wakeup], [], [], 60)
+                    if wakeup in readable:
+                        os.read(wakeup, 4096)
+                    if listener not in readable:
+                        continue
+
+                    listener.poll()
+                    while listener.notifies:
+                        notify = listener.notifies.pop(0)
+                        try:
+                            event = json.loads(notify.payload)
+                        except ValueError:
+                            _l.warning(f"ProgressListener: invalid payload {notify.payload!r}")
+                            continue
+                        self.publish(event)
+
+            except Exception as e:
+                _l.error(f"ProgressListener: listener failed {e}, reconnecting")
+                time.sleep(5)
+            finally:
+                if listener is not None:
+                    listener.close()
+
+
+progress_listener = ProgressListener()
+
+
+def listen_progress(space_code, workflow_id, timeout=None):
+    """
+    Open a stream of the progress events of one workflow, raises
+    TooManyStreams when this process serves the maximum already.
+    """
+    return progress_listener.open(space_code, workflow_id, timeout)
+
+
+def format_sse(event):
+    """Server-sent event for a progress event, a comment line for a heartbeat."""
+    if event is None:
+        return ": heartbeat\n\n"
+    return f"event: progress\nid: {event['task_id']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
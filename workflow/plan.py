@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+_l = logging.getLogger("workflow")
+
+NODE_TYPE_SOURCE_CODE = "source_code"
+NODE_TYPE_CONDITION = "condition"
+NODE_TYPE_MAP = "map"
+
+
+class WorkflowPlan:
+    """
+    Execution plan of a v2 workflow, compiled once from the template data.
+
+    Holds everything the engine needs to move from one node to the next:
+    the node index, forward and reverse adjacency, the connection feeding
+    each node input, the routing table of condition nodes and the
+    topological level of every node. ``join_nodes`` maps every node fed by
+    more than one upstream node to the number of inputs it waits for.
+
+    Nodes with ``"fusible": true`` in their data form fused chains: when a
+    fusible node has a single successor (or is a condition) and that
+    successor is fusible with no other input, both run back to back in the
+    same worker, see ``workflow.tasks.workflows.process_next_node``.
+    Nodes with a ``"queue"`` hint run on that queue and are never fused,
+    neither are map nodes, which expand into child workflows.
+
+    ``version`` is a digest of the graph. Messages between workers carry it
+    instead of the graph itself, see ``workflow.tasks.workflows.dispatch_nodes``.
+    """
+
+    def __init__(self, nodes, connections):
+        self.nodes = nodes
+        self.connections = connections
+        self.version = hashlib.sha256(
+            json.dumps([nodes, connections], sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        self.adjacency_list = {node_id: [] for node_id in nodes}
+        self.reverse_adjacency_list = {node_id: [] for node_id in nodes}
+        self.inputs = {node_id: {} for node_id in nodes}
+        self.condition_routes = {}
+
+        for connection in connections:
+            source, target = connection["source"], connection["target"]
+
+            self.adjacency_list.setdefault(source, []).append(target)
+            self.reverse_adjacency_list.setdefault(target, []).append(source)
+
+            # the first connection wins, same as the former linear scans did
+            target_input = connection.get("targetInput")
+            self.inputs.setdefault(target, {}).setdefault(target_input, source)
+
+            if self.get_node_type(source) == NODE_TYPE_CONDITION:
+                routes = self.condition_routes.setdefault(source, {})
+                routes.setdefault(connection.get("sourceOutput"), target)
+
+        self.start_nodes = [node_id for node_id in nodes if not self.reverse_adjacency_list[node_id]]
+        self.join_nodes = {
+            node_id: len(set(sources))
+            for node_id, sources in self.reverse_adjacency_list.items()
+            if len(set(sources)) > 1
+        }
+        self.fused_edges = self._compute_fused_edges()
+        self.levels = self._compute_levels()
+
+    @classmethod
+    def from_template_data(cls, data):
+        nodes = {node["id"]: node for node in data["workflow"]["nodes"]}
+        return cls(nodes, data["workflow"]["connections"])
+
+    def get_node_queue(self, node_id):
+        return self.nodes[node_id]["data"].get("queue") or None
+
+    def is_fusible(self, node_id):
+        node = self.nodes.get(node_id)
+        if not node or self.get_node_type(node_id) == NODE_TYPE_MAP:
+            return False
+        return bool(node["data"].get("fusible") and not node["data"].get("queue"))
+
+    def _compute_fused_edges(self):
+        fused_edges = {}
+
+        for node_id, next_node_ids in self.adjacency_list.items():
+            targets = set(next_node_ids)
+            if not self.is_fusible(node_id):
+                continue
+            if len(targets) > 1 and self.get_node_type(node_id) != NODE_TYPE_CONDITION:
+                continue
+
+            for next_node_id in targets:
+                if self.is_fusible(next_node_id) and set(self.reverse_adjacency_list[next_node_id]) == {node_id}:
+                    fused_edges.setdefault(node_id, set()).add(next_node_id)
+
+        return fused_edges
+
+    def _compute_levels(self):
+        in_degree = {node_id: len(sources) for node_id, sources in self.reverse_adjacency_list.items()}
+        levels = {node_id: 0 for node_id in self.start_nodes}
+        queue = deque(self.start_nodes)
+
+        while queue:
+            node_id = queue.popleft()
+            for next_node_id in self.adjacency_list.get(node_id, []):
+                levels[next_node_id] = max(levels.get(next_node_id, 0), levels[node_id] + 1)
+                in_degree[next_node_id] -= 1
+                if in_degree[next_node_id] == 0:
+                    queue.append(next_node_id)
+
+        if any(in_degree.values()):
+            _l.warning("WorkflowPlan: workflow graph contains a cycle, levels are incomplete")
+
+        return levels
+
+    def get_node_type(self, node_id):
+        node = self.nodes.get(node_id)
+        if not node:
+            return None
+        return node["data"]["node"]["type"]
+
+    def get_task_name(self, node_id):
+        node_type = self.get_node_type(node_id)
+
+        if node_type == NODE_TYPE_SOURCE_CODE:
+            return "custom_code"
+        if node_type == NODE_TYPE_CONDITION:
+            return "condition"
+        return self.nodes[node_id]["data"]["workflow"]["user_code"]
+
+    def get_input_source(self, node_id, target_input):
+        return self.inputs.get(node_id, {}).get(target_input)
+
+    def is_fused(self, node_id, next_node_id):
+        return next_node_id in self.fused_edges.get(node_id, ())
+
+    def get_fused_next_node_id(self, node_id, result):
+        """Return the successor to run in the same worker after node_id, if any."""
+        if node_id not in self.fused_edges:
+            return None
+
+        for next_node_id in self.get_next_node_ids(node_id, result):
+            if self.is_fused(node_id, next_node_id):
+                return next_node_id
+
+        return None
+
+    def get_next_node_ids(self, node_id, result):
+        if self.get_node_type(node_id) != NODE_TYPE_CONDITION:
+            return list(self.adjacency_list.get(node_id, []))
+
+        _l.info(f"Evaluating condition for node {node_id}, result: {result}")
+
+        if "result" not in result:
+            raise Exception("Wrong condition_result")
+
+        output_to_follow = "out_true" if result["result"] else "out_false"
+        next_node_id = self.condition_routes.get(node_id, {}).get(output_to_follow)
+
+        if not next_node_id:
+            _l.warning(f"No matching connection found for node {node_id} with output '{output_to_follow}'")
+            return []
+
+        _l.info(f"Following output '{output_to_follow}' to next node {next_node_id}")
+        return [next_node_id]
+
+    def get_critical_path(self, finished_at):
+        """
+        Return the chain of nodes that determined when a run finished.
+
+        finished_at maps executed node ids to their finish time. The path
+        ends at the node that finished last and walks back through the
+        input that finished last at every step, the one the node waited for.
+        """
+        if not finished_at:
+            return []
+
+        node_id = max(finished_at, key=finished_at.get)
+        path = [node_id]
+
+        while True:
+            sources = [
+                source
+                for source in self.reverse_adjacency_list.get(node_id, [])
+                if source in finished_at and source not in path
+            ]
+            if not sources:
+                break
+            node_id = max(sources, key=finished_at.get)
+            path.append(node_id)
+
+        return path[::-1]
+
+
+_plan_cache = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def get_workflow_plan(workflow_template, space_code):
+    """
+    Return the compiled plan of a template, building it at most once per
+    template version in the current process.
+
+    Template ids are only unique inside a tenant schema, so the space code
+    is part of the key, ``modified_at`` identifies the version.
+    """
+    key = (space_code, workflow_template.id)
+    version = workflow_template.modified_at
+
+    with _plan_cache_lock:
+        cached = _plan_cache.get(key)
+        if cached and cached[0] == version:
+            _plan_cache.move_to_end(key)
+            return cached[1]
+
+    plan = WorkflowPlan.from_template_data(workflow_template.data)
+
+    with _plan_cache_lock:
+        _plan_cache[key] = (version, plan)
+        _plan_cache.move_to_end(key)
+        while len(_plan_cache) > settings.WORKFLOW_PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+
+    return plan
+
+
+def clear_workflow_plan_cache():
+    with _plan_cache_lock:
+        _plan_cache.clear()
@@ -0,0 +1,97 @@
+import logging
+import time
+
+import amqp
+from amqp import spec
+from amqp.exceptions import MessageNacked
+from django.conf import settings
+
+from workflow.exceptions import PublishTimeout
+from workflow_app import celery_app
+
+_l = logging.getLogger("workflow")
+
+# _publish_confirmed replaces py-amqp's confirming basic_publish with its private
+# _basic_publish, checked against these versions only, others publish one by one
+BATCHED_CONFIRMS_AMQP_VERSIONS = ((5, 0), (6, 0))
+
+
+def supports_batched_confirms():
+    low, high = BATCHED_CONFIRMS_AMQP_VERSIONS
+    return low <= tuple(amqp.version_info[:2]) < high and callable(getattr(amqp.Channel, "_basic_publish", None))
+
+
+def publish_batch(signatures):
+    """
+    Publish signatures over one channel and wait for a single round of
+    publisher confirms instead of one confirm per message.
+
+    Transports other than AMQP (and eager mode) publish one by one
+    with a shared producer, so do py-amqp versions the batching was not
+    checked against.
+    """
+    if not signatures:
+        return
+
+    if celery_app.conf.task_always_eager:
+        for signature in signatures:
+            signature.apply_async()
+        return
+
+    with celery_app.pool.acquire(block=True) as connection:
+        connection.ensure_connection()
+
+        if connection.transport.driver_type != "amqp" or not supports_batched_confirms():
+            with celery_app.producer_or_acquire() as producer:
+                for signature in signatures:
+                    signature.apply_async(producer=producer)
+            return
+
+        channel = connection.channel()
+        try:
+            _publish_confirmed(channel, signatures)
+        finally:
+            channel.close()
+
+
+def _publish_confirmed(channel, signatures, timeout=None):
+    if timeout is None:
+        timeout = settings.WORKFLOW_PUBLISH_CONFIRM_TIMEOUT
+
+    confirmed = set()
+    nacked = []
+
+    def on_ack(delivery_tag, multiple):
+        confirmed.update(range(1, delivery_tag + 1) if multiple else (delivery_tag,))
+
+    def on_nack(delivery_tag, multiple):
+        nacked.append(delivery_tag)
+
+    # with confirm_publish py-amqp waits for a confirm after every message,
+    # publish without waiting and collect the confirms at the end instead
+    channel.basic_publish = channel._basic_publish
+    channel.events["basic_ack"].add(on_ack)
+    channel.events["basic_nack"].add(on_nack)
+    channel.confirm_select()
+
+    producer = celery_app.amqp.Producer(channel)
+    for signature in signatures:
+        signature.apply_async(producer=producer)
+
+    deadline = time.monotonic() + timeout
+    while len(confirmed) < len(signatures) and not nacked:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise PublishTimeout(
+                f"{len(signatures) - len(confirmed)} of {len(signatures)} messages were not confirmed in {timeout}s"
+            )
+
+        try:
+            channel.wait([spec.Basic.Ack, spec.Basic.Nack], timeout=remaining)
+        except TimeoutError:
+            continue
+
+    if nacked:
+        raise MessageNacked(f"{len(nacked)} of {len(signatures)} messages were rejected by the broker")
+
+    _l.debug("publish_batch %s messages confirmed", len(signatures))
@@ -0,0 +1,113 @@
+import logging
+import random
+
+from celery import states
+from celery.exceptions import Ignore, Retry
+from django.conf import settings
+from django.utils.timezone import now
+
+_l = logging.getLogger("workflow")
+
+
+def get_retry_policy(task):
+    """
+    Return the retry policy of a v2 node, declared in its data as
+    ``"retry": {"max_attempts": 3, "backoff": 2, "max_backoff": 600,
+    "jitter": true, "exceptions": ["requests.exceptions.ConnectionError"]}``,
+    None when the node is not retried.
+
+    Without "exceptions" any exception is retried.
+    """
+    workflow = task.workflow
+    if not workflow.workflow_template or not task.node_id:
+        return None
+
+    from workflow.plan import get_workflow_plan
+
+    plan = get_workflow_plan(workflow.workflow_template, workflow.space.space_code)
+    node = plan.nodes.get(task.node_id)
+    retry = node and node["data"].get("retry")
+    if not retry:
+        return None
+
+    if not isinstance(retry, dict):
+        retry = {}
+
+    return {
+        "max_attempts": int(retry.get("max_attempts", 3)),
+        "backoff": float(retry.get("backoff", settings.WORKFLOW_RETRY_BACKOFF)),
+        "max_backoff": float(retry.get("max_backoff", settings.WORKFLOW_RETRY_MAX_BACKOFF)),
+        "jitter": bool(retry.get("jitter", True)),
+        "exceptions": list(retry.get("exceptions") or []),
+    }
+
+
+def is_retryable(policy, exc):
+    """Match exception classes by name or dotted path, subclasses included."""
+    if not policy["exceptions"]:
+        return True
+
+    names = set()
+    for cls in type(exc).__mro__:
+        names.update((cls.__name__, f"{cls.__module__}.{cls.__qualname__}"))
+
+    return any(name in names for name in policy["exceptions"])
+
+
+def get_backoff(policy, attempt):
+    """Seconds before the attempt after the given one, exponential with full jitter."""
+    delay = min(policy["backoff"] * 2 ** (attempt - 1), policy["max_backoff"])
+    if policy["jitter"]:
+        delay = random.uniform(0, delay)  # noqa: S311
+    return round(delay, 3)
+
+
+def retry_workflow_step(base_task, exc, args, kwargs):
+    """
+    Schedule the next attempt of a failed execute_workflow_step when the
+    node's retry policy allows it, returns when the failure is final.
+
+    The attempt is recorded on the Task, which waits in the retry status.
+    """
+    from workflow.models import Task
+
+    if isinstance(exc, Ignore | Retry):
+        return
+
+    task = base_task.task
+    policy = get_retry_policy(task)
+    if not policy or task.attempts >= policy["max_attempts"] or not is_retryable(policy, exc):
+        return
+
+    countdown = get_backoff(policy, task.attempts)
+    attempt = {
+        "attempt": task.attempts,
+        "started_at": task.started_at,
+        "finished_at": now(),
+        "error": f"{type(exc).__name__}: {exc}",
+        "retry_in": countdown,
+    }
+    if not task.transition(
+        (Task.STATUS_PROGRESS,),
+        Task.STATUS_RETRY,
+        attempts=task.attempts + 1,
+        attempt_history=[*(task.attempt_history or []), attempt],
+    ):
+        return
+
+    _l.info(
+        f"retry_workflow_step: task {task.id} attempt {attempt['attempt']} of {policy['max_attempts']} "
+        f"failed with {attempt['error']}, retrying in {countdown}s"
+    )
+
+    # after_return is not called for retried and ignored tasks
+    base_task.after_return(states.RETRY, exc, base_task.request.id, args, kwargs, None)
+
+    if base_task.request.is_eager:
+        # eager retries run at once in this worker, publish the attempt instead
+        base_task.apply_async(
+            args=args, kwargs=kwargs, task_id=base_task.request.id, countdown=countdown, queue=task.queue or "workflow"
+        )
+        raise Ignore()
+
+    raise base_task.retry(exc=exc, countdown=countdown, max_retries=None)
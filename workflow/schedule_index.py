@@ -0,0 +1,45 @@
+import logging
+
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from workflow.models import Schedule
+
+_l = logging.getLogger("workflow")
+
+# one row per tenant schema, in public so beat reads every tenant at once
+INDEX_TABLE = "public.workflow_schedule_index"
+
+
+def touch_schedule_index():
+    """Record a schedule change of the current schema in the index."""
+    enabled_count = Schedule.objects.filter(enabled=True).count()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {INDEX_TABLE} (schema_name, enabled_count, last_change)
+            VALUES (current_schema(), %s, now())
+            ON CONFLICT (schema_name)
+            DO UPDATE SET enabled_count = EXCLUDED.enabled_count, last_change = EXCLUDED.last_change
+            """,
+            [enabled_count],
+        )
+
+
+def get_schedule_index():
+    """Return {schema: (enabled_count, last_change)} of the existing tenant schemas."""
+    from workflow.schemas import schema_registry
+
+    schemas = schema_registry.all()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT schema_name, enabled_count, last_change FROM {INDEX_TABLE}")
+        return {schema: (count, last_change) for schema, count, last_change in cursor.fetchall() if schema in schemas}
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def schedule_changed(sender, instance, **kwargs):
+    # beat saving last_run_at is not a change of the schedule
+    if not instance.no_changes:
+        touch_schedule_index()
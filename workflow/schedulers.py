@@ -1,52 +1,119 @@
 from celery.utils.log import get_logger
 from django.db.utils import DatabaseError, InterfaceError
 from django_celery_beat.schedulers import DatabaseScheduler as DCBScheduler
+from django_celery_beat.schedulers import ModelEntry
 
 from workflow.models import Schedule
-from workflow.utils import get_all_tenant_schemas, set_schema_from_context
+from workflow.schedule_index import get_schedule_index
+from workflow.utils import set_schema_from_context
 
 logger = get_logger(__name__)
 debug, info, warning = logger.debug, logger.info, logger.warning
 
 
+class ScheduleEntry(ModelEntry):
+    """Entry saved back to the schema its schedule was loaded from."""
+
+    # from CELERY_BEAT_SCHEDULE rather than from a tenant Schedule
+    static = False
+
+    def __init__(self, model, app=None, schema=None):
+        self.schema = schema
+        super().__init__(model, app=app)
+
+    def __next__(self):
+        entry = super().__next__()
+        entry.schema = self.schema
+        entry.static = self.static
+        return entry
+
+    next = __next__
+
+    def save(self):
+        if self.schema:
+            set_schema_from_context({"space_code": self.schema})
+        super().save()
+
+
 class DatabaseScheduler(DCBScheduler):
+    """
+    Loads the schedules of every tenant schema. Changes are read from
+    public.workflow_schedule_index in one query, only the schemas that
+    changed are loaded again.
+    """
+
     Model = Schedule
+    Entry = ScheduleEntry
+
+    # {schema: (enabled_count, last_change)} the schedule was loaded from
+    _schema_changes = None
+    # schemas to load on the next reload, None for all of them
+    _reload_schemas = None
 
     def all_as_schedule(self):
         debug("DatabaseScheduler: Fetching database schedule")
-        schemas = get_all_tenant_schemas()
-        s = {}
-        for schema in schemas:
+        if self._reload_schemas is None:
+            self._schema_changes = get_schedule_index()
+            reload = set(self._schema_changes)
+        else:
+            reload = self._reload_schemas
+
+        keep = set(self._schema_changes) - reload
+        s = {
+            name: entry
+            for name, entry in (self._schedule or {}).items()
+            if getattr(entry, "static", False) or getattr(entry, "schema", None) in keep
+        }
+
+        for schema in sorted(reload):
+            enabled_count = self._schema_changes.get(schema, (0, None))[0]
+            if not enabled_count:
+                continue
+
             set_schema_from_context({"space_code": schema})
             for model in self.Model.objects.enabled():
                 try:  # noqa: SIM105
-                    s[f"{schema}:{model.name}"] = self.Entry(model, app=self.app)
+                    s[f"{schema}:{model.name}"] = self.Entry(model, app=self.app, schema=schema)
                 except ValueError:
                     pass
+
+        if reload:
+            info(f"DatabaseScheduler: loaded schedules of {len(reload)} schemas")
+        self._reload_schemas = set()
         return s
 
+    def update_from_dict(self, mapping):
+        # entries of the celery configuration are stored in public and survive tenant reloads
+        set_schema_from_context({"space_code": "public"})
+        super().update_from_dict(mapping)
+
+        for name in mapping:
+            if entry := self._schedule.get(name):
+                entry.schema = "public"
+                entry.static = True
+
     def schedule_changed(self):
-        last = self._last_timestamp
-        ts = None
-        schemas = get_all_tenant_schemas()
-        for schema in schemas:
-            set_schema_from_context({"space_code": schema})
-            try:
-                last_change_in_schema = self.Changes.last_change()
-                if last_change_in_schema:
-                    if ts:
-                        ts = max(ts, last_change_in_schema)
-                    else:
-                        ts = last_change_in_schema
-            except DatabaseError as exc:
-                logger.exception("Database gave error: %r", exc)
-                return False
-            except InterfaceError:
-                warning("DatabaseScheduler: InterfaceError in schedule_changed(), waiting to retry in next call...")
-                return False
         try:
-            if ts and ts > (last if last else ts):
-                return True
-        finally:
-            self._last_timestamp = ts
-        return False
+            index = get_schedule_index()
+        except DatabaseError as exc:
+            logger.exception("Database gave error: %r", exc)
+            return False
+        except InterfaceError:
+            warning("DatabaseScheduler: InterfaceError in schedule_changed(), waiting to retry in next call...")
+            return False
+
+        if self._schema_changes is None:
+            return False
+
+        changed = {
+            schema
+            for schema in index.keys() | self._schema_changes.keys()
+            if index.get(schema) != self._schema_changes.get(schema)
+        }
+        if not changed:
+            return False
+
+        self._schema_changes = index
+        if self._reload_schemas is not None:
+            self._reload_schemas |= changed
+        return True
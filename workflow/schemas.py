@@ -0,0 +1,111 @@
+import logging
+import os
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+_l = logging.getLogger("workflow")
+
+SCHEMAS_CHANNEL = "workflow_schemas"
+
+# a schema missing from the registry is looked up again at most this often (seconds)
+MISS_RELOAD_INTERVAL = 1
+
+
+class SchemaRegistry:
+    """
+    Process-local set of tenant schemas, reloaded after
+    WORKFLOW_SCHEMA_REGISTRY_TTL seconds or when a schema is created or
+    dropped (NOTIFY on the workflow_schemas channel).
+    """
+
+    def __init__(self):
+        self._schemas = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+        self._listener_pid = None
+
+    def all(self):
+        self._start_listener()
+
+        # read once, the listener thread may invalidate it meanwhile
+        schemas = self._schemas
+        if schemas is None or time.monotonic() - self._loaded_at >= settings.WORKFLOW_SCHEMA_REGISTRY_TTL:
+            schemas = self.reload()
+        return schemas
+
+    def exists(self, schema_name):
+        if schema_name in self.all():
+            return True
+
+        # created after the last load and the notification is not there yet
+        if time.monotonic() - self._loaded_at >= MISS_RELOAD_INTERVAL:
+            return schema_name in self.reload()
+
+        return False
+
+    def reload(self):
+        from workflow.utils import get_all_tenant_schemas
+
+        schemas = frozenset(get_all_tenant_schemas())
+        with self._lock:
+            self._schemas = schemas
+            self._loaded_at = time.monotonic()
+        return schemas
+
+    def invalidate(self):
+        with self._lock:
+            self._schemas = None
+
+    def _start_listener(self):
+        # threads do not survive a fork, every worker process starts its own
+        if not settings.WORKFLOW_SCHEMA_LISTEN or self._listener_pid == os.getpid():
+            return
+
+        from workflow.utils import is_special_execution_context
+
+        if is_special_execution_context():
+            return
+
+        self._listener_pid = os.getpid()
+        threading.Thread(target=self._listen, name="workflow-schema-listener", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            listener = None
+            try:
+                listener = connection.get_new_connection(connection.get_connection_params())
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {SCHEMAS_CHANNEL}")
+
+                # changes made while the listener was down
+                self.invalidate()
+
+                while True:
+                    if select.select([listener], [], [], 60) == ([], [], []):
+                        continue
+                    listener.poll()
+                    if listener.notifies:
+                        listener.notifies.clear()
+                        _l.info("SchemaRegistry: tenant schemas changed")
+                        self.invalidate()
+
+            except Exception as e:
+                _l.error(f"SchemaRegistry: listener failed {e}, reconnecting")
+                time.sleep(5)
+            finally:
+                if listener is not None:
+                    listener.close()
+
+
+schema_registry = SchemaRegistry()
+
+
+def notify_schemas_changed():
+    """Tell every process to reload its schema registry."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, '')", [SCHEMAS_CHANNEL])
@@ -42,8 +42,15 @@ class TaskSerializer(serializers.ModelSerializer):
             "modified_at",
             "log",
             "worker_name",
+            "queue",
+            "cache_status",
             "error_message",
+            "enqueued_at",
+            "started_at",
             "finished_at",
+            "timings",
+            "attempts",
+            "attempt_history",
         ]
 
 
@@ -129,6 +136,7 @@ class WorkflowSerializer(serializers.ModelSerializer):
     payload = serializers.JSONField(allow_null=True, required=False)
     tasks = TaskSerializer(many=True, read_only=True)
     parent = SimpleWorkflowSerializer(read_only=True)
+    resumed_from = serializers.PrimaryKeyRelatedField(read_only=True)
     workflow_version = serializers.SerializerMethodField()
 
     class Meta:
@@ -151,6 +159,7 @@ class WorkflowSerializer(serializers.ModelSerializer):
             "periodic",
             "finished_at",
             "parent",
+            "resumed_from",
             "workflow_version",
             "is_manager",
         ]
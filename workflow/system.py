@@ -5,6 +5,7 @@ import logging
 import os
 import shutil
 import sys
+import threading
 from pathlib import Path
 
 import yaml
@@ -14,7 +15,13 @@ from pluginbase import PluginBase
 from workflow.exceptions import WorkflowNotFound
 from workflow.models import Space
 from workflow.storage import get_storage
-from workflow.utils import build_celery_schedule, construct_path, get_all_tenant_schemas
+from workflow.utils import (
+    build_celery_schedule,
+    construct_path,
+    get_all_tenant_schemas,
+    schema_exists,
+    set_search_path,
+)
 from workflow_app import celery_app, settings
 
 storage = get_storage()
@@ -23,8 +30,23 @@ _l = logging.getLogger("workflow")
 
 
 class SystemWorkflowManager:
+    """
+    Workflow definitions of every space, keyed by space_code.user_code.
+
+    A space is loaded from the local storage the first time one of its
+    workflows is asked for, see load_space.
+    """
+
     def __init__(self):
         self.workflows = {}
+        self.loaded_spaces = set()
+        self._load_lock = threading.Lock()
+
+        # a fork while a warm up thread holds the lock must not leave it held in the child
+        os.register_at_fork(after_in_child=self._reset_load_lock)
+
+    def _reset_load_lock(self):
+        self._load_lock = threading.Lock()
 
     def register_workflows(self, space_code=None):
         schemas = get_all_tenant_schemas()
@@ -36,20 +58,19 @@ class SystemWorkflowManager:
 
         for schema in schemas:
             if schema != "public":
-                with connection.cursor() as cursor:
-                    cursor.execute(f"SET search_path TO {schema};")
+                set_search_path(schema)
 
                 _l.info(f"Loading workflows for schema: {schema}")
 
                 # Do not sync files here
                 # self.sync_remote_storage_to_local_storage(schema)
-                self.load_workflows_for_schema(schema)
+                if self.load_workflows_for_schema(schema):
+                    self.loaded_spaces.add(schema)
             else:
                 _l.info("[register_workflows] Skip public schema")
 
         if not space_code:
-            with connection.cursor() as cursor:
-                cursor.execute("SET search_path TO public;")
+            set_search_path("public")
 
     def sync_remote_storage_to_local_storage(self, space_code=None):
         schemas = get_all_tenant_schemas()
@@ -60,19 +81,80 @@ class SystemWorkflowManager:
             schemas = [space_code]
 
         for schema in schemas:
-            with connection.cursor() as cursor:
-                cursor.execute(f"SET search_path TO {schema};")
+            set_search_path(schema)
 
             _l.info(f"Sync storage files for schema: {schema}")
 
             self.sync_remote_storage_to_local_storage_for_schema()
 
-            with connection.cursor() as cursor:
-                cursor.execute("SET search_path TO public;")
+            set_search_path("public")
+
+    def load_space(self, space_code):
+        """Load the workflows of a space unless they are loaded already."""
+        if space_code in self.loaded_spaces:
+            return
+
+        with self._load_lock:
+            if space_code in self.loaded_spaces or space_code == "public" or not schema_exists(space_code):
+                return
+
+            _l.info(f"Loading workflows for schema: {space_code}")
+            # a failed load is tried again on the next use
+            if self.load_workflows_for_schema(space_code):
+                self.loaded_spaces.add(space_code)
+
+    def get_space_workflows(self, space_code):
+        """Return {user_code: definition} of the workflows of a space."""
+        self.load_space(space_code)
+
+        prefix = f"{space_code}."
+        return {user_code: config for user_code, config in self.get_workflows() if user_code.startswith(prefix)}
+
+    def get_workflows(self):
+        """Snapshot of (user_code, definition) pairs, spaces may be loaded by other threads meanwhile."""
+        with self._load_lock:
+            return list(self.workflows.items())
+
+    def warm_up(self, days):
+        """Load the spaces that ran a workflow in the last days."""
+        from workflow.models import Workflow
+
+        try:
+            for schema in sorted(get_all_tenant_schemas()):
+                if schema == "public" or schema in self.loaded_spaces:
+                    continue
+
+                # schema qualified, the search path of this thread stays untouched
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT EXISTS (SELECT 1 FROM {connection.ops.quote_name(schema)}.{Workflow._meta.db_table} "
+                        "WHERE created_at >= now() - make_interval(days => %s))",
+                        [days],
+                    )
+                    recently_active = cursor.fetchone()[0]
+
+                if recently_active:
+                    self.load_space(schema)
+
+            _l.info(f"warm_up: loaded workflows of {len(self.loaded_spaces)} spaces")
+
+        except Exception as e:
+            _l.error(f"warm_up: failed {e}")
+
+        finally:
+            connection.close()
+
+    def start_warm_up(self, days):
+        threading.Thread(target=self.warm_up, args=(days,), name="workflow-warm-up", daemon=True).start()
 
     def load_workflows_for_schema(self, schema):
+        """Load the workflow definitions of a schema, return False when the space could not be read."""
+        workflows = {}
         try:
-            space = Space.objects.all().first()
+            # read from the schema itself, loading does not depend on the current search path
+            space = Space.objects.raw(
+                f"SELECT * FROM {connection.ops.quote_name(schema)}.{Space._meta.db_table} ORDER BY id LIMIT 1"
+            )[0]
             # Construct the root path for workflows
             local_workflows_folder_path = construct_path(
                 settings.WORKFLOW_STORAGE_ROOT, "local", space.space_code, "workflows"
@@ -103,7 +185,7 @@ class SystemWorkflowManager:
                         config["workflow"]["realm_code"] = space.realm_code
                         config["workflow"]["space_code"] = space.space_code
 
-                        self.workflows[space.space_code + "." + user_code] = config
+                        workflows[space.space_code + "." + user_code] = config
                         _l.debug(f"Loaded workflow for user code: {space.space_code}.{user_code}")
 
                     except Exception as e:
@@ -113,10 +195,15 @@ class SystemWorkflowManager:
 
         except Exception as e:
             _l.error(f"Error loading workflows for schema {schema}: {e}")
+            return False
+
+        self.workflows.update(workflows)
+        return True
 
     def get_by_user_code(self, user_code, sync_remote=False):
         _l.info("get_by_user_code %s", user_code)
 
+        self.load_space(user_code.split(".")[0])
         workflow = self.workflows.get(user_code)
 
         if not workflow and sync_remote:
@@ -356,7 +443,7 @@ class SystemWorkflowManager:
         _l.info("Canceled %s tasks ", len(tasks))
 
     def init_periodic_tasks(self):
-        for user_code, config in self.workflows.items():
+        for user_code, config in self.get_workflows():
             # A dict is built for the periodic cleaning if the retention is valid
 
             workflow = config["workflow"]
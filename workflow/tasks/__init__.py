@@ -1,7 +1,12 @@
+from workflow.tasks.callbacks import deliver_platform_callbacks, relay_platform_callbacks
+from workflow.tasks.claim_check import collect_payload_blobs
 from workflow.tasks.export_backend_historical_records import (
     call_export_backend_historical_records,
 )
 
 __all__ = [
     "call_export_backend_historical_records",
+    "collect_payload_blobs",
+    "deliver_platform_callbacks",
+    "relay_platform_callbacks",
 ]
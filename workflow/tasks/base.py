@@ -1,14 +1,22 @@
+import time
+
 from celery import Task as _Task
-from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+from celery import states
+from celery.exceptions import Ignore, SoftTimeLimitExceeded, TimeLimitExceeded
 from celery.signals import task_failure, task_internal_error, task_postrun, task_prerun
 from celery.utils.log import get_task_logger
-from django.db import connection
+from django.conf import settings
+from django.utils.timezone import now
 
-from workflow.models import Task, Workflow
+from workflow.models import Task, TaskLogLine, Workflow
+from workflow.notifications import notify_progress
+from workflow.tracing import Spans
 from workflow.utils import (
+    release_queue_slot,
     schema_exists,
     send_alert,
     set_schema_from_context,
+    set_search_path,
 )
 from workflow_app import celery_app
 
@@ -34,12 +42,10 @@ def workflow_prerun(task_id, task, sender, *args, **kwargs):
         if context.get("space_code"):
             if schema_exists(context.get("space_code")):
                 space_code = context.get("space_code")
-                with connection.cursor() as cursor:
-                    cursor.execute(f"SET search_path TO {space_code};")
-                    logger.info(f"task_prerun.context {space_code}")
+                set_search_path(space_code)
+                logger.info(f"task_prerun.context {space_code}")
             else:  # REMOVE IN 1.9.0, PROBABLY SECURITY ISSUE
-                with connection.cursor() as cursor:
-                    cursor.execute("SET search_path TO public;")
+                set_search_path("public")
         else:
             raise Exception("No space_code in context")
     else:
@@ -48,17 +54,16 @@ def workflow_prerun(task_id, task, sender, *args, **kwargs):
     with celery_app.app.app_context():
         print("task_id %s", task_id)
 
-        task = Task.objects.get(celery_task_id=task_id)
-        task.status = Task.STATUS_PROGRESS
-        task.worker_name = sender.request.hostname
-        task.save()
-        logger.info(f"Task {task_id} is now in progress")
+        if Task.objects.filter(celery_task_id=task_id).transition(
+            (Task.STATUS_INIT,), Task.STATUS_PROGRESS, worker_name=sender.request.hostname
+        ):
+            logger.info(f"Task {task_id} is now in progress")
 
 
 @task_postrun.connect
 def cleanup(task_id, **kwargs):
-    with connection.cursor() as cursor:
-        cursor.execute("SET search_path TO public;")
+    # tasks that do not switch the schema themselves must not run on the previous task's tenant
+    set_search_path("public")
 
 
 @task_failure.connect
@@ -101,6 +106,11 @@ def on_failure(task_id, exception, args, einfo, **kwargs):
         parent_task.status = Task.STATUS_ERROR
         on_failure(parent_task.celery_task_id, exception, args, einfo, **kwargs)
 
+        # siblings of a failed map child that wait for a slot will never start
+        from workflow.tasks.workflows import cancel_waiting_map_children
+
+        cancel_waiting_map_children(parent_task)
+
     send_alert(workflow)
     logger.info(f"Task {task_id} is now in error")
 
@@ -116,11 +126,21 @@ def on_failure(task_id, exception, args, einfo, **kwargs):
 
 class BaseTask(_Task):
     def update_progress(self, progress):
-        task = Task.objects.get(id=self.task.id)
+        # Progress is coalesced, at most one write per WORKFLOW_PROGRESS_FLUSH_INTERVAL ms
 
-        task.progress = progress
+        self.task.progress = progress
+        self.progress_pending = True
 
-        task.save()
+        if (time.monotonic() - self.progress_flushed_at) * 1000 >= settings.WORKFLOW_PROGRESS_FLUSH_INTERVAL:
+            self.flush_progress()
+
+    def flush_progress(self):
+        if self.progress_pending:
+            Task.objects.filter(id=self.task.id).update(progress_data=self.task.progress_data, modified_at=now())
+            notify_progress(self.task)
+            self.progress_pending = False
+
+        self.progress_flushed_at = time.monotonic()
 
     """
     We need this method to prevent periodic worfklow overlap
@@ -137,13 +157,23 @@ class BaseTask(_Task):
     """
 
     def log(self, message):
-        # Append the message to the task's log
+        # Append the message to the task's log, lines are buffered and inserted in batches
+
+        self.log_buffer.extend(str(message).split("\n"))
 
-        if not self.task.log:
-            self.task.log = ""
+        if (
+            len(self.log_buffer) >= settings.WORKFLOW_LOG_BUFFER_SIZE
+            or time.monotonic() - self.log_flushed_at >= settings.WORKFLOW_LOG_FLUSH_INTERVAL
+        ):
+            self.flush_log()
 
-        self.task.log = self.task.log + str(message) + "\n"
-        self.task.save()
+    def flush_log(self):
+        if self.log_buffer:
+            TaskLogLine.objects.append(self.task.id, self.log_line_number, self.log_buffer)
+            self.log_line_number += len(self.log_buffer)
+            self.log_buffer = []
+
+        self.log_flushed_at = time.monotonic()
 
     def is_workflow_already_running(self, workflow_user_code):
         # Works great for everything except first task inside actual running workflow
@@ -171,18 +201,32 @@ class BaseTask(_Task):
         logger.info("BaseTask.before_start.task_id %s", task_id)
         logger.info("BaseTask.before_start.kwargs: %s", kwargs)
 
+        self.spans = Spans()
+
         context = kwargs.get("context")
-        set_schema_from_context(context)
+        with self.spans.span("set_schema"):
+            set_schema_from_context(context)
+
+        task = Task.objects.select_related("workflow").get(celery_task_id=task_id)
+        if not task.transition(
+            (Task.STATUS_INIT, Task.STATUS_PROGRESS, Task.STATUS_RETRY),
+            Task.STATUS_PROGRESS,
+            worker_name=self.request.hostname,
+            started_at=now(),
+        ):
+            # duplicate delivery of a task that already finished or was canceled
+            raise Ignore()
 
-        task = Task.objects.get(celery_task_id=task_id)
-        task.status = Task.STATUS_PROGRESS
-        task.worker_name = self.request.hostname
-        task.save()
+        self.task = task
+        self.workflow = task.workflow
 
-        workflow = Workflow.objects.get(id=task.workflow_id)
+        # a retried task continues its log
+        self.log_buffer = []
+        self.log_line_number = TaskLogLine.objects.next_line_number(task.id)
+        self.log_flushed_at = time.monotonic()
 
-        self.task = task
-        self.workflow = workflow
+        self.progress_pending = False
+        self.progress_flushed_at = 0
 
         logger.info(f"Task {task_id} is now in progress")
         super().before_start(task_id, args, kwargs)
@@ -198,4 +242,31 @@ class BaseTask(_Task):
 
         task = Task.objects.get(celery_task_id=task_id)
 
-        task.handle_task_success(retval)
+        # execute_workflow_step runs inside process_next_node, which runs fused successors itself,
+        # unless it was published on its own (retries)
+        task.handle_task_success(retval, dispatch_fused=not self.request.is_eager)
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        super().after_return(status, retval, task_id, args, kwargs, einfo)
+
+        spans = getattr(self, "spans", None)
+        task = getattr(self, "task", None)
+        if spans is None or task is None or task.celery_task_id != task_id:
+            return
+
+        if self.log_line_number or self.log_buffer:
+            self.flush_log()
+            task.snapshot_log()
+
+        if self.progress_pending:
+            # the last event carries the status on_success/on_failure stored
+            task.refresh_from_db(fields=["status"])
+            self.flush_progress()
+
+        # a retried task keeps its slot until its last attempt
+        if task.queue and status != states.RETRY:
+            release_queue_slot(task)
+
+        # on_success/on_failure saved the Task already, only touch the timings column
+        Task.objects.filter(id=task.id).update(timings=spans.emit(task))
+        self.spans = None
@@ -0,0 +1,85 @@
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db.models import Min
+from django.utils.timezone import now
+
+from workflow.finmars import get_base_path, get_refresh_token, post_task_status
+from workflow.models import PlatformCallback, Space
+from workflow.schemas import schema_registry
+from workflow.utils import set_schema_from_context, set_search_path
+from workflow_app import celery_app
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task(bind=True)
+def deliver_platform_callbacks(self, *args, **kwargs):
+    """
+    Deliver a batch of due platform callbacks of a space, then schedule the
+    next run when the batch was full or some callbacks wait for a retry.
+    """
+    context = kwargs.get("context")
+    set_schema_from_context(context)
+
+    callbacks = PlatformCallback.objects.claim(settings.WORKFLOW_CALLBACK_BATCH_SIZE)
+    if not callbacks:
+        return
+
+    logger.info(f"deliver_platform_callbacks: delivering {len(callbacks)} callbacks")
+
+    refresh = get_refresh_token()
+    base_path = get_base_path()
+
+    for callback in callbacks:
+        try:
+            response = post_task_status(
+                refresh,
+                base_path,
+                callback.platform_task_id,
+                callback.status,
+                **callback.get_status_data(),
+            )
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"deliver_platform_callbacks: {callback} failed: {e}")
+            callback.mark_failed(e)
+        else:
+            callback.mark_delivered()
+
+    if len(callbacks) == settings.WORKFLOW_CALLBACK_BATCH_SIZE:
+        countdown = 0
+    else:
+        next_attempt_at = PlatformCallback.objects.filter(
+            id__in=[callback.id for callback in callbacks], state=PlatformCallback.STATE_PENDING
+        ).aggregate(next_attempt_at=Min("next_attempt_at"))["next_attempt_at"]
+        if not next_attempt_at:
+            return
+        countdown = max((next_attempt_at - now()).total_seconds(), 0)
+
+    self.apply_async(kwargs=kwargs, countdown=countdown, queue="workflow")
+
+
+@celery_app.task
+def relay_platform_callbacks():
+    """
+    Start delivery in every space that has due callbacks. Run by beat, it
+    picks up callbacks whose after commit publish was lost or whose
+    dispatcher died after claiming them.
+    """
+    try:
+        for schema in sorted(schema_registry.all()):
+            if schema == "public":
+                continue
+
+            set_search_path(schema)
+            if not PlatformCallback.objects.filter(
+                state=PlatformCallback.STATE_PENDING, next_attempt_at__lte=now()
+            ).exists():
+                continue
+
+            space = Space.objects.first()
+            context = {"realm_code": space.realm_code, "space_code": space.space_code}
+            logger.info(f"relay_platform_callbacks: callbacks are due in {schema}")
+            deliver_platform_callbacks.apply_async(kwargs={"context": context}, queue="workflow")
+    finally:
+        set_search_path("public")
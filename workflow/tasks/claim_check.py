@@ -0,0 +1,29 @@
+from celery.utils.log import get_task_logger
+
+from workflow.claim_check import collect_blobs
+from workflow.schemas import schema_registry
+from workflow.utils import set_search_path
+from workflow_app import celery_app
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task
+def collect_payload_blobs():
+    """Delete unreferenced payload blobs of every space. Run by beat."""
+    try:
+        for schema in sorted(schema_registry.all()):
+            if schema == "public":
+                continue
+
+            set_search_path(schema)
+            try:
+                deleted = collect_blobs()
+            except Exception as e:
+                logger.error(f"collect_payload_blobs: {schema} failed: {e}")
+                continue
+
+            if deleted:
+                logger.info(f"collect_payload_blobs: deleted {deleted} blobs in {schema}")
+    finally:
+        set_search_path("public")
@@ -1,16 +1,25 @@
 import logging
 import os.path
-import time
 import traceback
 
+from billiard.einfo import ExceptionInfo
 from celery import chain
 from celery.utils import uuid
 from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
 from django.utils.timezone import now
 
-from workflow.models import Schedule, Space, Task, User, Workflow, WorkflowTemplate
-from workflow.tasks.base import BaseTask
-from workflow.utils import are_inputs_ready, set_schema_from_context
+from workflow.claim_check import is_reference, resolve
+from workflow.exceptions import QueueLimitReached
+from workflow.memoize import call_memoized
+from workflow.models import NodeInputBarrier, Schedule, Space, Task, User, Workflow, WorkflowTemplate
+from workflow.plan import NODE_TYPE_CONDITION, NODE_TYPE_MAP, NODE_TYPE_SOURCE_CODE, WorkflowPlan, get_workflow_plan
+from workflow.publisher import publish_batch
+from workflow.retry import retry_workflow_step
+from workflow.tasks.base import BaseTask, on_failure
+from workflow.utils import are_inputs_ready, reserve_queue_slot, set_schema_from_context
 from workflow_app import celery_app
 
 logger = get_task_logger(__name__)
@@ -38,15 +47,18 @@ def start(self, workflow_id, *args, **kwargs):
 
 @celery_app.task(bind=True)
 def end(self, workflow_id, *args, **kwargs):
-    # Waiting for the workflow status to be marked in error if a task failed
-    time.sleep(0.5)
-
     context = kwargs.get("context")
     set_schema_from_context(context)
 
     logger.info(f"Closing the workflow {workflow_id}")
     workflow = Workflow.objects.get(id=workflow_id)
 
+    # The last of the end task and the task success handlers closes the run,
+    # chain callbacks start this task before the previous on_success is done
+    if workflow.pending_tasks is not None:
+        workflow.complete_pending_task()
+        return
+
     if workflow.status != Workflow.STATUS_ERROR:
         workflow.status = Workflow.STATUS_SUCCESS
         workflow.save()
@@ -175,8 +187,39 @@ def execute(self, user_code, payload, is_manager, *args, **kwargs):
         logger.error("periodic task error: %s", e, exc_info=True)
 
 
+def schedule_queued_workflows(workflow):
+    """Start queued runs of the workflow once the current transaction commits."""
+    context = {"space_code": workflow.space.space_code, "realm_code": workflow.space.realm_code}
+    transaction.on_commit(
+        lambda: start_queued_workflows.apply_async(
+            kwargs={"user_code": workflow.user_code, "context": context}, queue="workflow"
+        )
+    )
+
+
+@celery_app.task(bind=True)
+def start_queued_workflows(self, user_code, *args, **kwargs):
+    context = kwargs.get("context")
+    set_schema_from_context(context)
+
+    from workflow import workflows
+
+    started = workflows.start_queued_workflows(user_code, context.get("realm_code"), context.get("space_code"))
+
+    logger.info(f"start_queued_workflows: started {len(started)} runs of {user_code}")
+
+
 @celery_app.task(bind=True, base=BaseTask)
-def execute_workflow_step(self, *args, **kwargs):  # noqa: PLR0912,PLR0915
+def execute_workflow_step(self, *args, **kwargs):
+    try:
+        return run_workflow_step(self, *args, **kwargs)
+    except Exception as e:
+        # raises Retry or Ignore when the node's retry policy schedules another attempt
+        retry_workflow_step(self, e, args, kwargs)
+        raise
+
+
+def run_workflow_step(self, *args, **kwargs):  # noqa: PLR0912,PLR0915
     from workflow.api import clear_registered_task, get_registered_task
     from workflow.system import get_system_workflow_manager
 
@@ -184,7 +227,13 @@ def execute_workflow_step(self, *args, **kwargs):  # noqa: PLR0912,PLR0915
     manager = get_system_workflow_manager()
 
     context = kwargs.get("context")
-    set_schema_from_context(context)
+    with self.spans.span("set_schema"):
+        set_schema_from_context(context)
+
+    with self.spans.span("resolve_payload"):
+        for key in ("payload", "previous_output"):
+            if is_reference(kwargs.get(key)):
+                kwargs[key] = resolve(kwargs[key])
 
     workflow = self.task.workflow
 
@@ -203,12 +252,14 @@ def execute_workflow_step(self, *args, **kwargs):  # noqa: PLR0912,PLR0915
             }
 
             # Execute the source code
-            exec(self.task.source_code, exec_scope)
+            with self.spans.span("compile_source"):
+                exec(self.task.source_code, exec_scope)
 
             # If the code has defined a `main()` function, call it
             if "main" in exec_scope:
                 # logger.info(f"Executing main() function in user-provided source code for node {self.task.source_code}") # noqa: E501
-                result = exec_scope["main"](self, *args, **kwargs)
+                with self.spans.span("user_code"):
+                    result = call_memoized(self, exec_scope["main"], args, kwargs, source=self.task.source_code)
                 return result
             else:
                 logger.warning("No main() function found in source code for node. Skipping execution.")
@@ -227,7 +278,8 @@ def execute_workflow_step(self, *args, **kwargs):  # noqa: PLR0912,PLR0915
 
         target_space_workflow_user_code = f"{context.get('space_code')}.{target_workflow_user_code}"
 
-        target_wf = manager.get_by_user_code(target_space_workflow_user_code, sync_remote=True)
+        with self.spans.span("get_by_user_code"):
+            target_wf = manager.get_by_user_code(target_space_workflow_user_code, sync_remote=True)
 
         _l.info(f"execute_workflow_step: Target Workflow Version {target_wf.get('version')}")
 
@@ -280,7 +332,8 @@ def execute_workflow_step(self, *args, **kwargs):  # noqa: PLR0912,PLR0915
                 path = path[:-5]
             module_path = path.replace(".", "/").replace(":", "/")
 
-            manager.sync_remote_storage_to_local_storage_for_schema(module_path)
+            with self.spans.span("sync_storage"):
+                manager.sync_remote_storage_to_local_storage_for_schema(module_path)
 
             # imports = manager.get_imports(target_space_workflow_user_code)
             imports = kwargs.get("imports")
@@ -298,19 +351,53 @@ def execute_workflow_step(self, *args, **kwargs):  # noqa: PLR0912,PLR0915
                         extra_path, pattern = extra_path.rsplit("/", maxsplit=1)  # noqa: PLW2901
                     else:
                         pattern = "*.*"
-                    manager.sync_remote_storage_to_local_storage_for_schema(extra_path, [pattern])
+                    with self.spans.span("sync_imports"):
+                        manager.sync_remote_storage_to_local_storage_for_schema(extra_path, [pattern])
 
-            manager.import_user_tasks(module_path, raise_exception=True)
+            with self.spans.span("import_user_tasks"):
+                manager.import_user_tasks(module_path, raise_exception=True)
 
             func = get_registered_task()
             if func:
                 logger.info("executing %s", func.__name__)
-                result = func(self, *args, **kwargs)
+                with self.spans.span("user_code"):
+                    result = call_memoized(self, func, args, kwargs)
                 return result
             else:
                 raise Exception(f"no function to execute for {self.task.name}")
 
 
+def dispatch_node(workflow, node_id, plan):
+    dispatch_nodes(workflow, [node_id], plan)
+
+
+def dispatch_nodes(workflow, node_ids, plan):
+    """
+    Publish ``process_next_node`` for v2 nodes, as one batch.
+
+    The messages only reference the workflow, the node and the plan version,
+    the receiving worker resolves the graph from its local plan cache.
+    """
+    publish_batch(
+        [
+            process_next_node.signature(
+                kwargs={
+                    "current_node_id": node_id,
+                    "workflow_id": workflow.id,
+                    "plan_version": plan.version,
+                    "enqueued_at": now().isoformat(),
+                    "context": {
+                        "realm_code": workflow.space.realm_code,
+                        "space_code": workflow.space.space_code,
+                    },
+                },
+                queue="workflow",
+            )
+            for node_id in node_ids
+        ]
+    )
+
+
 @celery_app.task(bind=True)
 def execute_workflow_v2(self, *args, **kwargs):
     logger.info(f"Opening the workflow with ID: {kwargs.get('workflow_id')}")
@@ -322,7 +409,7 @@ def execute_workflow_v2(self, *args, **kwargs):
 
     # Get workflow from database
     workflow_id = kwargs.get("workflow_id")
-    workflow = Workflow.objects.get(id=workflow_id)
+    workflow = Workflow.objects.select_related("space", "workflow_template").get(id=workflow_id)
     logger.info(f"Workflow fetched from database: {workflow}")
 
     # Update workflow status to in-progress
@@ -330,157 +417,349 @@ def execute_workflow_v2(self, *args, **kwargs):
     workflow.save()
     logger.info(f"Workflow status updated to: {workflow.status}")
 
-    # Log workflow data to get steps and connections
-    workflow_data = workflow.workflow_template.data
-    logger.info(f"Workflow data loaded: {workflow_data}")
-
-    nodes = {node["id"]: node for node in workflow_data["workflow"]["nodes"]}
-    connections = workflow_data["workflow"]["connections"]
-
-    # Log nodes and connections
-    logger.info(f"Nodes parsed from workflow data: {nodes}")
-    logger.info(f"Connections parsed from workflow data: {connections}")
+    plan = get_workflow_plan(workflow.workflow_template, context.get("space_code"))
+    logger.info(f"Workflow plan loaded: {len(plan.nodes)} nodes, {len(plan.connections)} connections")
 
-    # Create an adjacency list for connections
-    adjacency_list = {node_id: [] for node_id in nodes}
-    for connection in connections:
-        adjacency_list[connection["source"]].append(connection["target"])
-
-    # Log the adjacency list for debugging purposes
-    logger.info(f"Adjacency list created: {adjacency_list}")
+    NodeInputBarrier.objects.create_for_plan(workflow, plan)
 
     # Start from nodes without incoming edges (root nodes)
-    start_nodes = [node_id for node_id in nodes if not any(node_id == conn["target"] for conn in connections)]
+    start_nodes = plan.start_nodes
     logger.info(f"Start nodes determined: {start_nodes}")
 
     # Execute tasks from start nodes
-    for start_node in start_nodes:
-        logger.info(f"Dispatching task for start node: {start_node}")
-
-        process_next_node.apply_async(
-            kwargs={
-                "current_node_id": start_node,
-                "workflow_id": workflow_id,
-                "nodes": nodes,
-                "adjacency_list": adjacency_list,
-                "context": context,
-                "connections": connections,
-            },
-            queue="workflow",
-        )
+    dispatch_nodes(workflow, start_nodes, plan)
 
     logger.info("All start nodes have been dispatched.")
 
 
-@celery_app.task(bind=True)
-def process_next_node(self, current_node_id, workflow_id, nodes, adjacency_list, **kwargs):  # noqa: PLR0912,PLR0915
-    context = kwargs.get("context")
-    logger.info(f"process_next_node context received: {context}")
-    set_schema_from_context(context)
+def resolve_node_plan(workflow, context, nodes=None, plan_version=None, connections=None):
+    """
+    Return the plan a ``process_next_node`` message refers to.
 
-    try:
-        # Fetch workflow and task information
-        logger.info(f"Fetching workflow with ID: {workflow_id}")
-        workflow = Workflow.objects.get(id=workflow_id)
-        logger.info(f"Workflow status: {workflow.status}")
-        current_node = nodes[current_node_id]
+    Messages published before plan references were introduced still carry
+    the whole graph, in that case the plan is compiled from the message.
+    """
+    if nodes is not None:
+        return WorkflowPlan(nodes, connections or [])
 
-        if workflow.status == Workflow.STATUS_WAIT:
-            logger.info(f"Workflow {workflow_id} is currently waiting. Stopping execution until resumed.")
-            # Save the current_node_id for resuming
-            workflow.current_node_id = current_node_id
-            workflow.save()
-            return  # Exit the task without further execution
+    plan = get_workflow_plan(workflow.workflow_template, context.get("space_code"))
 
-        if not are_inputs_ready(workflow, current_node_id, kwargs.get("connections")):
-            logger.info(f"Task for Node ID: {current_node_id}, inputs are not ready, wait")
-            return
+    if plan_version and plan.version != plan_version:
+        logger.warning(
+            f"Workflow {workflow.id} template changed since the node was dispatched, "
+            f"using current plan {plan.version} instead of {plan_version}"
+        )
 
-        if current_node["data"]["node"]["type"] == "source_code":
-            workflow_user_code = "custom_code"
-        elif current_node["data"]["node"]["type"] == "condition":
-            workflow_user_code = "condition"
-        else:
-            workflow_user_code = current_node["data"]["workflow"]["user_code"]
+    return plan
 
-        logger.info(f"Executing task for Node ID: {current_node_id}, Task Name: {workflow_user_code}")
 
-        payload = workflow.payload  # Default to the workflow payload
-        previous_output = None
+def execute_node(workflow, plan, node_id, enqueued_at=None):
+    """
+    Create the Task of a v2 node and run ``execute_workflow_step`` for it,
+    in the current process or on the queue the node asks for. Returns the Task.
 
-        if "in" in current_node["inputs"]:
-            # Identify the previous node connected to "in"
-            previous_node_id = None
-            for connection in kwargs.get("connections"):
-                if connection["target"] == current_node_id and connection["targetInput"] == "in":
-                    previous_node_id = connection["source"]
-                    break
+    enqueued_at is when the node was dispatched, defaults to now.
+    """
+    node = plan.nodes[node_id]
+    workflow_user_code = plan.get_task_name(node_id)
 
-            if previous_node_id:
-                previous_task = (
-                    Task.objects.filter(workflow=workflow, node_id=previous_node_id).order_by("-created_at").first()
-                )
-                if previous_task:
-                    previous_output = previous_task.result
-                    logger.info(f"Using previous output from node ID {previous_node_id}: {previous_output}")
-
-        # Find the previous task that provided the payload
-        if "payload_input" in current_node["inputs"]:
-            # Identify the payload generator node connected to "payload_input"
-            payload_generator_node_id = None
-            for connection in kwargs.get("connections"):
-                if connection["target"] == current_node_id and connection["targetInput"] == "payload_input":
-                    payload_generator_node_id = connection["source"]
-                    break
-
-            if payload_generator_node_id:
-                payload_task = (
-                    Task.objects.filter(workflow=workflow, node_id=payload_generator_node_id)
-                    .order_by("-created_at")
-                    .first()
-                )
-                if payload_task:
-                    payload = payload_task.result
-                    logger.info(f"Using payload from node ID {payload_generator_node_id}: {payload}")
+    logger.info(f"Executing task for Node ID: {node_id}, Task Name: {workflow_user_code}")
 
-        # Create Celery signature for the current task
-        task_id = uuid()
-        signature = execute_workflow_step.s(
-            workflow_id=workflow.id,
-            payload=payload,
-            context={
-                "realm_code": workflow.space.realm_code,
-                "space_code": workflow.space.space_code,
-            },
-            imports=None,
-            previous_output=previous_output,
-        ).set(task_id=task_id)
-
-        # Create a Task object for tracking purposes
-        task = Task(
-            celery_task_id=task_id,
-            name=workflow_user_code,
-            workflow_id=workflow.id,
-            node_id=current_node_id,
-            status=Task.STATUS_INIT,
-            space=workflow.space,
-        )
+    # Large values travel as claim-check references, execute_workflow_step resolves them
+    payload = workflow.payload_reference  # Default to the workflow payload
+    previous_output = None
+
+    # "in" carries the previous output, "payload_input" replaces the payload
+    input_sources = {
+        target_input: plan.get_input_source(node_id, target_input)
+        for target_input in ("in", "payload_input")
+        if target_input in node["inputs"]
+    }
+    input_tasks = {
+        task.node_id: task
+        for task in Task.objects.filter(workflow=workflow, node_id__in=set(input_sources.values()) - {None})
+        .order_by("node_id", "-created_at")
+        .distinct("node_id")
+    }
+
+    previous_task = input_tasks.get(input_sources.get("in"))
+    if previous_task:
+        previous_output = previous_task.result_reference
+        logger.info(f"Using previous output from node ID {previous_task.node_id}: {previous_output}")
+
+    payload_task = input_tasks.get(input_sources.get("payload_input"))
+    if payload_task:
+        payload = payload_task.result_reference
+        logger.info(f"Using payload from node ID {payload_task.node_id}: {payload}")
+
+    if plan.get_node_type(node_id) == NODE_TYPE_MAP:
+        return execute_map_node(workflow, plan, node_id, payload, previous_output, enqueued_at)
 
-        if (
-            current_node["data"]["node"]["type"] == "source_code"
-            or current_node["data"]["node"]["type"] == "condition"
-        ):
-            task.source_code = current_node["data"]["source_code"]
+    # Create Celery signature for the current task
+    task_id = uuid()
+    signature = execute_workflow_step.s(
+        workflow_id=workflow.id,
+        payload=payload,
+        context={
+            "realm_code": workflow.space.realm_code,
+            "space_code": workflow.space.space_code,
+        },
+        imports=None,
+        previous_output=previous_output,
+    ).set(task_id=task_id)
+
+    # Create a Task object for tracking purposes
+    task = Task(
+        celery_task_id=task_id,
+        name=workflow_user_code,
+        workflow_id=workflow.id,
+        node_id=node_id,
+        status=Task.STATUS_INIT,
+        space=workflow.space,
+        enqueued_at=enqueued_at or now(),
+    )
 
-        task.payload = payload  # because of legacy json field
+    if plan.get_node_type(node_id) in (NODE_TYPE_SOURCE_CODE, NODE_TYPE_CONDITION):
+        task.source_code = node["data"]["source_code"]
 
+    task.payload = payload  # because of legacy json field
+
+    queue = plan.get_node_queue(node_id)
+    if not queue:
         task.save()
 
         # Run the task synchronously and get the result
         signature.apply()  # Execute the task and get the result immediately
 
+        return task
+
+    task.queue = queue
+
+    with transaction.atomic():
+        task.save()
+        if not reserve_queue_slot(queue, task):
+            raise QueueLimitReached(queue)
+
+    # Published after commit so the worker finds the Task
+    signature.apply_async(queue=queue)
+
+    logger.info(f"Node ID: {node_id} sent to queue {queue}")
+
+    return task
+
+
+def get_map_items(plan, node_id, payload, previous_output):
+    node = plan.nodes[node_id]
+    items = resolve(previous_output if "in" in node["inputs"] else payload)
+
+    items_key = node["data"].get("items_key")
+    if items_key and isinstance(items, dict):
+        items = items.get(items_key)
+
+    if not isinstance(items, list):
+        raise Exception(f"Map node {node_id} expects a list of items, got {type(items).__name__}")
+
+    return items
+
+
+def execute_map_node(workflow, plan, node_id, payload, previous_output, enqueued_at=None):
+    """
+    Expand a map node into one child workflow per chunk of items.
+
+    The node data names the child template (``workflow.user_code``), the
+    ``chunk_size`` and the ``max_parallel`` children allowed to run at once.
+    Children get ``{"items": [...], "chunk": index}`` as payload, the map
+    task succeeds with the list of their outputs once all of them finished.
+    A map task that cannot expand fails with its workflow.
+    """
+    node_data = plan.nodes[node_id]["data"]
+    chunk_size = max(int(node_data.get("chunk_size") or 1), 1)
+
+    target_workflow_user_code = plan.get_task_name(node_id)
+    if target_workflow_user_code.endswith(".task"):
+        target_workflow_user_code = target_workflow_user_code[:-5]
+
+    task = Task(
+        celery_task_id=uuid(),
+        name=plan.get_task_name(node_id),
+        workflow_id=workflow.id,
+        node_id=node_id,
+        status=Task.STATUS_NESTED_PROGRESS,
+        space=workflow.space,
+        enqueued_at=enqueued_at or now(),
+        started_at=now(),
+    )
+    task.payload = payload
+    task.save()
+
+    try:
+        items = get_map_items(plan, node_id, payload, previous_output)
+        target_workflow_template = WorkflowTemplate.objects.get(
+            user_code=target_workflow_user_code, space=workflow.space
+        )
+    except Exception as e:
+        logger.error(f"Map node {node_id} could not expand: {e}")
+        context = {"realm_code": workflow.space.realm_code, "space_code": workflow.space.space_code}
+        on_failure(task.celery_task_id, e, (), ExceptionInfo(), kwargs={"context": context})
+        task.refresh_from_db()
+        return task
+
+    children = []
+    for index, start in enumerate(range(0, len(items), chunk_size)):
+        child_workflow = Workflow(
+            owner=workflow.owner,
+            space=workflow.space,
+            user_code=target_workflow_user_code,
+            node_id=node_id,  # in that case Workflow and Task has same node_id
+            status=Workflow.STATUS_INIT,
+            parent=workflow,
+            workflow_template=target_workflow_template,
+        )
+        child_workflow.payload = {"items": items[start : start + chunk_size], "chunk": index}
+        children.append(child_workflow)
+
+    Workflow.objects.bulk_create(children)
+
+    logger.info(f"Map node {node_id} expanded into {len(children)} workflows of {target_workflow_user_code}")
+
+    if not children:
+        task.status = Task.STATUS_PROGRESS
+        task.handle_task_success([])
+        return task
+
+    continue_map_node(task)
+
+    return task
+
+
+def continue_map_node(task):
+    """
+    Start waiting children of a map task up to its parallelism limit and
+    finish the task when all children succeeded, called again every time
+    a child workflow finishes.
+    """
+    workflow = task.workflow
+    plan = get_workflow_plan(workflow.workflow_template, workflow.space.space_code)
+    max_parallel = int(plan.nodes[task.node_id]["data"].get("max_parallel") or settings.WORKFLOW_MAP_MAX_PARALLEL)
+
+    results = None
+
+    # the task row lock serializes children finishing at the same time
+    with transaction.atomic():
+        if Task.objects.select_for_update().get(id=task.id).status != Task.STATUS_NESTED_PROGRESS:
+            return
+
+        children = Workflow.objects.filter(parent=workflow, node_id=task.node_id).select_related("space")
+        statuses = list(children.order_by("id").values_list("id", "status"))
+
+        running = sum(1 for _, status in statuses if status == Workflow.STATUS_PROGRESS)
+        waiting = [child_id for child_id, status in statuses if status == Workflow.STATUS_INIT]
+        to_start = waiting[: max(max_parallel - running, 0)]
+
+        if to_start:
+            children.filter(id__in=to_start).update(status=Workflow.STATUS_PROGRESS)
+        elif all(status == Workflow.STATUS_SUCCESS for _, status in statuses):
+            results = [
+                resolve(output) for output in children.order_by("id").values_list("last_task_output", flat=True)
+            ]
+            Task.objects.filter(id=task.id).update(status=Task.STATUS_PROGRESS)
+
+    if to_start:
+        logger.info(f"Map node {task.node_id} starts {len(to_start)} workflows, {running} running")
+        publish_batch(
+            [
+                execute_workflow_v2.signature(
+                    kwargs={
+                        "workflow_id": child_id,
+                        "context": {
+                            "realm_code": workflow.space.realm_code,
+                            "space_code": workflow.space.space_code,
+                        },
+                    },
+                    queue="workflow",
+                )
+                for child_id in to_start
+            ]
+        )
+
+    if results is not None:
+        logger.info(f"Map node {task.node_id} finished, {len(results)} results")
+        task.refresh_from_db()
+        task.handle_task_success(results)
+
+
+def cancel_waiting_map_children(task):
+    """Cancel the children of a failed map task that were not started yet."""
+    # the task row lock keeps continue_map_node from starting them meanwhile
+    with transaction.atomic():
+        Task.objects.select_for_update().get(id=task.id)
+        canceled = Workflow.objects.filter(
+            parent_id=task.workflow_id, node_id=task.node_id, status=Workflow.STATUS_INIT
+        ).update(status=Workflow.STATUS_CANCELED, finished_at=now())
+
+    if canceled:
+        logger.info(f"Map node {task.node_id} failed, canceled {canceled} waiting workflows")
+
+
+@celery_app.task(bind=True)
+def process_next_node(self, current_node_id, workflow_id, nodes=None, adjacency_list=None, **kwargs):
+    context = kwargs.get("context")
+    logger.info(f"process_next_node context received: {context}")
+    set_schema_from_context(context)
+
+    try:
+        # Fetch workflow and task information
+        logger.info(f"Fetching workflow with ID: {workflow_id}")
+        workflow = Workflow.objects.select_related("space", "workflow_template").get(id=workflow_id)
+        logger.info(f"Workflow status: {workflow.status}")
+
+        plan = resolve_node_plan(
+            workflow,
+            context,
+            nodes=nodes,
+            plan_version=kwargs.get("plan_version"),
+            connections=kwargs.get("connections"),
+        )
+
+        # Join barriers decide when a node with several inputs is dispatched,
+        # messages carrying the whole graph were published before they existed
+        if nodes is not None and not are_inputs_ready(workflow, current_node_id, plan.connections):
+            logger.info(f"Task for Node ID: {current_node_id}, inputs are not ready, wait")
+            return
+
+        # Fused nodes run back to back in this worker instead of being
+        # published, handle_task_success leaves fused edges to this loop
+        node_id = current_node_id
+        enqueued_at = parse_datetime(kwargs["enqueued_at"]) if kwargs.get("enqueued_at") else None
+        while node_id:
+            if workflow.status == Workflow.STATUS_WAIT:
+                logger.info(f"Workflow {workflow_id} is currently waiting. Stopping execution until resumed.")
+                # Save the current_node_id for resuming
+                workflow.current_node_id = node_id
+                workflow.save()
+                return  # Exit the task without further execution
+
+            task = execute_node(workflow, plan, node_id, enqueued_at)
+            enqueued_at = None  # fused nodes are not queued
+
+            # task_postrun of the step resets the search path
+            set_schema_from_context(context)
+            task.refresh_from_db()
+
+            if task.status != Task.STATUS_SUCCESS:
+                break
+
+            node_id = plan.get_fused_next_node_id(node_id, task.result)
+            if node_id:
+                logger.info(f"Running fused node {node_id} after {task.node_id}")
+                workflow.refresh_from_db()
+
         logger.info("next node is executed, exit process_next_node")
 
+    except QueueLimitReached as e:
+        logger.info(f"Queue {e} is full, Node ID: {current_node_id} will be retried")
+        raise self.retry(countdown=settings.WORKFLOW_QUEUE_RETRY_DELAY, max_retries=None) from e
+
     except Exception as e:
         logger.error(f"Error executing task : {e}")
         logger.error(f"Error executing traceback : {traceback.format_exc()}")
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils.timezone import now
+
+from workflow.claim_check import CLAIM_CHECK_KEY, collect_blobs, is_reference, offload, resolve
+from workflow.models import PayloadBlob, Task, Workflow
+from workflow.tests.factories import SpaceFactory, UserFactory
+
+from .base import BaseTestCase
+
+
+@override_settings(WORKFLOW_CLAIM_CHECK_THRESHOLD=64)
+class ClaimCheckTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.user = UserFactory()
+        self.workflow = Workflow.objects.create(space=self.space, owner=self.user, status=Workflow.STATUS_INIT)
+        self.large_value = {"rows": [self.random_string(10) for _ in range(20)]}
+
+    def test_small_value_is_inline(self):
+        value = {"key": "value"}
+
+        self.assertEqual(offload(value), value)
+        self.assertFalse(PayloadBlob.objects.exists())
+
+    def test_large_value_is_offloaded(self):
+        reference = offload(self.large_value)
+
+        self.assertTrue(is_reference(reference))
+        self.assertEqual(PayloadBlob.objects.get().digest, reference[CLAIM_CHECK_KEY])
+        self.assertEqual(resolve(reference), self.large_value)
+
+    def test_same_value_is_stored_once(self):
+        self.assertEqual(offload(self.large_value), offload(dict(self.large_value)))
+        self.assertEqual(PayloadBlob.objects.count(), 1)
+
+    def test_task_accessors(self):
+        task = Task.objects.create(workflow=self.workflow, space=self.space, status=Task.STATUS_INIT)
+        task.payload = self.large_value
+        task.result = {"message": "ok"}
+        task.save()
+        task.refresh_from_db()
+
+        self.assertTrue(is_reference(task.payload_reference))
+        self.assertEqual(task.payload, self.large_value)
+        self.assertEqual(task.result_reference, {"message": "ok"})
+        self.assertEqual(task.result, {"message": "ok"})
+
+    def test_resolved_value_is_cached(self):
+        task = Task.objects.create(workflow=self.workflow, space=self.space, status=Task.STATUS_INIT)
+        task.payload = self.large_value
+        task.save()
+        task.refresh_from_db()
+
+        self.assertEqual(task.payload, self.large_value)
+        with self.assertNumQueries(0):
+            self.assertEqual(task.payload, self.large_value)
+
+        task.payload = {"key": "value"}
+        self.assertEqual(task.payload, {"key": "value"})
+
+    def test_workflow_payload(self):
+        self.workflow.payload = self.large_value
+        self.workflow.save()
+        self.workflow.refresh_from_db()
+
+        self.assertTrue(is_reference(self.workflow.payload_data))
+        self.assertEqual(self.workflow.payload, self.large_value)
+
+        self.workflow.payload = None
+        self.assertEqual((self.workflow.payload_data, self.workflow.payload), (None, {}))
+
+    def test_unreferenced_blobs_are_collected(self):
+        task = Task.objects.create(workflow=self.workflow, space=self.space, status=Task.STATUS_INIT)
+        task.result = self.large_value
+        task.save()
+        unreferenced = offload({"rows": [self.random_string(10) for _ in range(20)]})
+        PayloadBlob.objects.update(modified_at=now() - timedelta(days=8))
+
+        self.assertEqual(collect_blobs(retention_days=7), 1)
+
+        self.assertEqual(
+            list(PayloadBlob.objects.values_list("digest", flat=True)), [task.result_data[CLAIM_CHECK_KEY]]
+        )
+        self.assertNotEqual(task.result_data[CLAIM_CHECK_KEY], unreferenced[CLAIM_CHECK_KEY])
+
+    def test_recent_blobs_are_kept(self):
+        offload(self.large_value)
+
+        self.assertEqual(collect_blobs(retention_days=7), 0)
+        self.assertEqual(PayloadBlob.objects.count(), 1)
+
+    def test_reused_blob_is_recent_again(self):
+        offload(self.large_value)
+        PayloadBlob.objects.update(modified_at=now() - timedelta(days=8))
+        offload(self.large_value)
+
+        self.assertEqual(collect_blobs(retention_days=7), 0)
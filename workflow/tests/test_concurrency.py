@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from workflow.concurrency import (
+    POLICY_ALLOW,
+    POLICY_MAX,
+    POLICY_QUEUE,
+    POLICY_REPLACE,
+    POLICY_SKIP,
+    admit_workflow,
+    get_concurrency_policy,
+    take_queued_workflows,
+)
+from workflow.models import Workflow
+from workflow.tests.factories import SpaceFactory, UserFactory
+
+from .base import BaseTestCase
+
+
+class ConcurrencyPolicyTestCase(SimpleTestCase):
+    def test_default(self):
+        self.assertEqual(get_concurrency_policy({"workflow": {}}), (POLICY_ALLOW, None))
+
+    def test_policy_name(self):
+        self.assertEqual(get_concurrency_policy({"workflow": {"concurrency": "skip"}}), (POLICY_SKIP, 1))
+
+    def test_max(self):
+        wf = {"workflow": {"concurrency": {"policy": "max", "limit": 3}}}
+        self.assertEqual(get_concurrency_policy(wf), (POLICY_MAX, 3))
+
+    def test_template(self):
+        template = SimpleNamespace(data={"version": "2", "workflow": {"concurrency": "queue"}})
+        self.assertEqual(get_concurrency_policy({"workflow": {}}, template), (POLICY_QUEUE, 1))
+
+    def test_unknown_policy(self):
+        with self.assertRaisesMessage(Exception, "Unknown concurrency policy"):
+            get_concurrency_policy({"workflow": {"concurrency": "sometimes"}})
+
+
+class AdmitWorkflowTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.user = UserFactory()
+        self.user_code = f"{self.space.space_code}.com.finmars.test:etl"
+        self.running = self.create_workflow(Workflow.STATUS_PROGRESS)
+
+    def create_workflow(self, status=None):
+        workflow = Workflow(space=self.space, owner=self.user, user_code=self.user_code)
+        if status:
+            workflow.status = status
+            workflow.save()
+        return workflow
+
+    def test_skip(self):
+        workflow = self.create_workflow()
+
+        self.assertEqual(admit_workflow(workflow, POLICY_SKIP, 1), [])
+        self.assertEqual(workflow.status, Workflow.STATUS_CANCELED)
+        self.assertIsNotNone(workflow.finished_at)
+
+    def test_max(self):
+        first, second = self.create_workflow(), self.create_workflow()
+
+        admit_workflow(first, POLICY_MAX, 2)
+        admit_workflow(second, POLICY_MAX, 2)
+
+        self.assertEqual((first.status, second.status), (Workflow.STATUS_INIT, Workflow.STATUS_CANCELED))
+
+    def test_replace(self):
+        workflow = self.create_workflow()
+
+        self.assertEqual(admit_workflow(workflow, POLICY_REPLACE, 1), [self.running])
+        self.assertEqual(workflow.status, Workflow.STATUS_INIT)
+
+    @mock.patch("workflow.tasks.workflows.start_queued_workflows.apply_async")
+    def test_queue(self, apply_async):
+        workflow = self.create_workflow()
+        admit_workflow(workflow, POLICY_QUEUE, 1)
+
+        self.assertEqual(workflow.status, Workflow.STATUS_QUEUED)
+        self.assertEqual(workflow.concurrency_policy, POLICY_QUEUE)
+        self.assertEqual(take_queued_workflows(self.user_code, self.space.space_code, 1), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.running.concurrency_policy = POLICY_QUEUE
+            self.running.status = Workflow.STATUS_SUCCESS
+            self.running.save()
+
+        apply_async.assert_called_once()
+        self.assertEqual(take_queued_workflows(self.user_code, self.space.space_code, 1), [workflow])
+
+        workflow.refresh_from_db()
+        self.assertEqual(workflow.status, Workflow.STATUS_INIT)
+
+    @mock.patch("workflow.tasks.workflows.start_queued_workflows.apply_async")
+    def test_finished_run_without_queue_policy(self, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.running.status = Workflow.STATUS_SUCCESS
+            self.running.save()
+
+        apply_async.assert_not_called()
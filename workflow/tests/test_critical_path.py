@@ -0,0 +1,55 @@
+from datetime import UTC, datetime, timedelta
+
+from rest_framework.test import APIClient
+
+from workflow.models import Space, Task, User, Workflow
+from workflow.tests.factories import WorkflowTemplateFactory
+from workflow.tests.test_plan import make_template_data
+
+from .base import BaseTestCase
+
+
+class CriticalPathViewTestCase(BaseTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.realm_code = f"realm{self.random_string(5)}"
+        self.space_code = f"space{self.random_string(5)}"
+        self.url_prefix = f"/{self.realm_code}/{self.space_code}/workflow/api/workflow/"
+        self.space = Space.objects.create(realm_code=self.realm_code, space_code=self.space_code)
+        self.user = User.objects.create(
+            username=self.random_string(5),
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.client.force_authenticate(self.user)
+
+        template = WorkflowTemplateFactory(space=self.space, owner=self.user, data=make_template_data())
+        self.workflow = Workflow.objects.create(
+            space=self.space,
+            owner=self.user,
+            status=Workflow.STATUS_SUCCESS,
+            workflow_template=template,
+        )
+
+        start = datetime(2024, 1, 1, tzinfo=UTC)
+        for node_id, enqueued, started, finished in (("a", 0, 1, 2), ("b", 2, 10, 30), ("check", 2, 3, 4)):
+            Task.objects.create(
+                workflow=self.workflow,
+                space=self.space,
+                node_id=node_id,
+                status=Task.STATUS_SUCCESS,
+                enqueued_at=start + timedelta(seconds=enqueued),
+                started_at=start + timedelta(seconds=started),
+                finished_at=start + timedelta(seconds=finished),
+            )
+
+    def test_critical_path(self):
+        response = self.client.get(f"{self.url_prefix}{self.workflow.id}/critical-path/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["critical_path"], ["a", "b"])
+        self.assertEqual(response.data["duration"], 30)
+
+        nodes = {node["node_id"]: node for node in response.data["nodes"]}
+        self.assertEqual((nodes["b"]["queue_time"], nodes["b"]["run_time"]), (8, 20))
+        self.assertFalse(nodes["check"]["on_critical_path"])
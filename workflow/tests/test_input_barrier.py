@@ -0,0 +1,48 @@
+from workflow.models import NodeInputBarrier, Task, Workflow
+from workflow.plan import WorkflowPlan
+from workflow.tests.factories import SpaceFactory, UserFactory
+from workflow.tests.test_plan import make_connection, make_node
+from workflow.utils import are_inputs_ready
+
+from .base import BaseTestCase
+
+
+class NodeInputBarrierTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.user = UserFactory()
+        self.workflow = Workflow.objects.create(space=self.space, owner=self.user, status=Workflow.STATUS_PROGRESS)
+        plan = WorkflowPlan.from_template_data(
+            {
+                "version": "2",
+                "workflow": {
+                    "nodes": [make_node("a", inputs=()), make_node("b", inputs=()), make_node("join")],
+                    "connections": [make_connection("a", "join"), make_connection("b", "join")],
+                },
+            }
+        )
+        NodeInputBarrier.objects.create_for_plan(self.workflow, plan)
+
+    def test_last_input_releases(self):
+        self.assertFalse(NodeInputBarrier.objects.release(self.workflow, "join", "a"))
+        self.assertTrue(NodeInputBarrier.objects.release(self.workflow, "join", "b"))
+
+    def test_duplicate_input_is_ignored(self):
+        self.assertFalse(NodeInputBarrier.objects.release(self.workflow, "join", "a"))
+        self.assertFalse(NodeInputBarrier.objects.release(self.workflow, "join", "a"))
+        self.assertTrue(NodeInputBarrier.objects.release(self.workflow, "join", "b"))
+        self.assertFalse(NodeInputBarrier.objects.release(self.workflow, "join", "b"))
+
+    def test_missing_barrier(self):
+        self.assertIsNone(NodeInputBarrier.objects.release(self.workflow, "other", "a"))
+
+    def test_are_inputs_ready_uses_latest_task(self):
+        connections = [{"source": "a", "target": "join"}, {"source": "b", "target": "join"}]
+        for node_id, status in (("a", Task.STATUS_ERROR), ("a", Task.STATUS_SUCCESS), ("b", Task.STATUS_SUCCESS)):
+            Task.objects.create(workflow=self.workflow, space=self.space, node_id=node_id, status=status)
+
+        self.assertTrue(are_inputs_ready(self.workflow, "join", connections))
+
+        Task.objects.create(workflow=self.workflow, space=self.space, node_id="b", status=Task.STATUS_PROGRESS)
+
+        self.assertFalse(are_inputs_ready(self.workflow, "join", connections))
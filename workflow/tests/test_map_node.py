@@ -0,0 +1,145 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from workflow.models import Task, Workflow
+from workflow.plan import WorkflowPlan
+from workflow.tasks.base import on_failure
+from workflow.tasks.workflows import continue_map_node, execute_map_node, get_map_items
+from workflow.tests.factories import SpaceFactory, UserFactory, WorkflowTemplateFactory
+from workflow.tests.test_plan import make_connection, make_node
+
+from .base import BaseTestCase
+
+
+def make_map_template_data(**map_data):
+    map_node = make_node("map", node_type="map")
+    map_node["data"]["workflow"] = {"user_code": "com.finmars.test:child"}
+    map_node["data"].update(map_data)
+    return {
+        "version": "2",
+        "workflow": {
+            "nodes": [make_node("source", inputs=()), map_node, make_node("reduce")],
+            "connections": [make_connection("source", "map"), make_connection("map", "reduce")],
+        },
+    }
+
+
+@override_settings(WORKFLOW_MAP_MAX_PARALLEL=2)
+class MapNodeTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.user = UserFactory()
+        self.template = WorkflowTemplateFactory(space=self.space, owner=self.user, data=make_map_template_data())
+        self.workflow = Workflow.objects.create(
+            space=self.space,
+            owner=self.user,
+            status=Workflow.STATUS_PROGRESS,
+            workflow_template=self.template,
+        )
+        self.task = Task.objects.create(
+            workflow=self.workflow,
+            space=self.space,
+            node_id="map",
+            status=Task.STATUS_NESTED_PROGRESS,
+        )
+        self.children = [
+            Workflow.objects.create(
+                space=self.space,
+                owner=self.user,
+                parent=self.workflow,
+                node_id="map",
+                status=Workflow.STATUS_INIT,
+                payload_data={"items": [index], "chunk": index},
+            )
+            for index in range(3)
+        ]
+
+    def test_get_map_items(self):
+        plan = WorkflowPlan.from_template_data(make_map_template_data(items_key="rows"))
+
+        self.assertEqual(get_map_items(plan, "map", {}, {"rows": [1, 2]}), [1, 2])
+
+        with self.assertRaisesMessage(Exception, "expects a list of items"):
+            get_map_items(plan, "map", {}, {"value": 1})
+
+    @patch("workflow.tasks.workflows.publish_batch")
+    def test_parallelism_is_bounded(self, publish_batch):
+        continue_map_node(self.task)
+
+        self.assertEqual(len(publish_batch.call_args.args[0]), 2)
+        self.assertEqual(
+            list(Workflow.objects.filter(parent=self.workflow).order_by("id").values_list("status", flat=True)),
+            [Workflow.STATUS_PROGRESS, Workflow.STATUS_PROGRESS, Workflow.STATUS_INIT],
+        )
+
+    @patch("workflow.tasks.workflows.publish_batch")
+    @patch.object(Task, "handle_task_success")
+    def test_results_are_reduced_in_order(self, handle_task_success, publish_batch):
+        for index, child in enumerate(self.children):
+            child.status = Workflow.STATUS_SUCCESS
+            child.last_task_output = {"value": index}
+            child.save()
+
+        continue_map_node(self.task)
+
+        publish_batch.assert_not_called()
+        handle_task_success.assert_called_once_with([{"value": 0}, {"value": 1}, {"value": 2}])
+
+    @patch("workflow.tasks.workflows.dispatch_nodes")
+    def test_empty_map_returns_empty_list(self, dispatch_nodes):
+        WorkflowTemplateFactory(space=self.space, owner=self.user, user_code="com.finmars.test:child")
+        plan = WorkflowPlan.from_template_data(make_map_template_data())
+
+        task = execute_map_node(self.workflow, plan, "map", {}, [])
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.STATUS_SUCCESS)
+        self.assertEqual(task.result, [])
+        self.assertFalse(Workflow.objects.filter(parent=self.workflow, node_id="map", id__gt=self.children[-1].id))
+
+    @patch("workflow.tasks.base.send_alert")
+    @patch("workflow.tasks.base.set_schema_from_context")
+    def test_failed_expansion_fails_the_workflow(self, *args):
+        WorkflowTemplateFactory(space=self.space, owner=self.user, user_code="com.finmars.test:child")
+        plan = WorkflowPlan.from_template_data(make_map_template_data())
+
+        task = execute_map_node(self.workflow, plan, "map", {}, {"value": 1})
+
+        self.assertEqual(task.status, Task.STATUS_ERROR)
+        self.assertIn("expects a list of items", task.error_message)
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.status, Workflow.STATUS_ERROR)
+
+    @patch("workflow.tasks.base.send_alert")
+    @patch("workflow.tasks.base.set_schema_from_context")
+    def test_missing_child_template_fails_the_workflow(self, *args):
+        plan = WorkflowPlan.from_template_data(make_map_template_data())
+
+        task = execute_map_node(self.workflow, plan, "map", {}, [1, 2])
+
+        self.assertEqual(task.status, Task.STATUS_ERROR)
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.status, Workflow.STATUS_ERROR)
+
+    @patch("workflow.tasks.base.send_alert")
+    @patch("workflow.tasks.base.set_schema_from_context")
+    def test_failed_child_cancels_waiting_siblings(self, *args):
+        self.task.celery_task_id = "map"
+        self.task.save()
+        failed = self.children[0]
+        failed.status = Workflow.STATUS_PROGRESS
+        failed.save()
+        Task.objects.create(
+            workflow=failed, space=self.space, node_id="work", celery_task_id="work", status=Task.STATUS_PROGRESS
+        )
+
+        on_failure("work", Exception("boom"), (), SimpleNamespace(traceback=""), kwargs={"context": {}})
+
+        self.assertEqual(
+            list(Workflow.objects.filter(parent=self.workflow).order_by("id").values_list("status", flat=True)),
+            [Workflow.STATUS_ERROR, Workflow.STATUS_CANCELED, Workflow.STATUS_CANCELED],
+        )
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.STATUS_ERROR)
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from django.test import override_settings
+
+from workflow.memoize import call_memoized
+from workflow.models import NodeResultCache, Task, Workflow
+from workflow.tests.factories import SpaceFactory, UserFactory, WorkflowTemplateFactory
+from workflow.tests.test_plan import make_template_data
+
+from .base import BaseTestCase
+
+
+class CallMemoizedTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.user = UserFactory()
+        data = make_template_data()
+        data["workflow"]["nodes"][0]["data"]["memoize"] = {"ttl": 60}
+        template = WorkflowTemplateFactory(space=self.space, owner=self.user, data=data)
+        self.workflow = Workflow.objects.create(
+            space=self.space,
+            owner=self.user,
+            status=Workflow.STATUS_PROGRESS,
+            workflow_template=template,
+        )
+        self.calls = []
+
+    def main(self, base_task, *args, **kwargs):
+        self.calls.append(kwargs)
+        return {"rate": 1.1}
+
+    def run_node(self, node_id, payload):
+        task = Task.objects.create(workflow=self.workflow, space=self.space, node_id=node_id, name=node_id)
+        result = call_memoized(SimpleNamespace(task=task), self.main, (), {"payload": payload}, source="source")
+        task.refresh_from_db()
+        return result, task.cache_status
+
+    def test_hit(self):
+        self.assertEqual(self.run_node("a", {"date": "2024-01-01"}), ({"rate": 1.1}, Task.CACHE_MISS))
+        self.assertEqual(self.run_node("a", {"date": "2024-01-01"}), ({"rate": 1.1}, Task.CACHE_HIT))
+        self.assertEqual(len(self.calls), 1)
+
+    def test_different_inputs(self):
+        self.run_node("a", {"date": "2024-01-01"})
+
+        self.assertEqual(self.run_node("a", {"date": "2024-01-02"})[1], Task.CACHE_MISS)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_node_without_memoize(self):
+        self.run_node("b", {})
+
+        self.assertEqual(self.run_node("b", {}), ({"rate": 1.1}, None))
+        self.assertEqual(len(self.calls), 2)
+        self.assertFalse(NodeResultCache.objects.exists())
+
+    @override_settings(WORKFLOW_MEMOIZE_MAX_ENTRIES=1)
+    def test_eviction(self):
+        self.run_node("a", {"date": "2024-01-01"})
+        self.run_node("a", {"date": "2024-01-02"})
+
+        self.assertEqual(NodeResultCache.objects.count(), 1)
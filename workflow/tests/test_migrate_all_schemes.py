@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from workflow.management.commands.migrate_all_schemes import get_applied_migrations, get_pending_schemas
+
+
+class MigrateAllSchemesTestCase(SimpleTestCase):
+    @mock.patch("workflow.management.commands.migrate_all_schemes.connection")
+    def test_applied_migrations_are_read_in_one_query(self, connection):
+        connection.ops.quote_name = lambda name: f'"{name}"'
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [
+            [("space00000",), ("space00001",)],
+            [("space00000", "workflow", "0001_initial"), ("space00001", "auth", "0001_initial")],
+        ]
+
+        applied = get_applied_migrations(["space00000", "space00001", "space00002"])
+
+        self.assertEqual(
+            applied,
+            {
+                "space00000": {("workflow", "0001_initial")},
+                "space00001": {("auth", "0001_initial")},
+                "space00002": set(),
+            },
+        )
+        sql, params = cursor.execute.call_args.args
+        self.assertEqual(sql.count("UNION ALL"), 1)
+        self.assertEqual(params, ["space00000", "space00001"])
+
+    @mock.patch("workflow.management.commands.migrate_all_schemes.get_applied_migrations")
+    @mock.patch("workflow.management.commands.migrate_all_schemes.MigrationLoader")
+    def test_up_to_date_schemas_are_skipped(self, loader, get_applied_migrations):
+        loader.return_value.graph.nodes = {("workflow", "0001_initial"): None, ("workflow", "0002_task"): None}
+        get_applied_migrations.return_value = {
+            "space00000": {("workflow", "0001_initial"), ("workflow", "0002_task")},
+            "space00001": {("workflow", "0001_initial")},
+            "space00002": set(),
+        }
+
+        pending = get_pending_schemas(["space00000", "space00001", "space00002"])
+
+        self.assertEqual(pending, ["space00001", "space00002"])
+
+    @mock.patch("workflow.management.commands.migrate_all_schemes.ProcessPoolExecutor", ThreadPoolExecutor)
+    @mock.patch("workflow.management.commands.migrate_all_schemes.connections")
+    @mock.patch("workflow.management.commands.migrate_all_schemes.migrate_schema_in_worker")
+    @mock.patch("workflow.management.commands.migrate_all_schemes.migrate_schema")
+    @mock.patch("workflow.management.commands.migrate_all_schemes.get_pending_schemas")
+    @mock.patch("workflow.management.commands.migrate_all_schemes.get_all_tenant_schemas")
+    def test_public_is_migrated_before_tenants(
+        self, get_all_tenant_schemas, get_pending_schemas, migrate_schema, migrate_schema_in_worker, connections
+    ):
+        migrated = []
+        get_all_tenant_schemas.return_value = ["public", "space00000", "space00001"]
+        get_pending_schemas.return_value = ["public", "space00000", "space00001"]
+        migrate_schema.side_effect = lambda schema, args, options: migrated.append(schema) or ""
+        migrate_schema_in_worker.side_effect = lambda schema, args, options: migrated.append(schema) or ""
+
+        call_command("migrate_all_schemes", workers=2, stdout=StringIO())
+
+        migrate_schema.assert_called_once()
+        self.assertEqual(migrated[0], "public")
+        self.assertEqual(sorted(migrated[1:]), ["space00000", "space00001"])
@@ -0,0 +1,127 @@
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from workflow.exceptions import TooManyStreams
+from workflow.notifications import MAX_PAYLOAD_SIZE, ProgressListener, format_sse, notify_progress, progress_channel
+from workflow.tasks.base import BaseTask
+
+
+def make_task(progress):
+    return SimpleNamespace(
+        id=7,
+        workflow_id=3,
+        status="progress",
+        progress=progress,
+        progress_data=progress,
+        space=SimpleNamespace(space_code="space00000"),
+    )
+
+
+class NotifyProgressTestCase(SimpleTestCase):
+    def notify(self, task):
+        with mock.patch("workflow.notifications.connection") as connection:
+            notify_progress(task)
+        cursor = connection.cursor.return_value.__enter__.return_value
+        channel, payload = cursor.execute.call_args.args[1]
+        self.assertEqual(channel, progress_channel("space00000"))
+        return json.loads(payload)
+
+    def test_payload(self):
+        event = self.notify(make_task({"current": 1, "total": 10}))
+
+        self.assertEqual(event["workflow_id"], 3)
+        self.assertEqual(event["space_code"], "space00000")
+        self.assertEqual(event["progress"], {"current": 1, "total": 10})
+
+    def test_large_progress_is_not_pushed(self):
+        event = self.notify(make_task({"description": "x" * MAX_PAYLOAD_SIZE}))
+
+        self.assertIsNone(event["progress"])
+        self.assertTrue(event["truncated"])
+
+    def test_channel_per_space(self):
+        self.assertNotEqual(progress_channel("space00000"), progress_channel("space00001"))
+
+    def test_format_sse(self):
+        self.assertEqual(format_sse(None), ": heartbeat\n\n")
+        self.assertEqual(
+            format_sse({"task_id": 7, "progress": {"current": 1}}),
+            'event: progress\nid: 7\ndata: {"task_id": 7, "progress": {"current": 1}}\n\n',
+        )
+
+
+@override_settings(WORKFLOW_EVENTS_MAX_STREAMS=2, WORKFLOW_EVENTS_HEARTBEAT=15)
+@mock.patch.object(ProgressListener, "_start_listener")
+class ProgressListenerTestCase(SimpleTestCase):
+    def setUp(self):
+        self.listener = ProgressListener()
+
+    def test_events_are_fanned_out(self, _):
+        stream = self.listener.open("space00000", 3, timeout=0.05)
+        other = self.listener.open("space00001", 3, timeout=0.05)
+
+        self.assertEqual(self.listener.channels(), {progress_channel("space00000"), progress_channel("space00001")})
+
+        self.listener.publish({"space_code": "space00000", "workflow_id": 3, "task_id": 7})
+        self.listener.publish({"space_code": "space00000", "workflow_id": 4, "task_id": 8})
+
+        self.assertEqual(
+            list(stream),
+            [format_sse({"space_code": "space00000", "workflow_id": 3, "task_id": 7}), format_sse(None)],
+        )
+        self.assertEqual(list(other), [format_sse(None)])
+
+    def test_open_streams_are_capped(self, _):
+        first = self.listener.open("space00000", 3)
+        self.listener.open("space00000", 4)
+
+        with self.assertRaises(TooManyStreams):
+            self.listener.open("space00000", 5)
+
+        first.close()
+        self.listener.open("space00000", 5)
+
+    def test_closed_stream_is_not_listened(self, _):
+        stream = self.listener.open("space00000", 3)
+        stream.close()
+
+        self.assertEqual(self.listener.channels(), set())
+
+
+@override_settings(WORKFLOW_PROGRESS_FLUSH_INTERVAL=500)
+@mock.patch("workflow.tasks.base.notify_progress")
+@mock.patch("workflow.tasks.base.Task")
+class CoalescedProgressTestCase(SimpleTestCase):
+    def setUp(self):
+        self.base_task = BaseTask()
+        self.base_task.task = SimpleNamespace(id=7, progress=None, progress_data=None)
+        self.base_task.progress_pending = False
+        self.base_task.progress_flushed_at = 0
+
+    def update(self, progress, at):
+        with mock.patch("workflow.tasks.base.time.monotonic", return_value=at):
+            self.base_task.update_progress(progress)
+
+    def test_updates_are_coalesced(self, task_model, notify):
+        self.update({"current": 1}, at=100.0)
+        self.update({"current": 2}, at=100.1)
+        self.update({"current": 3}, at=100.2)
+
+        self.assertEqual(task_model.objects.filter.return_value.update.call_count, 1)
+        self.assertEqual(notify.call_count, 1)
+        self.assertTrue(self.base_task.progress_pending)
+
+        self.update({"current": 4}, at=100.6)
+
+        self.assertEqual(task_model.objects.filter.return_value.update.call_count, 2)
+        self.assertEqual(self.base_task.task.progress, {"current": 4})
+        self.assertFalse(self.base_task.progress_pending)
+
+    def test_flush_without_pending_progress(self, task_model, notify):
+        self.base_task.flush_progress()
+
+        task_model.objects.filter.assert_not_called()
+        notify.assert_not_called()
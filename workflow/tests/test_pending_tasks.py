@@ -0,0 +1,45 @@
+from workflow.models import Task, Workflow
+from workflow.tests.factories import SpaceFactory, UserFactory
+
+from .base import BaseTestCase
+
+
+class CompletePendingTaskTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.workflow = Workflow.objects.create(
+            space=self.space,
+            owner=UserFactory(),
+            status=Workflow.STATUS_PROGRESS,
+            pending_tasks=2,
+        )
+
+    def test_last_task_completes_the_run(self):
+        self.workflow.complete_pending_task()
+        self.workflow.refresh_from_db()
+
+        self.assertEqual((self.workflow.pending_tasks, self.workflow.status), (1, Workflow.STATUS_PROGRESS))
+
+        self.workflow.complete_pending_task()
+        self.workflow.refresh_from_db()
+
+        self.assertEqual((self.workflow.pending_tasks, self.workflow.status), (0, Workflow.STATUS_SUCCESS))
+
+    def test_failed_run_stays_failed(self):
+        Workflow.objects.filter(id=self.workflow.id).update(status=Workflow.STATUS_ERROR)
+
+        self.workflow.complete_pending_task()
+        self.workflow.complete_pending_task()
+        self.workflow.refresh_from_db()
+
+        self.assertEqual(self.workflow.status, Workflow.STATUS_ERROR)
+
+    def test_task_success_counts(self):
+        task = Task.objects.create(workflow=self.workflow, space=self.space, status=Task.STATUS_PROGRESS)
+        hook = Task.objects.create(workflow=self.workflow, space=self.space, status=Task.STATUS_PROGRESS, is_hook=True)
+
+        hook.handle_task_success({"ok": True})
+        task.handle_task_success({"ok": True})
+        self.workflow.refresh_from_db()
+
+        self.assertEqual(self.workflow.pending_tasks, 1)
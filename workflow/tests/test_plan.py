@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from workflow.plan import WorkflowPlan, clear_workflow_plan_cache, get_workflow_plan
+
+
+def make_node(node_id, node_type="workflow", inputs=("in",)):
+    node = {
+        "id": node_id,
+        "name": node_id,
+        "inputs": {name: {} for name in inputs},
+        "data": {"node": {"type": node_type}},
+    }
+    if node_type == "workflow":
+        node["data"]["workflow"] = {"user_code": f"com.finmars.test:{node_id}"}
+    else:
+        node["data"]["source_code"] = "def main(self, *args, **kwargs):\n    return {'result': True}\n"
+    return node
+
+
+def make_connection(source, target, source_output="out", target_input="in"):
+    return {"source": source, "target": target, "sourceOutput": source_output, "targetInput": target_input}
+
+
+def make_template_data():
+    return {
+        "version": "2",
+        "workflow": {
+            "nodes": [
+                make_node("a", inputs=()),
+                make_node("b"),
+                make_node("check", node_type="condition"),
+                make_node("yes", node_type="source_code"),
+                make_node("no", node_type="source_code"),
+                make_node("join", inputs=("in", "payload_input")),
+            ],
+            "connections": [
+                make_connection("a", "b"),
+                make_connection("a", "check"),
+                make_connection("check", "yes", source_output="out_true"),
+                make_connection("check", "no", source_output="out_false"),
+                make_connection("b", "join", target_input="payload_input"),
+                make_connection("yes", "join"),
+            ],
+        },
+    }
+
+
+class WorkflowPlanTestCase(SimpleTestCase):
+    def setUp(self):
+        self.plan = WorkflowPlan.from_template_data(make_template_data())
+
+    def test_adjacency(self):
+        self.assertEqual(self.plan.adjacency_list["a"], ["b", "check"])
+        self.assertEqual(self.plan.adjacency_list["join"], [])
+        self.assertEqual(self.plan.reverse_adjacency_list["join"], ["b", "yes"])
+
+    def test_start_nodes(self):
+        self.assertEqual(self.plan.start_nodes, ["a"])
+
+    def test_inputs(self):
+        self.assertEqual(self.plan.get_input_source("join", "in"), "yes")
+        self.assertEqual(self.plan.get_input_source("join", "payload_input"), "b")
+        self.assertIsNone(self.plan.get_input_source("a", "in"))
+
+    def test_join_nodes(self):
+        self.assertEqual(self.plan.join_nodes, {"join": 2})
+
+    def test_levels(self):
+        self.assertEqual(self.plan.levels, {"a": 0, "b": 1, "check": 1, "yes": 2, "no": 2, "join": 3})
+
+    def test_task_name(self):
+        self.assertEqual(self.plan.get_task_name("b"), "com.finmars.test:b")
+        self.assertEqual(self.plan.get_task_name("check"), "condition")
+        self.assertEqual(self.plan.get_task_name("yes"), "custom_code")
+
+    def test_next_node_ids(self):
+        self.assertEqual(self.plan.get_next_node_ids("a", {}), ["b", "check"])
+        self.assertEqual(self.plan.get_next_node_ids("check", {"result": True}), ["yes"])
+        self.assertEqual(self.plan.get_next_node_ids("check", {"result": False}), ["no"])
+
+    def test_version(self):
+        self.assertEqual(self.plan.version, WorkflowPlan.from_template_data(make_template_data()).version)
+
+        data = make_template_data()
+        data["workflow"]["connections"].append(make_connection("no", "join"))
+        self.assertNotEqual(self.plan.version, WorkflowPlan.from_template_data(data).version)
+
+    def test_critical_path(self):
+        start = datetime(2024, 1, 1)
+        finished_at = {
+            node_id: start + timedelta(seconds=offset)
+            for node_id, offset in (("a", 1), ("b", 50), ("check", 2), ("yes", 3), ("join", 60))
+        }
+
+        self.assertEqual(self.plan.get_critical_path(finished_at), ["a", "b", "join"])
+        self.assertEqual(self.plan.get_critical_path({}), [])
+
+    def test_next_node_ids_wrong_condition_result(self):
+        with self.assertRaisesMessage(Exception, "Wrong condition_result"):
+            self.plan.get_next_node_ids("check", {"value": True})
+
+
+class WorkflowPlanFusionTestCase(SimpleTestCase):
+    def setUp(self):
+        data = make_template_data()
+        for node in data["workflow"]["nodes"]:
+            node["data"]["fusible"] = node["id"] != "b"
+        self.plan = WorkflowPlan.from_template_data(data)
+
+    def test_fused_edges(self):
+        # "a" has two successors, "join" has two inputs, "b" is not fusible
+        self.assertEqual(self.plan.fused_edges, {"check": {"yes", "no"}})
+
+    def test_fused_next_node_id(self):
+        self.assertEqual(self.plan.get_fused_next_node_id("check", {"result": True}), "yes")
+        self.assertEqual(self.plan.get_fused_next_node_id("check", {"result": False}), "no")
+        self.assertIsNone(self.plan.get_fused_next_node_id("a", {}))
+        self.assertIsNone(self.plan.get_fused_next_node_id("yes", {}))
+
+    def test_linear_chain(self):
+        data = make_template_data()
+        data["workflow"]["nodes"] = [make_node(node_id) for node_id in ("a", "b", "c")]
+        data["workflow"]["connections"] = [make_connection("a", "b"), make_connection("b", "c")]
+        for node in data["workflow"]["nodes"]:
+            node["data"]["fusible"] = True
+        plan = WorkflowPlan.from_template_data(data)
+
+        self.assertEqual(plan.fused_edges, {"a": {"b"}, "b": {"c"}})
+
+        data["workflow"]["nodes"][1]["data"]["queue"] = "big-memory"
+        plan = WorkflowPlan.from_template_data(data)
+
+        self.assertEqual(plan.get_node_queue("b"), "big-memory")
+        self.assertIsNone(plan.get_node_queue("a"))
+        self.assertEqual(plan.fused_edges, {})
+
+
+class WorkflowPlanCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        clear_workflow_plan_cache()
+        self.template = SimpleNamespace(id=1, modified_at=datetime(2024, 1, 1), data=make_template_data())
+
+    def tearDown(self):
+        clear_workflow_plan_cache()
+
+    def test_plan_is_reused(self):
+        plan = get_workflow_plan(self.template, "space00000")
+        self.assertIs(plan, get_workflow_plan(self.template, "space00000"))
+
+    def test_plan_is_rebuilt_for_new_version(self):
+        plan = get_workflow_plan(self.template, "space00000")
+        self.template.modified_at += timedelta(seconds=1)
+        self.assertIsNot(plan, get_workflow_plan(self.template, "space00000"))
+
+    def test_plan_is_scoped_by_space(self):
+        plan = get_workflow_plan(self.template, "space00000")
+        self.assertIsNot(plan, get_workflow_plan(self.template, "space00001"))
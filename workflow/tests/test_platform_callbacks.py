@@ -0,0 +1,117 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import override_settings
+
+from workflow.models import PlatformCallback, Space, Task, Workflow
+from workflow.tasks.callbacks import deliver_platform_callbacks, relay_platform_callbacks
+from workflow.tests.factories import SpaceFactory, UserFactory
+
+from .base import BaseTestCase
+
+
+@patch("workflow.tasks.callbacks.deliver_platform_callbacks.apply_async")
+class PlatformCallbackOutboxTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.workflow = Workflow.objects.create(
+            space=self.space,
+            owner=UserFactory(),
+            status=Workflow.STATUS_PROGRESS,
+            platform_task_id=42,
+        )
+
+    def test_terminal_status_is_queued_once(self, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.workflow.status = Workflow.STATUS_SUCCESS
+            self.workflow.save()
+            self.workflow.save()
+
+        callback = PlatformCallback.objects.get()
+        self.assertEqual((callback.platform_task_id, callback.status), (42, Workflow.STATUS_SUCCESS))
+        apply_async.assert_called_once()
+
+    def test_running_status_is_not_queued(self, apply_async):
+        self.workflow.save()
+
+        self.assertFalse(PlatformCallback.objects.exists())
+
+
+@override_settings(WORKFLOW_CALLBACK_MAX_ATTEMPTS=2)
+@patch("workflow.tasks.callbacks.set_schema_from_context")
+@patch("workflow.tasks.callbacks.get_base_path", return_value="https://finmars")
+@patch("workflow.tasks.callbacks.get_refresh_token")
+@patch("workflow.tasks.callbacks.post_task_status")
+@patch("workflow.tasks.callbacks.deliver_platform_callbacks.apply_async")
+class DeliverPlatformCallbacksTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        with patch("workflow.tasks.callbacks.deliver_platform_callbacks.apply_async"):
+            self.workflow = Workflow.objects.create(
+                space=self.space,
+                owner=UserFactory(),
+                status=Workflow.STATUS_ERROR,
+                platform_task_id=42,
+            )
+        Task.objects.create(
+            workflow=self.workflow,
+            space=self.space,
+            status=Task.STATUS_ERROR,
+            error_message="boom",
+        )
+        self.context = {"realm_code": self.space.realm_code, "space_code": self.space.space_code}
+
+    def test_delivered(self, apply_async, post_task_status, *args):
+        deliver_platform_callbacks.run(context=self.context)
+
+        post_task_status.assert_called_once_with(
+            post_task_status.call_args.args[0], "https://finmars", 42, Workflow.STATUS_ERROR, error="boom"
+        )
+        self.assertEqual(PlatformCallback.objects.get().state, PlatformCallback.STATE_DELIVERED)
+        apply_async.assert_not_called()
+
+    def test_retried_then_failed(self, apply_async, post_task_status, *args):
+        post_task_status.return_value = MagicMock(**{"raise_for_status.side_effect": Exception("502")})
+
+        deliver_platform_callbacks.run(context=self.context)
+
+        callback = PlatformCallback.objects.get()
+        self.assertEqual((callback.state, callback.attempts, callback.last_error), ("pending", 1, "502"))
+        apply_async.assert_called_once()
+
+        PlatformCallback.objects.update(next_attempt_at=callback.created_at)
+        deliver_platform_callbacks.run(context=self.context)
+
+        self.assertEqual(PlatformCallback.objects.get().state, PlatformCallback.STATE_FAILED)
+
+
+@patch("workflow.tasks.callbacks.set_search_path")
+@patch("workflow.tasks.callbacks.schema_registry")
+@patch("workflow.tasks.callbacks.deliver_platform_callbacks.apply_async")
+class RelayPlatformCallbacksTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        with patch("workflow.tasks.callbacks.deliver_platform_callbacks.apply_async"):
+            self.workflow = Workflow.objects.create(
+                space=self.space,
+                owner=UserFactory(),
+                status=Workflow.STATUS_SUCCESS,
+                platform_task_id=42,
+            )
+
+    def test_due_callbacks_are_relayed(self, apply_async, schema_registry, set_search_path):
+        schema_registry.all.return_value = {"public", self.space.space_code}
+
+        relay_platform_callbacks()
+
+        set_search_path.assert_any_call(self.space.space_code)
+        self.assertEqual(
+            apply_async.call_args.kwargs["kwargs"]["context"]["space_code"], Space.objects.first().space_code
+        )
+
+    def test_claimed_callbacks_are_not_relayed(self, apply_async, schema_registry, set_search_path):
+        schema_registry.all.return_value = {self.space.space_code}
+        PlatformCallback.objects.claim(10)
+
+        relay_platform_callbacks()
+
+        apply_async.assert_not_called()
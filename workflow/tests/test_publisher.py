@@ -0,0 +1,78 @@
+import time
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+
+from amqp.exceptions import MessageNacked
+from django.test import SimpleTestCase
+
+from workflow.exceptions import PublishTimeout
+from workflow.publisher import _publish_confirmed, supports_batched_confirms
+
+
+class FakeChannel:
+    def __init__(self, acks):
+        self.events = defaultdict(set)
+        self.acks = list(acks)
+        self.published = 0
+        self.waits = 0
+
+    def _basic_publish(self, *args, **kwargs):
+        self.published += 1
+
+    def basic_publish(self, *args, **kwargs):
+        raise AssertionError("publish must not wait for a confirm per message")
+
+    def confirm_select(self):
+        pass
+
+    def wait(self, methods, timeout=None):
+        self.waits += 1
+        if not self.acks:
+            # the broker never answers
+            time.sleep(timeout)
+            raise TimeoutError()
+        event, delivery_tag, multiple = self.acks.pop(0)
+        for callback in self.events[event]:
+            callback(delivery_tag, multiple)
+
+
+@patch("workflow.publisher.celery_app")
+class PublishConfirmedTestCase(SimpleTestCase):
+    def make_signatures(self, channel, count):
+        signature = MagicMock()
+        signature.apply_async.side_effect = lambda producer: channel.basic_publish()
+        return [signature] * count
+
+    def test_single_confirm_round(self, celery_app):
+        channel = FakeChannel([("basic_ack", 3, True)])
+
+        _publish_confirmed(channel, self.make_signatures(channel, 3))
+
+        self.assertEqual(channel.published, 3)
+        self.assertEqual(channel.waits, 1)
+
+    def test_separate_acks(self, celery_app):
+        channel = FakeChannel([("basic_ack", 2, False), ("basic_ack", 1, False)])
+
+        _publish_confirmed(channel, self.make_signatures(channel, 2))
+
+        self.assertEqual(channel.waits, 2)
+
+    def test_nack(self, celery_app):
+        channel = FakeChannel([("basic_nack", 1, False)])
+
+        with self.assertRaises(MessageNacked):
+            _publish_confirmed(channel, self.make_signatures(channel, 2))
+
+    def test_unconfirmed_batch_times_out(self, celery_app):
+        channel = FakeChannel([("basic_ack", 1, False)])
+
+        with self.assertRaises(PublishTimeout):
+            _publish_confirmed(channel, self.make_signatures(channel, 2), timeout=0.05)
+
+    def test_installed_amqp_is_supported(self, celery_app):
+        self.assertTrue(supports_batched_confirms())
+
+    @patch("workflow.publisher.amqp.version_info", (6, 0, 0))
+    def test_unchecked_amqp_is_not_supported(self, celery_app):
+        self.assertFalse(supports_batched_confirms())
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+
+from workflow.models import Task, Workflow
+from workflow.tests.factories import SpaceFactory, UserFactory
+from workflow.utils import QUEUE_SLOT_TABLE, release_queue_slot, reserve_queue_slot
+
+from .base import BaseTestCase
+
+
+@override_settings(WORKFLOW_QUEUE_CONCURRENCY={"big-memory": 2})
+class ReserveQueueSlotTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.workflow = Workflow.objects.create(space=self.space, owner=UserFactory(), status=Workflow.STATUS_PROGRESS)
+
+    def create_task(self, status=Task.STATUS_INIT, queue="big-memory"):
+        return Task.objects.create(workflow=self.workflow, space=self.space, queue=queue, status=status)
+
+    def add_slot(self, schema, task_id, queue="big-memory"):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {QUEUE_SLOT_TABLE} (queue, schema_name, task_id) VALUES (%s, %s, %s)",
+                [queue, schema, task_id],
+            )
+
+    def test_unlimited_queue(self):
+        self.assertTrue(reserve_queue_slot("pricing", self.create_task(queue="pricing")))
+
+    def test_limit(self):
+        self.assertTrue(reserve_queue_slot("big-memory", self.create_task()))
+        self.assertTrue(reserve_queue_slot("big-memory", self.create_task()))
+
+        self.assertFalse(reserve_queue_slot("big-memory", self.create_task()))
+
+    def test_limit_is_shared_by_spaces(self):
+        # a running task of another space holds a slot
+        self.add_slot("space00001", 1)
+
+        with mock.patch("workflow.utils.is_queue_slot_in_use", return_value=True):
+            self.assertTrue(reserve_queue_slot("big-memory", self.create_task()))
+            self.assertFalse(reserve_queue_slot("big-memory", self.create_task()))
+
+    def test_retrying_task_holds_its_slot(self):
+        first = self.create_task()
+        reserve_queue_slot("big-memory", first)
+        reserve_queue_slot("big-memory", self.create_task())
+        Task.objects.filter(id=first.id).update(status=Task.STATUS_RETRY)
+
+        self.assertFalse(reserve_queue_slot("big-memory", self.create_task()))
+
+    def test_slot_of_dropped_schema_is_free(self):
+        self.add_slot("space_dropped", 1)
+        self.add_slot("space_dropped", 2)
+
+        self.assertTrue(reserve_queue_slot("big-memory", self.create_task()))
+
+    def test_released_and_stale_slots_are_free(self):
+        first = self.create_task()
+        second = self.create_task()
+        reserve_queue_slot("big-memory", first)
+        reserve_queue_slot("big-memory", second)
+
+        release_queue_slot(first)
+        self.assertTrue(reserve_queue_slot("big-memory", self.create_task()))
+
+        # finished without releasing its slot
+        Task.objects.filter(id=second.id).update(status=Task.STATUS_SUCCESS)
+        self.assertTrue(reserve_queue_slot("big-memory", self.create_task()))
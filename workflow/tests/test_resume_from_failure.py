@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from workflow.models import Space, Task, User, Workflow
+from workflow.plan import WorkflowPlan
+from workflow.tests.factories import WorkflowTemplateFactory
+from workflow.tests.test_plan import make_template_data
+from workflow.workflows import get_resume_frontier
+
+from .base import BaseTestCase
+
+
+class ResumeFrontierTestCase(SimpleTestCase):
+    def setUp(self):
+        self.plan = WorkflowPlan.from_template_data(make_template_data())
+
+    def test_nothing_finished(self):
+        self.assertEqual(get_resume_frontier(self.plan, {}), ["a"])
+
+    def test_failed_branch(self):
+        finished = {"a": None, "check": {"result": True}}
+
+        self.assertEqual(get_resume_frontier(self.plan, finished), ["b", "yes"])
+
+    def test_join_waits_for_all_inputs(self):
+        finished = {"a": None, "b": None, "check": {"result": True}}
+
+        self.assertEqual(get_resume_frontier(self.plan, finished), ["yes"])
+
+        finished["yes"] = None
+
+        self.assertEqual(get_resume_frontier(self.plan, finished), ["join"])
+
+
+class ResumeFromFailureViewTestCase(BaseTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.realm_code = f"realm{self.random_string(5)}"
+        self.space_code = f"space{self.random_string(5)}"
+        self.url_prefix = f"/{self.realm_code}/{self.space_code}/workflow/api/workflow/"
+        self.space = Space.objects.create(realm_code=self.realm_code, space_code=self.space_code)
+        self.user = User.objects.create(
+            username=self.random_string(5),
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.client.force_authenticate(self.user)
+
+        template = WorkflowTemplateFactory(space=self.space, owner=self.user, data=make_template_data())
+        self.workflow = Workflow.objects.create(
+            space=self.space,
+            owner=self.user,
+            user_code="workflow",
+            status=Workflow.STATUS_ERROR,
+            workflow_template=template,
+        )
+        for node_id, status in (("a", Task.STATUS_SUCCESS), ("b", Task.STATUS_ERROR)):
+            task = Task.objects.create(workflow=self.workflow, space=self.space, node_id=node_id, status=status)
+            task.result = {"node": node_id}
+            task.save()
+
+    @patch("workflow.workflows.dispatch_nodes")
+    def test_resume_from_failure(self, dispatch_nodes):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{self.url_prefix}{self.workflow.id}/resume-from-failure/")
+
+        self.assertEqual(response.status_code, 200)
+
+        resumed = Workflow.objects.get(id=response.data["id"])
+        self.assertEqual(resumed.resumed_from, self.workflow)
+        self.assertEqual(list(resumed.tasks.values_list("node_id", "status")), [("a", Task.STATUS_SUCCESS)])
+        self.assertEqual(resumed.tasks.get().result, {"node": "a"})
+        self.assertEqual(dispatch_nodes.call_args.args[1], ["b", "check"])
+
+    def test_running_workflow_is_rejected(self):
+        self.workflow.status = Workflow.STATUS_PROGRESS
+        self.workflow.save()
+
+        response = self.client.post(f"{self.url_prefix}{self.workflow.id}/resume-from-failure/")
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from celery.exceptions import Ignore
+from django.test import SimpleTestCase
+from django.utils.timezone import now
+from requests.exceptions import ConnectionError, HTTPError
+
+from workflow.models import Task, Workflow
+from workflow.retry import get_backoff, is_retryable, retry_workflow_step
+from workflow.tests.factories import SpaceFactory, UserFactory, WorkflowTemplateFactory
+from workflow.tests.test_plan import make_template_data
+
+from .base import BaseTestCase
+
+
+def make_policy(**kwargs):
+    policy = {"max_attempts": 3, "backoff": 2, "max_backoff": 10, "jitter": False, "exceptions": []}
+    policy.update(kwargs)
+    return policy
+
+
+class RetryPolicyTestCase(SimpleTestCase):
+    def test_backoff(self):
+        policy = make_policy()
+        self.assertEqual([get_backoff(policy, attempt) for attempt in (1, 2, 3, 4)], [2, 4, 8, 10])
+
+    def test_jitter(self):
+        delay = get_backoff(make_policy(jitter=True), 3)
+        self.assertTrue(0 <= delay <= 8)
+
+    def test_retryable_exceptions(self):
+        self.assertTrue(is_retryable(make_policy(), ValueError()))
+
+        policy = make_policy(exceptions=["requests.exceptions.ConnectionError", "TimeoutError"])
+        self.assertTrue(is_retryable(policy, ConnectionError()))
+        self.assertTrue(is_retryable(policy, TimeoutError()))
+        self.assertFalse(is_retryable(policy, HTTPError()))
+
+        # subclasses match
+        self.assertTrue(is_retryable(make_policy(exceptions=["OSError"]), TimeoutError()))
+
+
+class RetryWorkflowStepTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.user = UserFactory()
+        data = make_template_data()
+        data["workflow"]["nodes"][0]["data"]["retry"] = {"max_attempts": 2, "jitter": False}
+        template = WorkflowTemplateFactory(space=self.space, owner=self.user, data=data)
+        self.workflow = Workflow.objects.create(
+            space=self.space,
+            owner=self.user,
+            status=Workflow.STATUS_PROGRESS,
+            workflow_template=template,
+        )
+
+    def make_base_task(self, node_id):
+        task = Task.objects.create(
+            workflow=self.workflow,
+            space=self.space,
+            node_id=node_id,
+            celery_task_id=self.random_string(10),
+            status=Task.STATUS_PROGRESS,
+            started_at=now(),
+        )
+        base_task = mock.Mock()
+        base_task.task = task
+        base_task.request.id = task.celery_task_id
+        base_task.request.is_eager = True
+        return base_task
+
+    def test_eager_retry(self):
+        base_task = self.make_base_task("a")
+
+        with self.assertRaises(Ignore):
+            retry_workflow_step(base_task, ValueError("boom"), (), {"payload": {}})
+
+        base_task.apply_async.assert_called_once_with(
+            args=(), kwargs={"payload": {}}, task_id=base_task.task.celery_task_id, countdown=2, queue="workflow"
+        )
+
+        task = Task.objects.get(id=base_task.task.id)
+        self.assertEqual((task.status, task.attempts), (Task.STATUS_RETRY, 2))
+        self.assertEqual(task.attempt_history[0]["error"], "ValueError: boom")
+
+    def test_retries_exhausted(self):
+        base_task = self.make_base_task("a")
+        Task.objects.filter(id=base_task.task.id).update(attempts=2)
+        base_task.task.refresh_from_db()
+
+        retry_workflow_step(base_task, ValueError("boom"), (), {})
+
+        base_task.apply_async.assert_not_called()
+        self.assertEqual(Task.objects.get(id=base_task.task.id).status, Task.STATUS_PROGRESS)
+
+    def test_node_without_policy(self):
+        base_task = self.make_base_task("b")
+
+        retry_workflow_step(base_task, ValueError("boom"), (), {})
+
+        base_task.apply_async.assert_not_called()
@@ -0,0 +1,65 @@
+from datetime import datetime
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from workflow.schedulers import DatabaseScheduler
+
+T1 = datetime(2024, 1, 1, 10, 0)
+T2 = datetime(2024, 1, 1, 10, 5)
+
+
+@mock.patch("workflow.schedulers.set_schema_from_context")
+@mock.patch("workflow.schedulers.get_schedule_index")
+class DatabaseSchedulerTestCase(SimpleTestCase):
+    def setUp(self):
+        # skip the celery scheduler setup, only the schedule loading is tested
+        self.scheduler = DatabaseScheduler.__new__(DatabaseScheduler)
+        self.scheduler.app = mock.Mock()
+        self.scheduler.Entry = mock.Mock(side_effect=lambda model, app, schema: mock.Mock(schema=schema, static=False))
+        self.scheduler.Model = mock.Mock()
+        model = mock.Mock()
+        model.name = "periodic"
+        self.scheduler.Model.objects.enabled.return_value = [model]
+
+    def load(self):
+        self.scheduler._schedule = self.scheduler.all_as_schedule()
+        return self.scheduler._schedule
+
+    def test_only_changed_schemas_are_reloaded(self, get_schedule_index, set_schema_from_context):
+        get_schedule_index.return_value = {"space00000": (1, T1), "space00001": (1, T1), "space00002": (0, T1)}
+        schedule = self.load()
+
+        self.assertEqual(set(schedule), {"space00000:periodic", "space00001:periodic"})
+        self.assertEqual(set_schema_from_context.call_count, 2)
+        self.assertFalse(self.scheduler.schedule_changed())
+
+        get_schedule_index.return_value = {"space00000": (1, T1), "space00001": (1, T2), "space00002": (0, T1)}
+        self.assertTrue(self.scheduler.schedule_changed())
+
+        set_schema_from_context.reset_mock()
+        unchanged = schedule["space00000:periodic"]
+        schedule = self.load()
+
+        set_schema_from_context.assert_called_once_with({"space_code": "space00001"})
+        self.assertIs(schedule["space00000:periodic"], unchanged)
+        self.assertIn("space00001:periodic", schedule)
+
+    def test_entries_of_removed_schemas_are_dropped(self, get_schedule_index, set_schema_from_context):
+        get_schedule_index.return_value = {"space00000": (1, T1), "space00001": (1, T1)}
+        self.load()
+
+        get_schedule_index.return_value = {"space00000": (1, T1)}
+        self.assertTrue(self.scheduler.schedule_changed())
+
+        self.assertEqual(set(self.load()), {"space00000:periodic"})
+
+    def test_static_entries_are_kept(self, get_schedule_index, set_schema_from_context):
+        get_schedule_index.return_value = {"space00000": (1, T1)}
+        self.load()
+        self.scheduler._schedule["relay-platform-callbacks"] = mock.Mock(static=True, schema="public")
+
+        get_schedule_index.return_value = {"space00000": (1, T2)}
+        self.assertTrue(self.scheduler.schedule_changed())
+
+        self.assertEqual(set(self.load()), {"space00000:periodic", "relay-platform-callbacks"})
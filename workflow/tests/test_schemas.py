@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from workflow.schemas import SchemaRegistry
+
+
+@override_settings(WORKFLOW_SCHEMA_REGISTRY_TTL=60, WORKFLOW_SCHEMA_LISTEN=False)
+@mock.patch("workflow.utils.get_all_tenant_schemas", return_value=["public", "space00000"])
+class SchemaRegistryTestCase(SimpleTestCase):
+    def setUp(self):
+        self.registry = SchemaRegistry()
+
+    def test_schemas_are_cached(self, get_all_tenant_schemas):
+        with mock.patch("workflow.schemas.time.monotonic", return_value=100):
+            self.assertTrue(self.registry.exists("space00000"))
+            self.assertTrue(self.registry.exists("public"))
+
+        get_all_tenant_schemas.assert_called_once()
+
+    def test_ttl(self, get_all_tenant_schemas):
+        with mock.patch("workflow.schemas.time.monotonic", return_value=100):
+            self.registry.all()
+        with mock.patch("workflow.schemas.time.monotonic", return_value=160):
+            self.registry.all()
+
+        self.assertEqual(get_all_tenant_schemas.call_count, 2)
+
+    def test_invalidate(self, get_all_tenant_schemas):
+        self.registry.all()
+        self.registry.invalidate()
+        self.registry.all()
+
+        self.assertEqual(get_all_tenant_schemas.call_count, 2)
+
+    def test_missing_schema_is_reloaded_at_most_every_second(self, get_all_tenant_schemas):
+        with mock.patch("workflow.schemas.time.monotonic", return_value=100):
+            self.assertFalse(self.registry.exists("space00001"))
+            self.assertFalse(self.registry.exists("space00001"))
+
+        self.assertEqual(get_all_tenant_schemas.call_count, 1)
+
+        get_all_tenant_schemas.return_value = ["public", "space00000", "space00001"]
+        with mock.patch("workflow.schemas.time.monotonic", return_value=101):
+            self.assertTrue(self.registry.exists("space00001"))
+
+    def test_invalidated_while_loading(self, get_all_tenant_schemas):
+        registry = self.registry
+
+        class InvalidatingLock:
+            # the listener thread invalidates right after reload() released the lock
+            def __enter__(self):
+                pass
+
+            def __exit__(self, *args):
+                registry._schemas = None
+
+        registry._lock = InvalidatingLock()
+
+        self.assertEqual(registry.all(), frozenset(["public", "space00000"]))
+        self.assertTrue(registry.exists("space00000"))
+        self.assertFalse(registry.exists("space00001"))
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from workflow.utils import reset_search_path, set_search_path
+
+
+class SetSearchPathTestCase(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch("workflow.utils.connection")
+        self.connection = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.connection.in_atomic_block = False
+        self.connection.connection = object()
+        self.connection.workflow_search_path = None
+        self.cursor = self.connection.cursor.return_value.__enter__.return_value
+
+    def test_set_once_per_connection(self):
+        set_search_path("space00000")
+        set_search_path("space00000")
+
+        self.cursor.execute.assert_called_once_with("SET search_path TO space00000;")
+        self.assertEqual(self.connection.workflow_search_path, "space00000")
+
+    def test_schema_change(self):
+        set_search_path("space00000")
+        set_search_path("public")
+
+        self.assertEqual(self.cursor.execute.call_count, 2)
+        self.assertEqual(self.connection.workflow_search_path, "public")
+
+    def test_always_set_in_transaction(self):
+        self.connection.in_atomic_block = True
+
+        set_search_path("space00000")
+        set_search_path("space00000")
+
+        self.assertEqual(self.cursor.execute.call_count, 2)
+        self.assertIsNone(self.connection.workflow_search_path)
+
+    def test_new_connection_is_reset(self):
+        set_search_path("space00000")
+        reset_search_path(None, self.connection)
+        set_search_path("space00000")
+
+        self.assertEqual(self.cursor.execute.call_count, 2)
+
+    def test_closed_connection_is_set_again(self):
+        set_search_path("space00000")
+        # closed by close_if_unusable_or_obsolete, reopened lazily by the next cursor
+        self.connection.connection = None
+        set_search_path("space00000")
+
+        self.assertEqual(self.cursor.execute.call_count, 2)
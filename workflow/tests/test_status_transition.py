@@ -0,0 +1,56 @@
+from workflow.models import PlatformCallback, Task, Workflow
+from workflow.tests.factories import SpaceFactory, UserFactory
+
+from .base import BaseTestCase
+
+
+class StatusTransitionTestCase(BaseTestCase):
+    def setUp(self):
+        self.space = SpaceFactory()
+        self.workflow = Workflow.objects.create(
+            space=self.space,
+            owner=UserFactory(),
+            status=Workflow.STATUS_PROGRESS,
+        )
+        self.task = Task.objects.create(workflow=self.workflow, space=self.space, status=Task.STATUS_INIT)
+
+    def test_transition(self):
+        self.assertTrue(self.task.transition((Task.STATUS_INIT,), Task.STATUS_PROGRESS, worker_name="worker"))
+        self.assertEqual(self.task.status, Task.STATUS_PROGRESS)
+
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.status, self.task.worker_name), (Task.STATUS_PROGRESS, "worker"))
+
+    def test_late_transition_is_rejected(self):
+        Task.objects.filter(id=self.task.id).update(status=Task.STATUS_CANCELED)
+
+        self.assertFalse(self.task.transition((Task.STATUS_INIT,), Task.STATUS_PROGRESS, worker_name="worker"))
+        self.assertEqual(self.task.status, Task.STATUS_INIT)
+
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.status, self.task.worker_name), (Task.STATUS_CANCELED, None))
+
+    def test_queryset_transition(self):
+        self.assertTrue(Task.objects.filter(id=self.task.id).transition((Task.STATUS_INIT,), Task.STATUS_PROGRESS))
+        self.assertFalse(Task.objects.filter(id=self.task.id).transition((Task.STATUS_INIT,), Task.STATUS_PROGRESS))
+
+    def test_duplicate_success_is_ignored(self):
+        self.task.status = Task.STATUS_PROGRESS
+        self.task.save()
+
+        self.task.handle_task_success({"value": 1})
+        self.task.handle_task_success({"value": 2})
+        self.task.refresh_from_db()
+
+        self.assertEqual((self.task.status, self.task.result), (Task.STATUS_SUCCESS, {"value": 1}))
+
+    def test_workflow_transition_enqueues_platform_callback(self):
+        self.workflow.platform_task_id = 42
+        self.workflow.save()
+
+        self.assertTrue(
+            self.workflow.transition((Workflow.STATUS_PROGRESS,), Workflow.STATUS_SUCCESS, pending_tasks=0)
+        )
+        self.assertTrue(
+            PlatformCallback.objects.filter(workflow=self.workflow, status=Workflow.STATUS_SUCCESS).exists()
+        )
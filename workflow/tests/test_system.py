@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from workflow.exceptions import WorkflowNotFound
+from workflow.system import SystemWorkflowManager
+
+
+@mock.patch("workflow.system.schema_exists", side_effect=lambda schema: schema.startswith("space"))
+class LazyLoadingTestCase(SimpleTestCase):
+    def setUp(self):
+        self.manager = SystemWorkflowManager()
+
+        def load(schema):
+            self.manager.workflows[f"{schema}.demo"] = {"workflow": {"user_code": "demo", "space_code": schema}}
+            return True
+
+        patcher = mock.patch.object(self.manager, "load_workflows_for_schema", side_effect=load)
+        self.load_workflows_for_schema = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_space_is_loaded_on_first_use(self, schema_exists):
+        self.assertEqual(self.manager.get_by_user_code("space00000.demo")["workflow"]["space_code"], "space00000")
+        self.manager.get_by_user_code("space00000.demo")
+
+        self.load_workflows_for_schema.assert_called_once_with("space00000")
+        self.assertEqual(self.manager.loaded_spaces, {"space00000"})
+
+    def test_space_workflows(self, schema_exists):
+        self.manager.get_by_user_code("space00001.demo")
+
+        self.assertEqual(list(self.manager.get_space_workflows("space00000")), ["space00000.demo"])
+
+    def test_unknown_schema_is_not_loaded(self, schema_exists):
+        with self.assertRaises(WorkflowNotFound):
+            self.manager.get_by_user_code("unknown.demo")
+
+        self.load_workflows_for_schema.assert_not_called()
+
+    def test_failed_load_is_retried(self, schema_exists):
+        self.load_workflows_for_schema.side_effect = [False, True]
+
+        self.manager.load_space("space00000")
+        self.assertEqual(self.manager.loaded_spaces, set())
+
+        self.manager.load_space("space00000")
+        self.assertEqual(self.manager.loaded_spaces, {"space00000"})
+        self.assertEqual(self.load_workflows_for_schema.call_count, 2)
+
+
+class LoadWorkflowsForSchemaTestCase(SimpleTestCase):
+    @mock.patch("workflow.system.Space")
+    def test_failed_load(self, space):
+        space.objects.raw.side_effect = Exception("connection lost")
+        manager = SystemWorkflowManager()
+
+        self.assertFalse(manager.load_workflows_for_schema("space00000"))
+        self.assertEqual(manager.workflows, {})
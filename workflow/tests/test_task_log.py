@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from workflow.models import Space, Task, TaskLogLine, User, Workflow
+from workflow.tasks.base import BaseTask
+
+from .base import BaseTestCase
+
+
+class TaskLogTestCase(BaseTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.realm_code = f"realm{self.random_string(5)}"
+        self.space_code = f"space{self.random_string(5)}"
+        self.url_prefix = f"/{self.realm_code}/{self.space_code}/workflow/api/task/"
+        self.space = Space.objects.create(realm_code=self.realm_code, space_code=self.space_code)
+        self.user = User.objects.create(
+            username=self.random_string(5),
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.client.force_authenticate(self.user)
+
+        self.workflow = Workflow.objects.create(space=self.space, owner=self.user, status=Workflow.STATUS_PROGRESS)
+        self.task = Task.objects.create(workflow=self.workflow, space=self.space, status=Task.STATUS_PROGRESS)
+
+    def make_base_task(self):
+        base_task = BaseTask()
+        base_task.task = self.task
+        base_task.log_buffer = []
+        base_task.log_line_number = TaskLogLine.objects.next_line_number(self.task.id)
+        base_task.log_flushed_at = 0
+        return base_task
+
+    @override_settings(WORKFLOW_LOG_BUFFER_SIZE=3, WORKFLOW_LOG_FLUSH_INTERVAL=3600)
+    def test_log_is_buffered(self):
+        base_task = self.make_base_task()
+
+        with mock.patch("workflow.tasks.base.time.monotonic", return_value=0):
+            base_task.log("one")
+            base_task.log("two")
+            self.assertFalse(TaskLogLine.objects.filter(task=self.task).exists())
+
+            base_task.log("three\nfour")
+
+        self.assertEqual(
+            list(TaskLogLine.objects.filter(task=self.task).values_list("line_number", "message")),
+            [(0, "one"), (1, "two"), (2, "three"), (3, "four")],
+        )
+
+    def test_snapshot_log(self):
+        base_task = self.make_base_task()
+        base_task.log("one")
+        base_task.log("two")
+        base_task.flush_log()
+
+        self.task.snapshot_log()
+        self.task.refresh_from_db()
+
+        self.assertEqual(self.task.log, "one\ntwo\n")
+
+    def test_read_legacy_log(self):
+        self.task.log = "one\ntwo\nthree\n"
+        self.task.save()
+
+        self.assertEqual(TaskLogLine.objects.read(self.task, 1), [(1, "two"), (2, "three")])
+        self.assertEqual(TaskLogLine.objects.line_count(self.task), 3)
+
+    def test_log_view(self):
+        TaskLogLine.objects.append(self.task.id, 0, [f"line {index}" for index in range(5)])
+
+        response = self.client.get(f"{self.url_prefix}{self.task.id}/log/", {"offset": 1, "limit": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([line["message"] for line in response.data["lines"]], ["line 1", "line 2"])
+        self.assertEqual(response.data["next_offset"], 3)
+        self.assertFalse(response.data["finished"])
+
+        response = self.client.get(f"{self.url_prefix}{self.task.id}/log/", {"tail": 2})
+
+        self.assertEqual([line["line"] for line in response.data["lines"]], [3, 4])
+        self.assertEqual(response.data["next_offset"], 5)
+
+        response = self.client.get(f"{self.url_prefix}{self.task.id}/log/", {"offset": "x"})
+
+        self.assertEqual(response.status_code, 400)
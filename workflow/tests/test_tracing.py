@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from workflow.tracing import Spans
+
+
+class SpansTestCase(SimpleTestCase):
+    def test_phases_are_timed_in_order(self):
+        spans = Spans()
+        with mock.patch("workflow.tracing.time.perf_counter", side_effect=[0.0, 0.5, 1.0, 1.25]):
+            with spans.span("import_user_tasks"):
+                pass
+            with spans.span("user_code"):
+                pass
+
+        self.assertEqual(spans.as_dict(), {"import_user_tasks": 500.0, "user_code": 250.0})
+
+    def test_repeated_phase_accumulates(self):
+        spans = Spans()
+        with mock.patch("workflow.tracing.time.perf_counter", side_effect=[0.0, 0.1, 1.0, 1.2]):
+            with spans.span("set_schema"):
+                pass
+            with spans.span("set_schema"):
+                pass
+
+        self.assertEqual(spans.as_dict(), {"set_schema": 300.0})
+
+    def test_failed_phase_is_recorded(self):
+        spans = Spans()
+        with self.assertRaisesMessage(ValueError, "boom"), spans.span("user_code"):
+            raise ValueError("boom")
+
+        self.assertIn("user_code", spans.as_dict())
+
+    def test_emit(self):
+        spans = Spans()
+        with spans.span("user_code"):
+            pass
+
+        with self.assertLogs("workflow", level="INFO") as logs:
+            timings = spans.emit(SimpleNamespace(id=1, name="com.finmars.test:task"))
+
+        self.assertEqual(list(timings), ["user_code"])
+        self.assertEqual(logs.records[0].metric, "workflow.task.timings")
+        self.assertEqual(logs.records[0].timings, timings)
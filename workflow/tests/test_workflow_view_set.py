@@ -1,5 +1,6 @@
 from datetime import date
 
+from django.test import override_settings
 from rest_framework.test import APIClient
 
 from workflow.models import Space, User, Workflow
@@ -28,7 +29,7 @@ class WorkflowViewSetFilterTestCase(BaseTestCase):
             name="Workflow 1",
             user_code="workflow1",
             status=Workflow.STATUS_INIT,
-            payload_data='{"key": "test1"}',
+            payload_data={"key": "test1"},
         )
         self.workflow1.created_at = date(2024, 6, 1)
         self.workflow1.save()
@@ -39,7 +40,7 @@ class WorkflowViewSetFilterTestCase(BaseTestCase):
             name="Workflow 2",
             user_code="workflow2",
             status=Workflow.STATUS_WAIT,
-            payload_data='{"key": "test2"}',
+            payload_data={"key": "test2"},
         )
         self.workflow2.created_at = date(2024, 7, 1)
         self.workflow2.save()
@@ -51,7 +52,7 @@ class WorkflowViewSetFilterTestCase(BaseTestCase):
             name="Workflow 3",
             user_code="workflow3",
             status=Workflow.STATUS_WAIT,
-            payload_data='{"key": "test3"}',
+            payload_data={"key": "test3"},
             workflow_template=workflow_template,
         )
         self.workflow3.created_at = date(2024, 8, 1)
@@ -70,6 +71,16 @@ class WorkflowViewSetFilterTestCase(BaseTestCase):
         self.assertNotIn(self.workflow2.id, ids)
         self.assertNotIn(self.workflow1.id, ids)
 
+    @override_settings(WORKFLOW_CLAIM_CHECK_THRESHOLD=64)
+    def test_offloaded_payload_is_not_searchable(self):
+        workflow = Workflow(space=self.space, owner=self.user, name="Workflow 4", user_code="workflow4")
+        workflow.payload = {"key": "offloaded", "rows": ["x" * 64]}
+        workflow.save()
+
+        response = self.client.get(self.url_prefix, {"payload": "offloaded"})
+
+        self.assertEqual(response.data["count"], 0)
+
     def test_filter_queryset_date_range(self):
         response = self.client.get(
             self.url_prefix,
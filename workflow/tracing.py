@@ -0,0 +1,40 @@
+import logging
+import time
+from contextlib import contextmanager
+
+_l = logging.getLogger("workflow")
+
+
+class Spans:
+    """
+    Wall clock time spent in named phases of a task, a phase entered more than
+    once accumulates.
+
+        spans = Spans()
+        with spans.span("import_user_tasks"):
+            ...
+        spans.as_dict()  # {"import_user_tasks": 12.5}
+    """
+
+    def __init__(self):
+        self.durations = {}
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - started
+
+    def as_dict(self):
+        """Durations in milliseconds, in the order phases were first entered."""
+        return {name: round(duration * 1000, 3) for name, duration in self.durations.items()}
+
+    def emit(self, task):
+        timings = self.as_dict()
+        _l.info(
+            f"task_timings {task.name} {task.id} {timings}",
+            extra={"metric": "workflow.task.timings", "task_id": task.id, "task_name": task.name, "timings": timings},
+        )
+        return timings
@@ -6,6 +6,8 @@ import sys
 
 from celery.schedules import crontab
 from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
 from jsonschema.validators import validator_for
 
 from workflow.exceptions import WorkflowSyntaxError
@@ -159,16 +161,9 @@ def construct_path(*args):
 
 
 def schema_exists(schema_name):
-    with connection.cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT schema_name
-            FROM information_schema.schemata
-            WHERE schema_name = %s;
-        """,
-            [schema_name],
-        )
-        return cursor.fetchone() is not None
+    from workflow.schemas import schema_registry
+
+    return schema_registry.exists(schema_name)
 
 
 def get_all_tenant_schemas():
@@ -206,13 +201,38 @@ def is_special_execution_context():
     return any(cmd in sys.argv for cmd in special_commands)
 
 
+def set_search_path(schema):
+    """
+    Switch the connection to a tenant schema, skipping the round trip when
+    the persistent connection is already there.
+
+    Inside a transaction the SET is always sent, a rollback may undo it. A
+    closed connection is reopened on the server default, whatever was set
+    before it was closed.
+    """
+    if (
+        connection.connection is None
+        or connection.in_atomic_block
+        or getattr(connection, "workflow_search_path", None) != schema
+    ):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET search_path TO {schema};")
+
+    connection.workflow_search_path = None if connection.in_atomic_block else schema
+
+
+@receiver(connection_created)
+def reset_search_path(sender, connection, **kwargs):
+    # a new connection starts on the server default
+    connection.workflow_search_path = None
+
+
 def set_schema_from_context(context):
     if context:
         if context.get("space_code"):
             if schema_exists(context.get("space_code")):
                 space_code = context.get("space_code")
-                with connection.cursor() as cursor:
-                    cursor.execute(f"SET search_path TO {space_code};")
+                set_search_path(space_code)
 
             else:
                 raise Exception("No space_code in database schemas")
@@ -227,30 +247,93 @@ def generate_random_string(N):
 
 
 def are_inputs_ready(workflow, node_id, connections):
-    # Get all nodes feeding into the current node
+    """
+    Check that the latest task of every node feeding node_id succeeded.
 
+    Only used for runs without join barriers, see NodeInputBarrier.
+    """
     from workflow.models import Task
 
-    input_nodes = [conn["source"] for conn in connections if conn["target"] == node_id]
+    input_nodes = {conn["source"] for conn in connections if conn["target"] == node_id}
 
-    # _l.info('input_nodes %s ' % input_nodes)
+    statuses = dict(
+        Task.objects.filter(workflow=workflow, node_id__in=input_nodes)
+        .order_by("node_id", "-created_at")
+        .distinct("node_id")
+        .values_list("node_id", "status")
+    )
 
-    for input_node in input_nodes:
-        # If any input node is not complete, return False
-        try:
-            task = Task.objects.get(workflow=workflow, node_id=input_node)
+    return all(statuses.get(input_node) == Task.STATUS_SUCCESS for input_node in input_nodes)
 
-            if task.status == Task.STATUS_SUCCESS:
-                pass
-            else:
+
+QUEUE_SLOT_TABLE = "public.workflow_queue_slot"
+
+
+def is_queue_slot_in_use(schema, task_id):
+    """A slot is held while its Task is queued, running or waiting for a retry."""
+    from workflow.models import Task
+    from workflow.schemas import schema_registry
+
+    if not schema_registry.exists(schema):
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT status FROM {connection.ops.quote_name(schema)}.{Task._meta.db_table} WHERE id = %s", [task_id]
+        )
+        row = cursor.fetchone()
+
+    return bool(row) and row[0] in (Task.STATUS_INIT, Task.STATUS_PROGRESS, Task.STATUS_RETRY)
+
+
+def reserve_queue_slot(queue, task):
+    """
+    Take a slot of queue for the Task of a v2 node, False when
+    settings.WORKFLOW_QUEUE_CONCURRENCY slots are taken across all spaces.
+
+    Slots live in the public schema. A full queue first drops the slots of
+    tasks that finished without releasing them. Must run in the transaction
+    that creates the Task, the advisory lock serializes concurrent
+    reservations until it commits.
+    """
+    from django.conf import settings
+
+    limit = settings.WORKFLOW_QUEUE_CONCURRENCY.get(queue)
+    if not limit:
+        return True
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"workflow.queue:{queue}"])
+        cursor.execute(f"SELECT schema_name, task_id FROM {QUEUE_SLOT_TABLE} WHERE queue = %s", [queue])
+        slots = cursor.fetchall()
+
+        if len(slots) >= limit:
+            stale = [(schema, task_id) for schema, task_id in slots if not is_queue_slot_in_use(schema, task_id)]
+            for schema, task_id in stale:
+                cursor.execute(
+                    f"DELETE FROM {QUEUE_SLOT_TABLE} WHERE queue = %s AND schema_name = %s AND task_id = %s",
+                    [queue, schema, task_id],
+                )
+            if len(slots) - len(stale) >= limit:
                 return False
 
-        except Exception as e:
-            _l.error(f"are_inputs_ready workflow: {workflow} e: {e}")
-            return False
+        cursor.execute(
+            f"INSERT INTO {QUEUE_SLOT_TABLE} (queue, schema_name, task_id) VALUES (%s, current_schema(), %s)",
+            [queue, task.id],
+        )
+
     return True
 
 
+def release_queue_slot(task):
+    """Free the queue slot of a finished Task of the current schema."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {QUEUE_SLOT_TABLE} WHERE queue = %s AND schema_name = current_schema() AND task_id = %s",
+            [task.queue, task.id],
+        )
+
+
 def get_next_node_by_condition(current_node_id, condition_result, connections):
     """
     Determine the next node to execute based on the condition result and the connections.
@@ -3,8 +3,11 @@ import os
 import traceback
 
 import django_filters
+from django.conf import settings
 from django.core.management import call_command
-from django.http import HttpResponse
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
@@ -17,13 +20,16 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ViewSet
 
+from workflow.exceptions import TooManyStreams
 from workflow.filters import (
     WholeWordsSearchFilter,
     WorkflowQueryFilter,
     WorkflowSearchParamFilter,
 )
-from workflow.models import Schedule, Task, Workflow, WorkflowTemplate
+from workflow.models import Schedule, Task, TaskLogLine, Workflow, WorkflowTemplate
 from workflow.monitoring import get_celery_tasks_data, get_rabbitmq_queues_info
+from workflow.notifications import listen_progress
+from workflow.plan import get_workflow_plan
 from workflow.serializers import (
     BulkSerializer,
     CeleryMonitoringSerializer,
@@ -39,7 +45,7 @@ from workflow.serializers import (
 )
 from workflow.system import get_system_workflow_manager
 from workflow.user_sessions import create_session, execute_code, execute_file, sessions
-from workflow.workflows import execute_workflow
+from workflow.workflows import execute_workflow, resume_workflow_from_failure
 
 _l = logging.getLogger("workflow")
 
@@ -122,7 +128,11 @@ class WorkflowFilterSet(FilterSet):
 
 
 class WorkflowViewSet(ModelViewSet):
-    queryset = Workflow.objects.select_related("owner", "crontab")
+    # payload_data is jsonb, whole-word search runs on its text. Payloads offloaded to
+    # claim-check blobs are stored as a reference only, their content is not searchable
+    queryset = Workflow.objects.select_related("owner", "crontab").alias(
+        payload_text=Cast("payload_data", TextField())
+    )
     serializer_class = WorkflowSerializer
     permission_classes = ModelViewSet.permission_classes + []
     filter_class = WorkflowFilterSet
@@ -132,7 +142,7 @@ class WorkflowViewSet(ModelViewSet):
         WholeWordsSearchFilter,
         OrderingFilter,
     ]
-    search_fields = ["payload_data"]
+    search_fields = ["payload_text"]
     ordering_fields = [
         "name",
         "user_code",
@@ -202,11 +212,101 @@ class WorkflowViewSet(ModelViewSet):
 
         return Response(data)
 
+    @action(detail=True, methods=("GET",), url_path="events")
+    def events(self, request, pk=None, *args, **kwargs):
+        """Server-sent progress events of the workflow's tasks."""
+        workflow = self.get_object()
+
+        try:
+            stream = listen_progress(request.space_code, workflow.id)
+        except TooManyStreams:
+            return Response(
+                {"message": "Too many open event streams, retry later."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(settings.WORKFLOW_EVENTS_HEARTBEAT)},
+            )
+
+        # the response closes the stream when the client goes away
+        response = StreamingHttpResponse(stream, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @action(detail=True, methods=("GET",), url_path="critical-path")
+    def critical_path(self, request, pk=None, *args, **kwargs):
+        workflow = self.get_object()
+
+        if not workflow.workflow_template:
+            return Response(
+                {"message": "Critical path is only available for v2 workflows."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        plan = get_workflow_plan(workflow.workflow_template, workflow.space.space_code)
+        tasks = {
+            task.node_id: task
+            for task in Task.objects.filter(workflow=workflow, node_id__in=plan.nodes)
+            .order_by("node_id", "-created_at")
+            .distinct("node_id")
+        }
+
+        path = plan.get_critical_path(
+            {node_id: task.finished_at for node_id, task in tasks.items() if task.finished_at}
+        )
+
+        def seconds(start, end):
+            return (end - start).total_seconds() if start and end else None
+
+        nodes = [
+            {
+                "node_id": node_id,
+                "name": task.name,
+                "status": task.status,
+                "enqueued_at": task.enqueued_at,
+                "started_at": task.started_at,
+                "finished_at": task.finished_at,
+                "queue_time": seconds(task.enqueued_at, task.started_at),
+                "run_time": seconds(task.started_at, task.finished_at),
+                "on_critical_path": node_id in path,
+            }
+            for node_id, task in sorted(tasks.items(), key=lambda item: plan.levels.get(item[0], 0))
+        ]
+
+        duration = None
+        if path:
+            first, last = tasks[path[0]], tasks[path[-1]]
+            duration = seconds(first.enqueued_at or first.started_at, last.finished_at)
+
+        return Response({"critical_path": path, "duration": duration, "nodes": nodes})
+
+    @action(detail=True, methods=("POST",), url_path="resume-from-failure")
+    def resume_from_failure(self, request, pk=None, *args, **kwargs):
+        workflow = self.get_object()
+
+        if workflow.status not in [Workflow.STATUS_ERROR, Workflow.STATUS_TIMEOUT, Workflow.STATUS_CANCELED]:
+            return Response(
+                {"message": "Only failed, timed out or canceled workflows can be resumed from failure."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            data = resume_workflow_from_failure(
+                request.user.username,
+                workflow,
+                request.realm_code,
+                request.space_code,
+            )
+        except Exception as e:
+            _l.error("resume_from_failure %s", e)
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(data)
+
     @action(detail=True, methods=("POST",), url_path="cancel")
     def cancel(self, request, pk=None, *args, **kwargs):
         workflow = Workflow.objects.get(id=pk)
 
-        if workflow.status in [Workflow.STATUS_INIT, Workflow.STATUS_PROGRESS, Workflow.STATUS_WAIT]:
+        if workflow.status in [*Workflow.ACTIVE_STATUSES, Workflow.STATUS_QUEUED]:
             workflow.cancel()
 
             return Response(workflow.to_dict())
@@ -226,7 +326,7 @@ class WorkflowViewSet(ModelViewSet):
 
         data = serializer.validated_data
         workflows = Workflow.objects.filter(
-            id__in=data["ids"], status__in=[Workflow.STATUS_INIT, Workflow.STATUS_PROGRESS, Workflow.STATUS_WAIT]
+            id__in=data["ids"], status__in=[*Workflow.ACTIVE_STATUSES, Workflow.STATUS_QUEUED]
         )
         for workflow in workflows:
             workflow.cancel()
@@ -314,31 +414,12 @@ class WorkflowViewSet(ModelViewSet):
             workflow.status = Workflow.STATUS_PROGRESS
             workflow.save()
 
-            from workflow.tasks.workflows import process_next_node
+            from workflow.tasks.workflows import dispatch_node
 
             # Trigger the next task from the stored `current_node_id`
             if workflow.current_node_id:
-                nodes = {node["id"]: node for node in workflow.workflow_template.data["workflow"]["nodes"]}
-                connections = workflow.workflow_template.data["workflow"]["connections"]
-                adjacency_list = {node_id: [] for node_id in nodes}
-                for connection in connections:
-                    adjacency_list[connection["source"]].append(connection["target"])
-
-                process_next_node.apply_async(
-                    kwargs={
-                        "current_node_id": workflow.current_node_id,
-                        "workflow_id": workflow.id,
-                        # Fetch nodes, adjacency_list, and connections from the workflow data
-                        "nodes": nodes,
-                        "adjacency_list": adjacency_list,
-                        "connections": connections,
-                        "context": {
-                            "realm_code": workflow.space.realm_code,
-                            "space_code": workflow.space.space_code,
-                        },
-                    },
-                    queue="workflow",
-                )
+                plan = get_workflow_plan(workflow.workflow_template, workflow.space.space_code)
+                dispatch_node(workflow, workflow.current_node_id, plan)
 
                 return Response(
                     {"message": f"Workflow {workflow.id} resumed successfully."},
@@ -360,6 +441,43 @@ class TaskViewSet(ModelViewSet):
     permission_classes = ModelViewSet.permission_classes + []
     filter_backends = ModelViewSet.filter_backends + []
 
+    @action(detail=True, methods=("GET",), url_path="log")
+    def log(self, request, pk=None, *args, **kwargs):
+        """
+        Page through the task log from ?offset=, or read the last ?tail= lines.
+        Poll with the returned next_offset to follow a running task.
+        """
+        task = self.get_object()
+
+        try:
+            offset = max(int(request.query_params.get("offset", 0)), 0)
+            limit = min(
+                int(request.query_params.get("limit", settings.WORKFLOW_LOG_PAGE_SIZE)),
+                settings.WORKFLOW_LOG_PAGE_SIZE,
+            )
+            tail = request.query_params.get("tail")
+            tail = int(tail) if tail is not None else None
+        except ValueError:
+            return Response(
+                {"message": "offset, limit and tail must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if tail is not None:
+            limit = min(max(tail, 0), settings.WORKFLOW_LOG_PAGE_SIZE)
+            offset = max(TaskLogLine.objects.line_count(task) - limit, 0)
+
+        lines = TaskLogLine.objects.read(task, offset, limit) if limit > 0 else []
+
+        return Response(
+            {
+                "offset": offset,
+                "next_offset": lines[-1][0] + 1 if lines else offset,
+                "finished": task.finished_at is not None,
+                "lines": [{"line": line_number, "message": message} for line_number, message in lines],
+            }
+        )
+
 
 class PingViewSet(ViewSet):
     permission_classes = [
@@ -432,11 +550,8 @@ class DefinitionViewSet(ViewSet):
     def list(self, request, *args, **kwargs):
         workflow_definitions = []
 
-        for user_code, definition in sorted(system_workflow_manager.workflows.items()):
-            # _l.info('DefinitionViewSet.definition %s' % definition)
-
-            if definition["workflow"]["space_code"] == request.space_code:
-                workflow_definitions.append({"user_code": user_code, **definition["workflow"]})
+        for user_code, definition in sorted(system_workflow_manager.get_space_workflows(request.space_code).items()):
+            workflow_definitions.append({"user_code": user_code, **definition["workflow"]})
 
         return Response(workflow_definitions)
 
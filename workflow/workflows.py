@@ -1,8 +1,13 @@
 import logging
 
+from celery.utils import uuid
+from django.db import transaction
+
 from workflow.builder import WorkflowBuilder
-from workflow.models import Space, User, Workflow, WorkflowTemplate
-from workflow.tasks.workflows import execute_workflow_v2
+from workflow.concurrency import POLICY_QUEUE, admit_workflow, get_concurrency_policy, take_queued_workflows
+from workflow.models import NodeInputBarrier, Space, Task, User, Workflow, WorkflowTemplate
+from workflow.plan import NODE_TYPE_CONDITION, get_workflow_plan
+from workflow.tasks.workflows import dispatch_nodes, execute_workflow_v2, schedule_queued_workflows
 
 _l = logging.getLogger("workflow")
 
@@ -50,8 +55,26 @@ def execute_workflow(
         platform_task_id=platform_task_id,
         crontab_id=crontab_id,
     )
-    obj.save()
 
+    policy, limit = get_concurrency_policy(wf, workflow_template)
+    with transaction.atomic():
+        replaced = admit_workflow(obj, policy, limit)
+
+        # the active run may have finished before this one was committed as queued
+        if obj.status == Workflow.STATUS_QUEUED:
+            schedule_queued_workflows(obj)
+
+    for workflow in replaced:
+        _l.info(f"Canceling workflow {workflow.id}, replaced by a new run")
+        workflow.cancel()
+
+    if obj.status == Workflow.STATUS_INIT:
+        start_workflow(obj, wf, realm_code, space_code)
+
+    return obj.to_dict()
+
+
+def start_workflow(obj, wf, realm_code, space_code):
     # Build the workflow and execute it
 
     if wf.get("version") == "2":
@@ -74,4 +97,122 @@ def execute_workflow(
 
         _l.info(f"Workflow sent : {workflow.canvas}")
 
+
+def start_queued_workflows(user_code, realm_code, space_code):
+    """Start the queued runs of a workflow that fit in its concurrency limit."""
+    queued = Workflow.objects.filter(user_code=user_code, status=Workflow.STATUS_QUEUED).first()
+    if not queued:
+        return []
+
+    from workflow.system import get_system_workflow_manager
+
+    wf = get_system_workflow_manager().get_by_user_code(user_code, sync_remote=True)
+    policy, limit = get_concurrency_policy(wf, queued.workflow_template)
+    if policy != POLICY_QUEUE:
+        # the policy changed since the runs were queued
+        limit = Workflow.objects.filter(user_code=user_code, status=Workflow.STATUS_QUEUED).count()
+
+    with transaction.atomic():
+        started = take_queued_workflows(user_code, space_code, limit)
+
+    for obj in started:
+        _l.info(f"Starting queued workflow {obj.id}")
+        start_workflow(obj, wf, realm_code, space_code)
+
+    return started
+
+
+def get_resume_frontier(plan, finished):
+    """
+    Return the nodes a resumed v2 run starts from: nodes that did not finish
+    and whose finished inputs lead to them, conditions follow their result.
+
+    finished maps node ids to the results of their successful tasks.
+    """
+    frontier = [node_id for node_id in plan.start_nodes if node_id not in finished]
+
+    for node_id, result in finished.items():
+        for next_node_id in plan.get_next_node_ids(node_id, result or {}):
+            if next_node_id in finished or next_node_id in frontier:
+                continue
+            if all(source in finished for source in plan.reverse_adjacency_list[next_node_id]):
+                frontier.append(next_node_id)
+
+    return frontier
+
+
+def resume_workflow_from_failure(username, workflow, realm_code=None, space_code=None):
+    """
+    Start a new run of a failed v2 workflow that reuses the outputs of the
+    nodes that succeeded and only runs the failed node and what follows it.
+
+    v1 workflows have no node graph to resume from, they are relaunched.
+    """
+    if not workflow.workflow_template:
+        _l.info("resume_workflow_from_failure: %s is not a v2 workflow, relaunching", workflow.id)
+        return execute_workflow(username, workflow.user_code, workflow.payload, realm_code, space_code)
+
+    plan = get_workflow_plan(workflow.workflow_template, workflow.space.space_code)
+
+    finished_tasks = [
+        task
+        for task in Task.objects.filter(workflow=workflow, node_id__in=plan.nodes)
+        .order_by("node_id", "-created_at")
+        .distinct("node_id")
+        if task.status == Task.STATUS_SUCCESS
+    ]
+    # only conditions need their result to pick the branch to follow
+    finished = {
+        task.node_id: task.result if plan.get_node_type(task.node_id) == NODE_TYPE_CONDITION else None
+        for task in finished_tasks
+    }
+
+    frontier = get_resume_frontier(plan, finished)
+    if not frontier:
+        raise Exception(f"Workflow {workflow.id} has no failed node to resume from")
+
+    with transaction.atomic():
+        obj = Workflow.objects.create(
+            owner=User.objects.get(username=username),
+            space=workflow.space,
+            user_code=workflow.user_code,
+            payload=workflow.payload,
+            workflow_template=workflow.workflow_template,
+            is_manager=workflow.is_manager,
+            resumed_from=workflow,
+            status=Workflow.STATUS_PROGRESS,
+        )
+
+        Task.objects.bulk_create(
+            [
+                Task(
+                    workflow=obj,
+                    space=obj.space,
+                    celery_task_id=uuid(),
+                    name=task.name,
+                    node_id=task.node_id,
+                    source_code=task.source_code,
+                    status=Task.STATUS_SUCCESS,
+                    worker_name=task.worker_name,
+                    queue=task.queue,
+                    payload_data=task.payload_data,
+                    result_data=task.result_data,
+                    finished_at=task.finished_at,
+                )
+                for task in finished_tasks
+            ]
+        )
+
+        NodeInputBarrier.objects.create_for_plan(obj, plan, finished_node_ids=finished)
+
+        transaction.on_commit(lambda: dispatch_nodes(obj, frontier, plan))
+
+    _l.info(
+        "resume_workflow_from_failure: %s resumes %s, %s nodes reused, starting from %s",
+        obj.id,
+        workflow.id,
+        len(finished_tasks),
+        frontier,
+    )
+
     return obj.to_dict()
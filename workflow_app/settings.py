@@ -148,6 +148,11 @@ DATABASES = {
         'PASSWORD': ENV_STR('DB_PASSWORD', None),
         'HOST': ENV_STR('DB_HOST', None),
         'PORT': ENV_INT('DB_PORT', 5432),
+        # persistent connections, one per process or thread kept for CONN_MAX_AGE seconds, this is not
+        # a pool. They keep their search_path, see workflow.utils.set_search_path. Workers reset it to
+        # public after every task, so the SET is only skipped by code that switches to the schema it is in
+        'CONN_MAX_AGE': ENV_INT('DB_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': ENV_BOOL('DB_CONN_HEALTH_CHECKS', True),
         'OPTIONS': {
             'connect_timeout': 5  # new timeout setting
         }
@@ -444,6 +449,93 @@ CELERY_TASK_REJECT_ON_WORKER_LOST = ENV_BOOL("CELERY_TASK_REJECT_ON_WORKER_LOST"
 CELERY_SEND_EVENTS = ENV_BOOL("CELERY_SEND_EVENTS", True)
 CELERY_WORKER_SEND_TASK_EVENTS = ENV_BOOL("CELERY_WORKER_SEND_TASK_EVENTS", True)
 
+# ===================
+# = WORKFLOW ENGINE =
+# ===================
+
+# Compiled v2 execution plans kept per process, see workflow.plan
+WORKFLOW_PLAN_CACHE_SIZE = ENV_INT("WORKFLOW_PLAN_CACHE_SIZE", 256)
+
+# Seconds publish_batch waits for the broker to confirm a batch, see workflow.publisher
+WORKFLOW_PUBLISH_CONFIRM_TIMEOUT = ENV_INT("WORKFLOW_PUBLISH_CONFIRM_TIMEOUT", 30)
+
+# Payloads and node outputs of this size (bytes) or larger are passed by reference, see workflow.claim_check
+WORKFLOW_CLAIM_CHECK_THRESHOLD = ENV_INT("WORKFLOW_CLAIM_CHECK_THRESHOLD", 256 * 1024)
+# Days an unreferenced blob is kept after it was last stored, collected once a day
+WORKFLOW_CLAIM_CHECK_RETENTION_DAYS = ENV_INT("WORKFLOW_CLAIM_CHECK_RETENTION_DAYS", 7)
+
+# Max queued, running and retrying v2 nodes of all spaces on a queue picked with the node "queue" hint,
+# e.g. "big-memory=2,pricing=4", queues not listed are unlimited
+WORKFLOW_QUEUE_CONCURRENCY = {
+    queue.strip(): int(limit)
+    for queue, limit in (
+        item.split("=") for item in ENV_STR("WORKFLOW_QUEUE_CONCURRENCY", "").split(",") if item.strip()
+    )
+}
+# Seconds before a node waiting for a queue slot is tried again
+WORKFLOW_QUEUE_RETRY_DELAY = ENV_INT("WORKFLOW_QUEUE_RETRY_DELAY", 10)
+
+# Child workflows a map node runs at once unless its data sets "max_parallel"
+WORKFLOW_MAP_MAX_PARALLEL = ENV_INT("WORKFLOW_MAP_MAX_PARALLEL", 10)
+
+# Results of nodes with "memoize" in their data, see workflow.memoize
+WORKFLOW_MEMOIZE_DEFAULT_TTL = ENV_INT("WORKFLOW_MEMOIZE_DEFAULT_TTL", 24 * 60 * 60)
+WORKFLOW_MEMOIZE_MAX_ENTRIES = ENV_INT("WORKFLOW_MEMOIZE_MAX_ENTRIES", 10000)
+
+# Platform status callbacks outbox, see workflow.tasks.callbacks
+WORKFLOW_CALLBACK_BATCH_SIZE = ENV_INT("WORKFLOW_CALLBACK_BATCH_SIZE", 50)
+WORKFLOW_CALLBACK_MAX_ATTEMPTS = ENV_INT("WORKFLOW_CALLBACK_MAX_ATTEMPTS", 8)
+# Seconds before the first retry, doubled on every following attempt
+WORKFLOW_CALLBACK_RETRY_DELAY = ENV_INT("WORKFLOW_CALLBACK_RETRY_DELAY", 30)
+# Seconds one platform call may take
+WORKFLOW_CALLBACK_TIMEOUT = ENV_INT("WORKFLOW_CALLBACK_TIMEOUT", 10)
+# Seconds between two sweeps of every space for callbacks that are due, see relay_platform_callbacks
+WORKFLOW_CALLBACK_RELAY_INTERVAL = ENV_INT("WORKFLOW_CALLBACK_RELAY_INTERVAL", 60)
+
+# Maintenance tasks run by beat, each goes through every space itself
+CELERY_BEAT_SCHEDULE = {
+    "relay-platform-callbacks": {
+        "task": "workflow.tasks.callbacks.relay_platform_callbacks",
+        "schedule": WORKFLOW_CALLBACK_RELAY_INTERVAL,
+        "options": {"queue": "workflow"},
+    },
+    "collect-payload-blobs": {
+        "task": "workflow.tasks.claim_check.collect_payload_blobs",
+        "schedule": 24 * 60 * 60,
+        "options": {"queue": "workflow"},
+    },
+}
+
+# Task log lines are buffered by BaseTask.log and inserted once this many are pending
+# or this many seconds passed since the last insert
+WORKFLOW_LOG_BUFFER_SIZE = ENV_INT("WORKFLOW_LOG_BUFFER_SIZE", 500)
+WORKFLOW_LOG_FLUSH_INTERVAL = ENV_INT("WORKFLOW_LOG_FLUSH_INTERVAL", 2)
+# Max lines returned by one request to the task log endpoint
+WORKFLOW_LOG_PAGE_SIZE = ENV_INT("WORKFLOW_LOG_PAGE_SIZE", 1000)
+
+# Milliseconds between two progress writes of a running task, updates in between are coalesced
+WORKFLOW_PROGRESS_FLUSH_INTERVAL = ENV_INT("WORKFLOW_PROGRESS_FLUSH_INTERVAL", 500)
+# Seconds a progress event stream stays open and between two heartbeats, see workflow.notifications
+WORKFLOW_EVENTS_TIMEOUT = ENV_INT("WORKFLOW_EVENTS_TIMEOUT", 300)
+WORKFLOW_EVENTS_HEARTBEAT = ENV_INT("WORKFLOW_EVENTS_HEARTBEAT", 15)
+# Event streams open at once per web process, each holds a thread, keep it below GUNICORN_THREADS
+WORKFLOW_EVENTS_MAX_STREAMS = ENV_INT("WORKFLOW_EVENTS_MAX_STREAMS", 4)
+
+# Seconds before the second attempt of a node with a "retry" policy, doubled on every following attempt
+WORKFLOW_RETRY_BACKOFF = ENV_INT("WORKFLOW_RETRY_BACKOFF", 2)
+WORKFLOW_RETRY_MAX_BACKOFF = ENV_INT("WORKFLOW_RETRY_MAX_BACKOFF", 600)
+
+# Seconds the tenant schema list is cached per process, changes are also pushed with LISTEN/NOTIFY,
+# see workflow.schemas
+WORKFLOW_SCHEMA_REGISTRY_TTL = ENV_INT("WORKFLOW_SCHEMA_REGISTRY_TTL", 60)
+WORKFLOW_SCHEMA_LISTEN = ENV_BOOL("WORKFLOW_SCHEMA_LISTEN", True)
+# Schemas migrated at the same time by migrate_all_schemes
+WORKFLOW_MIGRATE_WORKERS = ENV_INT("WORKFLOW_MIGRATE_WORKERS", 4)
+
+# Workflow definitions are loaded per space on first use. At startup a background thread loads the spaces
+# that ran a workflow in the last WORKFLOW_WARMUP_DAYS days, 0 disables it
+WORKFLOW_WARMUP_DAYS = ENV_INT("WORKFLOW_WARMUP_DAYS", 7)
+
 # ==============
 # = WEBSOCKETS =
 # ==============